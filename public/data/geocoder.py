@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Offline geocoder for business addresses: ZIP and city centroids from a local table.
+
+Step 4 used to ask DeepSeek for the coordinates of the BBB address, one round
+trip per site. The guess was often wrong, and any failure put the map in
+Atlanta. Here an address is normalized once ("40 Tipperary TrlSharpsburg, GA
+30277-3502" -> ZIP 30277, city "sharpsburg", state GA) and looked up in a
+binary centroid table. The table is memory-mapped and read in O(1):
+    ZIP     direct index: slot int(zip5) of 100,000 (lat, lng) float32 pairs
+    city    open-addressed hash table keyed by a 64-bit hash of "city|ST"
+
+Lookups go from the most to the least precise source. The LLM is asked when
+there is no table (so a default run without one still places the business near
+its address rather than on its state centroid) or when GEOCODER_LLM=1, and its
+answer is dropped when it lies outside the state. Replies go through the shared
+response cache, so an address costs one call however often it is geocoded.
+    zip  ->  city, state  ->  LLM  ->  state centroid  ->  None
+
+The table is built from a GeoNames postal-code dump (US.txt from
+https://download.geonames.org/export/zip/, which also gives city centroids) or
+a Census ZCTA gazetteer file (ZIPs only):
+    python geocoder.py --build US.txt
+
+Environment:
+    GEOCODER_TABLE      table path (default raw_data/geo/us_places.bin)
+    GEOCODER_LLM        1: ask DeepSeek when the table has neither the ZIP nor the city;
+                        0: never ask (default: ask only when there is no table)
+
+Usage:
+    from geocoder import geocode
+    result = geocode("40 Tipperary TrlSharpsburg, GA 30277-3502")
+    if result is not None:
+        result.lat, result.lng, result.source     # source: zip, city, llm or state
+
+    python geocoder.py "40 Tipperary TrlSharpsburg, GA 30277-3502"
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TABLE_PATH = os.path.join(DATA_DIR, "raw_data", "geo", "us_places.bin")
+
+TABLE_MAGIC = b"GEO1"
+TABLE_VERSION = 1
+_HEADER = struct.Struct("<4sHHII")      # magic, version, reserved, ZIP slots, city slots
+_POINT = struct.Struct("<ff")           # lat, lng
+_CITY_SLOT = struct.Struct("<Qff")      # key hash (0 = empty), lat, lng
+ZIP_SLOTS = 100000
+
+# Geographic center of the contiguous US, for maps whose address cannot be placed at all
+US_CENTROID = (39.8283, -98.5795)
+
+# Approximate centers of the states, used when the address names nothing more precise
+STATE_CENTROIDS = {
+    "AL": (32.3182, -86.9023), "AK": (63.5888, -154.4931), "AZ": (34.0489, -111.0937),
+    "AR": (35.2011, -91.8318), "CA": (36.7783, -119.4179), "CO": (39.5501, -105.7821),
+    "CT": (41.6032, -73.0877), "DE": (38.9108, -75.5277), "DC": (38.9060, -77.0334),
+    "FL": (27.6648, -81.5158), "GA": (32.1574, -82.9071), "HI": (19.8987, -155.6659),
+    "ID": (44.0682, -114.7420), "IL": (40.6331, -89.3985), "IN": (40.5512, -85.6024),
+    "IA": (41.8780, -93.0977), "KS": (39.0119, -98.4842), "KY": (37.8393, -84.2700),
+    "LA": (31.2448, -92.1450), "ME": (45.2538, -69.4455), "MD": (39.0458, -76.6413),
+    "MA": (42.4072, -71.3824), "MI": (44.3148, -85.6024), "MN": (46.7296, -94.6859),
+    "MS": (32.3547, -89.3985), "MO": (37.9643, -91.8318), "MT": (46.8797, -110.3626),
+    "NE": (41.4925, -99.9018), "NV": (38.8026, -116.4194), "NH": (43.1939, -71.5724),
+    "NJ": (40.0583, -74.4057), "NM": (34.9727, -105.0324), "NY": (43.2994, -74.2179),
+    "NC": (35.7596, -79.0193), "ND": (47.5515, -101.0020), "OH": (40.4173, -82.9071),
+    "OK": (35.0078, -97.0929), "OR": (43.8041, -120.5542), "PA": (41.2033, -77.1945),
+    "RI": (41.5801, -71.4774), "SC": (33.8361, -81.1637), "SD": (43.9695, -99.9018),
+    "TN": (35.5175, -86.5804), "TX": (31.9686, -99.9018), "UT": (39.3210, -111.0937),
+    "VT": (44.5588, -72.5778), "VA": (37.4316, -78.6569), "WA": (47.7511, -120.7401),
+    "WV": (38.5976, -80.4549), "WI": (43.7844, -88.7879), "WY": (43.0760, -107.2903),
+}
+
+# Largest distance from a state centroid, in degrees of arc, still accepted for an LLM answer
+DEFAULT_STATE_RADIUS = 8.0
+STATE_RADIUS = {"AK": 20.0, "HI": 5.0}
+
+# "GA 30277-3502"; a bare five-digit number is only taken as a ZIP at the end of the address
+_STATE_ZIP = re.compile(r"\b([A-Za-z]{2})\.?,?\s+(\d{5})(?:-\d{4})?\b")
+_TRAILING_ZIP = re.compile(r"\b(\d{5})(?:-\d{4})?\s*$")
+# The state may follow a comma or just a space ("PO Box 5, Atlanta GA"); it must be in STATE_CENTROIDS
+_TRAILING_STATE = re.compile(r"[,\s]+([A-Za-z]{2})\.?\s*$")
+# Street and city run together in BBB addresses ("Tipperary TrlSharpsburg")
+_RUN_TOGETHER = re.compile(r"(?<=[a-z])(?=[A-Z])")
+_PLACE_ABBREVIATIONS = {"st": "saint", "ste": "sainte", "mt": "mount", "ft": "fort", "pt": "point"}
+# Longest city name tried, in words ("Lake Havasu City" = 3)
+MAX_CITY_WORDS = 4
+
+
+def normalize_place(name: str) -> str:
+    """A city name reduced for comparison: lower case, no punctuation, common abbreviations spelled out."""
+    words = re.sub(r"[^a-z0-9 ]+", " ", name.lower().replace("'", "")).split()
+    return " ".join(_PLACE_ABBREVIATIONS.get(word, word) for word in words)
+
+
+def city_key(city: str, state: str) -> int:
+    """Stable non-zero 64-bit hash of a normalized "city|ST" (0 marks an empty table slot)."""
+    digest = hashlib.blake2b(f"{normalize_place(city)}|{state.upper()}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") | 1
+
+
+class ParsedAddress:
+    """The parts of an address the geocoder looks up; city_candidates are tried longest first."""
+
+    __slots__ = ("zip", "state", "city_candidates")
+
+    def __init__(self, zip_code: Optional[str], state: Optional[str], city_candidates: List[str]):
+        self.zip = zip_code
+        self.state = state
+        self.city_candidates = city_candidates
+
+
+def parse_address(address: str) -> ParsedAddress:
+    """Split a free-form US address into ZIP, state and the possible city names before the state."""
+    address = (address or "").strip()
+    zip_code = state = None
+    city_end = len(address)
+
+    match = None
+    for match in _STATE_ZIP.finditer(address):
+        pass
+    if match is not None and match.group(1).upper() in STATE_CENTROIDS:
+        state, zip_code = match.group(1).upper(), match.group(2)
+        city_end = match.start()
+    else:
+        trailing = _TRAILING_ZIP.search(address)
+        if trailing:
+            zip_code = trailing.group(1)
+            address_end = trailing.start()
+        else:
+            address_end = len(address)
+        state_match = _TRAILING_STATE.search(address[:address_end].rstrip(", "))
+        if state_match and state_match.group(1).upper() in STATE_CENTROIDS:
+            state = state_match.group(1).upper()
+            city_end = state_match.start()
+
+    # The city is the last comma-separated part before the state, minus any street words in front of it
+    words = _RUN_TOGETHER.sub(" ", address[:city_end].rstrip(" ,").rsplit(",", 1)[-1]).split()
+    city_words = []
+    for word in reversed(words[-MAX_CITY_WORDS:]):
+        if any(char.isdigit() for char in word):
+            break
+        city_words.insert(0, word)
+    candidates = [" ".join(city_words[start:]) for start in range(len(city_words))] if state else []
+    return ParsedAddress(zip_code, state, candidates)
+
+
+class Geocode:
+    """Coordinates of an address and the source they came from (zip, city, llm or state)."""
+
+    __slots__ = ("lat", "lng", "source", "city", "state", "zip")
+
+    def __init__(self, lat: float, lng: float, source: str, city: Optional[str] = None,
+                 state: Optional[str] = None, zip_code: Optional[str] = None):
+        self.lat = round(lat, 5)
+        self.lng = round(lng, 5)
+        self.source = source
+        self.city = city
+        self.state = state
+        self.zip = zip_code
+
+    def to_dict(self) -> Dict[str, object]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def within_state(point: Tuple[float, float], state: str) -> bool:
+    """Whether a point is plausibly in a state: within STATE_RADIUS degrees of arc of its centroid."""
+    lat, lng = STATE_CENTROIDS[state]
+    radius = STATE_RADIUS.get(state, DEFAULT_STATE_RADIUS)
+    return math.hypot(point[0] - lat, (point[1] - lng) * math.cos(math.radians(lat))) <= radius
+
+
+def llm_fallback_requested(has_table: bool = True) -> bool:
+    """GEOCODER_LLM when set; otherwise the LLM fallback is on exactly when there is no table."""
+    setting = os.getenv("GEOCODER_LLM", "").strip().lower()
+    if not setting:
+        return not has_table
+    return setting in ("1", "true", "yes", "on")
+
+
+class CentroidTable:
+    """Read-only view of a table written by build_table(), memory-mapped."""
+
+    def __init__(self, table_path: str):
+        self.table_path = table_path
+        with open(table_path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.zip_slots, self.city_slots = _HEADER.unpack_from(self._map, 0)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION:
+            self._map.close()
+            raise ValueError(f"{table_path} is not a version {TABLE_VERSION} centroid table")
+        self._city_offset = _HEADER.size + self.zip_slots * _POINT.size
+
+    def close(self):
+        self._map.close()
+
+    def zip_point(self, zip_code: str) -> Optional[Tuple[float, float]]:
+        index = int(zip_code)
+        if index >= self.zip_slots:
+            return None
+        lat, lng = _POINT.unpack_from(self._map, _HEADER.size + index * _POINT.size)
+        return None if math.isnan(lat) else (lat, lng)
+
+    def city_point(self, city: str, state: str) -> Optional[Tuple[float, float]]:
+        if not self.city_slots:
+            return None
+        key = city_key(city, state)
+        slot = key & (self.city_slots - 1)
+        # Linear probing; the table is at most half full, so an empty slot ends every search
+        while True:
+            stored, lat, lng = _CITY_SLOT.unpack_from(self._map, self._city_offset + slot * _CITY_SLOT.size)
+            if stored == key:
+                return lat, lng
+            if stored == 0:
+                return None
+            slot = (slot + 1) & (self.city_slots - 1)
+
+
+class Geocoder:
+    """
+    Usage:
+        geocoder = Geocoder()
+        result = geocoder.geocode("123 Main St, Marietta, GA 30060")
+
+    Results, including misses, are cached per normalized address. Safe to share between threads.
+    """
+
+    def __init__(self, table_path: Optional[str] = None, use_llm: Optional[bool] = None):
+        self.table_path = table_path or os.getenv("GEOCODER_TABLE") or DEFAULT_TABLE_PATH
+        self.table: Optional[CentroidTable] = None
+        if os.path.exists(self.table_path):
+            try:
+                self.table = CentroidTable(self.table_path)
+            except (OSError, ValueError, struct.error) as e:
+                print(f"Geocoder: ignoring centroid table: {e}")
+        self.use_llm = llm_fallback_requested(self.table is not None) if use_llm is None else use_llm
+        if self.table is None:
+            print(f"Geocoder: no centroid table at {self.table_path} "
+                  f"({'asking DeepSeek' if self.use_llm else 'state centroids only'}); "
+                  f"build one with python geocoder.py --build US.txt")
+        self._cache: Dict[str, Optional[Geocode]] = {}
+        self._lock = threading.Lock()
+
+    def close(self):
+        if self.table is not None:
+            self.table.close()
+            self.table = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def geocode(self, address: str) -> Optional[Geocode]:
+        key = " ".join((address or "").split()).lower()
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+        result = self._resolve(address)
+        with self._lock:
+            self._cache[key] = result
+        return result
+
+    def _resolve(self, address: str) -> Optional[Geocode]:
+        parsed = parse_address(address)
+        if self.table is not None:
+            if parsed.zip:
+                point = self.table.zip_point(parsed.zip)
+                if point is not None:
+                    return Geocode(*point, "zip", self._city(parsed), parsed.state, parsed.zip)
+            for city in parsed.city_candidates:
+                point = self.table.city_point(city, parsed.state)
+                if point is not None:
+                    return Geocode(*point, "city", city, parsed.state, parsed.zip)
+
+        if self.use_llm and address and address.strip().upper() != "N/A":
+            point = geocode_with_llm(address)
+            if point is not None and (parsed.state is None or within_state(point, parsed.state)):
+                return Geocode(*point, "llm", None, parsed.state, parsed.zip)
+
+        if parsed.state:
+            return Geocode(*STATE_CENTROIDS[parsed.state], "state", None, parsed.state, parsed.zip)
+        return None
+
+    def _city(self, parsed: ParsedAddress) -> Optional[str]:
+        """The longest city candidate the table knows, so a ZIP hit still reports a clean city name."""
+        for city in parsed.city_candidates:
+            if self.table.city_point(city, parsed.state) is not None:
+                return city
+        return None
+
+
+def geocode_with_llm(address: str) -> Optional[Tuple[float, float]]:
+    """Ask DeepSeek for the coordinates; None when the call fails or the reply is not a valid point."""
+    # Imported here so the offline path never loads the HTTP client
+    from llm_client import LLMError, get_client, parses_as_json
+    from prompt_templates import render
+
+    try:
+        response = get_client().chat(render("geocode.address", address=address), max_tokens=100,
+                                     call_site="geocoder", json_mode=True, validate=parses_as_json)
+        result = json.loads(response[response.find("{"):response.rfind("}") + 1])
+        lat, lng = float(result["lat"]), float(result["lng"])
+    except (LLMError, ValueError, KeyError, TypeError) as e:
+        print(f"Geocoder: LLM lookup failed for {address!r}: {e}")
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+_geocoder: Optional[Geocoder] = None
+_geocoder_lock = threading.Lock()
+
+
+def geocoder() -> Geocoder:
+    """The process-wide geocoder."""
+    global _geocoder
+    with _geocoder_lock:
+        if _geocoder is None:
+            _geocoder = Geocoder()
+        return _geocoder
+
+
+def geocode(address: str) -> Optional[Geocode]:
+    """Coordinates for an address, or None when not even its state is known."""
+    return geocoder().geocode(address)
+
+
+def read_places(source_path: str) -> Iterator[Tuple[str, Optional[str], Optional[str], float, float]]:
+    """(zip, city, state, lat, lng) rows of a GeoNames postal-code dump or a Census ZCTA gazetteer."""
+    with open(source_path, "r", encoding="utf-8") as f:
+        first = f.readline()
+        census = first.split("\t")[0].strip().upper() == "GEOID"
+        if not census:
+            f.seek(0)
+        for line in f:
+            fields = [field.strip() for field in line.rstrip("\n").split("\t")]
+            try:
+                if census:
+                    yield fields[0], None, None, float(fields[5]), float(fields[6])
+                elif len(fields) >= 11:
+                    yield fields[1], fields[2], fields[4], float(fields[9]), float(fields[10])
+            except (ValueError, IndexError):
+                continue
+
+
+def build_table(source_path: str, table_path: str = DEFAULT_TABLE_PATH) -> Tuple[int, int]:
+    """Write the centroid table for a source file; returns (ZIP count, city count)."""
+    zips: Dict[int, Tuple[float, float]] = {}
+    cities: Dict[int, List[float]] = {}
+    for zip_code, city, state, lat, lng in read_places(source_path):
+        if zip_code.isdigit() and len(zip_code) == 5:
+            zips[int(zip_code)] = (lat, lng)
+        if city and state:
+            # A city's centroid is the mean of its ZIP centroids
+            total = cities.setdefault(city_key(city, state), [0.0, 0.0, 0])
+            total[0] += lat
+            total[1] += lng
+            total[2] += 1
+
+    city_slots = 1
+    while city_slots < 2 * len(cities):
+        city_slots *= 2
+    city_slots = city_slots if cities else 0
+
+    body = bytearray(_HEADER.size + ZIP_SLOTS * _POINT.size + city_slots * _CITY_SLOT.size)
+    _HEADER.pack_into(body, 0, TABLE_MAGIC, TABLE_VERSION, 0, ZIP_SLOTS, city_slots)
+    for index in range(ZIP_SLOTS):
+        _POINT.pack_into(body, _HEADER.size + index * _POINT.size, *zips.get(index, (math.nan, math.nan)))
+    city_offset = _HEADER.size + ZIP_SLOTS * _POINT.size
+    for key, (lat_sum, lng_sum, count) in cities.items():
+        slot = key & (city_slots - 1)
+        while _CITY_SLOT.unpack_from(body, city_offset + slot * _CITY_SLOT.size)[0]:
+            slot = (slot + 1) & (city_slots - 1)
+        _CITY_SLOT.pack_into(body, city_offset + slot * _CITY_SLOT.size, key, lat_sum / count, lng_sum / count)
+
+    os.makedirs(os.path.dirname(table_path) or ".", exist_ok=True)
+    tmp_path = f"{table_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(body)
+    os.replace(tmp_path, table_path)
+    return len(zips), len(cities)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geocode addresses offline, or build the centroid table")
+    parser.add_argument("addresses", nargs="*", help="Addresses to geocode")
+    parser.add_argument("--build", metavar="SOURCE",
+                        help="Build the table from a GeoNames postal-code dump or a Census ZCTA gazetteer")
+    parser.add_argument("--table", default=None, help="Table path (default: GEOCODER_TABLE or raw_data/geo)")
+    args = parser.parse_args()
+
+    if args.build:
+        table_path = args.table or os.getenv("GEOCODER_TABLE") or DEFAULT_TABLE_PATH
+        zip_count, city_count = build_table(args.build, table_path)
+        print(f"Wrote {table_path}: {zip_count} ZIP codes, {city_count} cities")
+
+    with Geocoder(args.table) as local:
+        if not args.addresses and not args.build:
+            print(f"Centroid table: {local.table_path}" + ("" if local.table else " (missing; state centroids only)"))
+        for address in args.addresses:
+            result = local.geocode(address)
+            print(f"{address}: {json.dumps(result.to_dict()) if result else 'not found'}")
+
+
+if __name__ == "__main__":
+    main()
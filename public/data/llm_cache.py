@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of DeepSeek responses.
+
+Entries map a key built from the normalized prompt, model, temperature,
+max_tokens and prompt template version (prompt_templates.py) to the response
+text. Prompts are normalized by collapsing whitespace, so the
+indentation of the f-string templates in the step scripts does not split
+otherwise identical prompts. Every key includes LLM_CACHE_VERSION, so changing
+how responses are used only requires bumping that constant; bumping a template's
+version invalidates only the replies to that template.
+
+Only complete replies are stored: llm_client skips replies cut off at max_tokens
+and replies its caller's validator rejects, and invalidate() drops a stored reply
+that turns out to be unusable. Entries older than the TTL are treated as misses
+and pruned, and once the cache
+grows past its size limit the least recently used entries are evicted. Research
+for the fixed service options, business-name splits and geocoding of a known
+address are answered from here on every later run and for every later business.
+
+Environment:
+    LLM_CACHE_BYPASS=1      skip lookups (fresh responses are still stored)
+    LLM_CACHE_TTL_DAYS      entry lifetime in days (default 30)
+    LLM_CACHE_MAX_MB        size limit in MiB (default 256)
+    LLM_CACHE_PATH          cache file (default raw_data/cache/llm_cache.sqlite)
+
+Usage:
+    python llm_cache.py            # entry count and size
+    python llm_cache.py --prune
+    python llm_cache.py --clear
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# Bump whenever cached responses should no longer be reused
+LLM_CACHE_VERSION = "llm-v3"
+
+DEFAULT_CACHE_PATH = os.getenv("LLM_CACHE_PATH") or os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                 "raw_data", "cache", "llm_cache.sqlite")
+
+DEFAULT_TTL_DAYS = 30
+DEFAULT_MAX_MB = 256
+
+# Size-based eviction runs after this many writes rather than after every one
+_EVICT_EVERY = 32
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse runs of whitespace (template indentation, blank lines) to single spaces."""
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def cache_key(prompt: str, model: str, temperature: float, template: str = "", max_tokens: int = 0) -> str:
+    """Hash of the normalized prompt, model, temperature, max_tokens and template id (name@version)."""
+    material = "\x00".join((LLM_CACHE_VERSION, template, model, f"{float(temperature):.3f}", str(int(max_tokens)),
+                            normalize_prompt(prompt)))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def bypass_requested() -> bool:
+    return os.getenv("LLM_CACHE_BYPASS", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class ResponseCache:
+    """
+    Usage:
+        cache = ResponseCache()
+        text = cache.get(prompt, model, temperature)
+        if text is None:
+            ...
+            cache.put(prompt, model, temperature, text)
+
+    Safe to share between threads; several processes may share the file.
+    """
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, ttl_days: Optional[float] = None,
+                 max_mb: Optional[float] = None, bypass: Optional[bool] = None):
+        self.cache_path = cache_path
+        self.ttl = 86400 * float(ttl_days if ttl_days is not None
+                                 else os.getenv("LLM_CACHE_TTL_DAYS", DEFAULT_TTL_DAYS))
+        self.max_bytes = int(1024 * 1024 * float(max_mb if max_mb is not None
+                                                  else os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_MB)))
+        self.bypass = bypass_requested() if bypass is None else bypass
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # Several batch workers may share the file; wait for locks rather than failing
+        self._conn = sqlite3.connect(cache_path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, response TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get(self, prompt: str, model: str, temperature: float, template: str = "",
+            max_tokens: int = 0) -> Optional[str]:
+        """Return the cached response, or None on a miss, an expired entry or when bypassed."""
+        if self.bypass:
+            self.misses += 1
+            return None
+        key = cache_key(prompt, model, temperature, template, max_tokens)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, prompt: str, model: str, temperature: float, response: str, template: str = "",
+            max_tokens: int = 0):
+        """Store a response, evicting expired and least recently used entries as needed."""
+        key = cache_key(prompt, model, temperature, template, max_tokens)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode("utf-8")), now, now)
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % _EVICT_EVERY == 1:
+                self._evict(now)
+
+    def invalidate(self, prompt: str, model: str, temperature: float, template: str = "",
+                   max_tokens: int = 0) -> bool:
+        """Drop one stored response (e.g. one its caller could not use); True if there was one."""
+        key = cache_key(prompt, model, temperature, template, max_tokens)
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM responses WHERE key = ?", (key,)).rowcount
+            self._conn.commit()
+        return bool(removed)
+
+    def prune(self) -> int:
+        """Drop expired entries and trim to the size limit; returns the number of entries removed."""
+        with self._lock:
+            return self._evict(time.time())
+
+    def _evict(self, now: float) -> int:
+        removed = self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,)).rowcount
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            excess = total - self.max_bytes
+            freed = 0
+            doomed = []
+            for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+                doomed.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+            removed += len(doomed)
+        self._conn.commit()
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def stats(self):
+        """Entry count and size on disk, plus this process's hit/miss counters."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or maintain the DeepSeek response cache")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="Cache file")
+    parser.add_argument("--prune", action="store_true", help="Remove expired entries and trim to the size limit")
+    parser.add_argument("--clear", action="store_true", help="Remove every entry")
+    args = parser.parse_args()
+
+    with ResponseCache(args.cache) as cache:
+        if args.clear:
+            cache.clear()
+            print("Cleared the response cache")
+        if args.prune:
+            print(f"Removed {cache.prune()} entries")
+        stats = cache.stats()
+        print(f"{stats['entries']} cached responses, {stats['bytes'] / 1024:.1f} KiB in {args.cache}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Shared DeepSeek (OpenAI-compatible) chat client.
+
+Replaces the separate call_deepseek_api / query_deepseek_api copies in steps 2, 3
+and 4, each of which opened a new connection per request with a bare
+requests.post, no timeout and no retry. Here every call goes through one
+requests.Session with a keep-alive connection pool, and:
+
+- connect/read timeouts are always set,
+- 429 and 5xx responses, connection errors and timeouts are retried with
+  jittered exponential backoff (honoring Retry-After when the server sends it),
+- requests are paced by a shared rate limiter, so concurrent callers
+  (llm_runner) never burst past LLM_RATE_LIMIT requests per second,
+- model and max_tokens are chosen per call site,
+- chat_stream() yields a reply as it is generated (server-sent events),
+- responses are cached on disk (llm_cache.ResponseCache) by normalized prompt,
+  model, temperature, max_tokens and prompt template version
+  (prompt_templates.Prompt), so repeated prompts never reach the API; replies cut
+  off at max_tokens, or rejected by the caller's validate(), are not cached,
+- every call is recorded (call site, template, model, status, attempts, latency, prompt size,
+  token usage, cache hit) in memory and in the usage ledger (llm_usage.py), which
+  reports tokens and estimated cost per business and per pipeline run.
+
+Configuration comes from public/data/.env.deepseek or the environment:
+    DEEPSEEK_API_KEY    API key (required for real calls)
+    DEEPSEEK_API_BASE   API base URL (default https://api.deepseek.com/v1)
+    DEEPSEEK_MODEL      default model (default deepseek-chat)
+    LLM_RATE_LIMIT      API requests per second (default 10, 0 disables pacing)
+    LLM_CACHE_BYPASS    set to 1 to skip cache lookups (see llm_cache.py)
+
+Usage:
+    from llm_client import LLMError, get_client
+    text = get_client().chat(prompt, max_tokens=4000, call_site="step_2.research")
+"""
+
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from llm_cache import ResponseCache
+from llm_usage import UsageLedger, estimate_cost
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+ENV_PATH = os.path.join(DATA_DIR, ".env.deepseek")
+load_dotenv(ENV_PATH)
+
+DEFAULT_API_BASE = "https://api.deepseek.com/v1"
+DEFAULT_MODEL = "deepseek-chat"
+DEFAULT_MAX_TOKENS = 1000
+DEFAULT_TEMPERATURE = 0.7
+
+# (connect, read) seconds; long research answers can take a minute to generate
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 120
+
+# Attempts after the first, and the backoff window (seconds) they are drawn from
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Keep-alive connections held open to the API host
+POOL_SIZE = 16
+
+# Requests per second across every thread sharing a client; up to one second's worth may burst
+DEFAULT_RATE_LIMIT = 10.0
+
+
+class LLMError(Exception):
+    """Raised when a chat call fails after all retries or returns an unusable response."""
+
+
+def template_id(prompt: str) -> str:
+    """name@version of the template a prompt_templates.Prompt was rendered from; "" for a plain string."""
+    return getattr(prompt, "template_id", "")
+
+
+def parses_as_json(text: str) -> bool:
+    """Validator for chat(): the reply holds a JSON object (a ```json fence or stray text around it is fine)."""
+    try:
+        json.loads(text[text.find("{"):text.rfind("}") + 1])
+    except ValueError:
+        return False
+    return True
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    Seconds to wait before retry number attempt (0-based): "full jitter" over an
+    exponentially growing window, or the server's Retry-After when it gives one.
+    """
+    if retry_after:
+        try:
+            return min(BACKOFF_CAP, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+class RateLimiter:
+    """
+    Thread-safe pacing: hands out one slot every 1/rate seconds, with a burst of
+    up to `burst` requests after an idle period. A rate of 0 disables it.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if self.rate <= 0:
+            return
+        interval = 1.0 / self.rate
+        with self._lock:
+            now = time.monotonic()
+            # Idle time earns back up to `burst` slots
+            slot = max(self._next, now - (self.burst - 1) * interval)
+            self._next = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class LLMClient:
+    """Pooled chat-completions client; safe to share between threads."""
+
+    def __init__(self, api_key: Optional[str] = None, api_base: Optional[str] = None,
+                 model: Optional[str] = None, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                 max_retries: int = MAX_RETRIES, pool_size: int = POOL_SIZE,
+                 cache: Optional[ResponseCache] = None, rate_limit: Optional[float] = None,
+                 ledger: Optional[UsageLedger] = None):
+        self.api_key = api_key if api_key is not None else os.getenv("DEEPSEEK_API_KEY")
+        self.api_base = (api_base or os.getenv("DEEPSEEK_API_BASE") or DEFAULT_API_BASE).rstrip("/")
+        self.model = model or os.getenv("DEEPSEEK_MODEL") or DEFAULT_MODEL
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.cache = cache
+        self.ledger = ledger
+        if rate_limit is None:
+            rate_limit = float(os.getenv("LLM_RATE_LIMIT", DEFAULT_RATE_LIMIT))
+        self.rate_limiter = RateLimiter(rate_limit, burst=int(rate_limit))
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        if self.api_key:
+            self.session.headers["Authorization"] = f"Bearer {self.api_key}"
+
+        self.metrics: List[Dict[str, Any]] = []
+        self._metrics_lock = threading.Lock()
+
+    @property
+    def endpoint(self) -> str:
+        return f"{self.api_base}/chat/completions"
+
+    def chat(self, prompt: str, model: Optional[str] = None, max_tokens: int = DEFAULT_MAX_TOKENS,
+             temperature: float = DEFAULT_TEMPERATURE, call_site: str = "",
+             use_cache: bool = True, json_mode: bool = False,
+             validate: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        Send a single user message and return the reply text. Raises LLMError on failure.
+
+        prompt may be a prompt_templates.Prompt; its template id is part of the cache key
+        and of the call's record. With use_cache=False the cache is neither read nor
+        written for this call.
+        json_mode asks the API for a JSON object reply (response_format json_object);
+        the prompt must still describe the expected shape.
+        validate (e.g. parses_as_json) decides whether a reply is usable: a fresh reply
+        it rejects is returned but not cached, and a cached one it rejects is dropped
+        and asked for again. Replies cut off at max_tokens are never cached.
+        """
+        model = model or self.model
+        cache = self.cache if use_cache else None
+        cached = self._cached(cache, prompt, model, temperature, max_tokens, call_site, validate)
+        if cached is not None:
+            return cached
+
+        payload = self._payload(prompt, model, max_tokens, temperature)
+        if json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        record = self._new_record(call_site, model, max_tokens, prompt)
+        start = time.perf_counter()
+        try:
+            response = self._post(payload, record)
+            try:
+                result = response.json()
+            except ValueError as e:
+                raise LLMError(f"Failed to parse API response: {e}")
+            try:
+                choice = result["choices"][0]
+                content = choice["message"]["content"]
+            except (KeyError, IndexError, TypeError):
+                raise LLMError(f"Unexpected API response format: {str(result)[:200]}")
+            self._record_usage(record, result.get("usage"))
+            if cache is not None and self._cacheable(content, choice.get("finish_reason"), validate, record):
+                cache.put(prompt, model, temperature, content, template_id(prompt), max_tokens)
+            return content
+        except LLMError as e:
+            record["error"] = str(e)
+            raise
+        finally:
+            record["seconds"] = round(time.perf_counter() - start, 3)
+            self._record(record)
+
+    def chat_stream(self, prompt: str, model: Optional[str] = None, max_tokens: int = DEFAULT_MAX_TOKENS,
+                    temperature: float = DEFAULT_TEMPERATURE, call_site: str = "",
+                    use_cache: bool = True) -> Iterator[str]:
+        """
+        Like chat(), but yields the reply in pieces as it is generated (server-sent
+        events), so callers can use the start of a long answer while the rest is still
+        being written. A cached reply is yielded as one piece, and a reply is cached
+        only once it has streamed completely (and not been cut off at max_tokens).
+
+        Retries happen before the first piece arrives; a stream that breaks midway
+        raises LLMError.
+        """
+        model = model or self.model
+        cache = self.cache if use_cache else None
+        cached = self._cached(cache, prompt, model, temperature, max_tokens, call_site)
+        if cached is not None:
+            yield cached
+            return
+        finish_reason = None
+
+        payload = self._payload(prompt, model, max_tokens, temperature)
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+        record = self._new_record(call_site, model, max_tokens, prompt)
+        start = time.perf_counter()
+        parts = []
+        try:
+            response = self._post(payload, record, stream=True)
+            with response:
+                # text/event-stream carries no charset, and requests would otherwise assume Latin-1
+                response.encoding = "utf-8"
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        event = json.loads(data)
+                    except ValueError:
+                        raise LLMError(f"Malformed stream event: {data[:200]}")
+                    self._record_usage(record, event.get("usage"))
+                    for choice in event.get("choices") or []:
+                        finish_reason = choice.get("finish_reason") or finish_reason
+                        delta = (choice.get("delta") or {}).get("content")
+                        if delta:
+                            if not parts:
+                                record["first_token_seconds"] = round(time.perf_counter() - start, 3)
+                            parts.append(delta)
+                            yield delta
+        except requests.RequestException as e:
+            record["error"] = f"Stream interrupted: {e}"
+            raise LLMError(record["error"])
+        except LLMError as e:
+            record["error"] = str(e)
+            raise
+        finally:
+            record["seconds"] = round(time.perf_counter() - start, 3)
+            self._record(record)
+
+        content = "".join(parts)
+        if cache is not None and parts and self._cacheable(content, finish_reason, None, record):
+            cache.put(prompt, model, temperature, content, template_id(prompt), max_tokens)
+
+    def _cached(self, cache: Optional[ResponseCache], prompt: str, model: str, temperature: float,
+                max_tokens: int, call_site: str,
+                validate: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """Cached reply (recorded as a cache hit), or None; raises LLMError if a request is needed but there is no key."""
+        if cache is not None:
+            cached = cache.get(prompt, model, temperature, template_id(prompt), max_tokens)
+            if cached is not None and validate is not None and not validate(cached):
+                logger.warning("Dropping a cached reply for %s that no longer validates", call_site or "-")
+                cache.invalidate(prompt, model, temperature, template_id(prompt), max_tokens)
+                cached = None
+            if cached is not None:
+                record = self._new_record(call_site, model, max_tokens, prompt)
+                record["cached"] = True
+                self._record(record)
+                return cached
+        if not self.api_key:
+            raise LLMError("DEEPSEEK_API_KEY is not set")
+        return None
+
+    @staticmethod
+    def _cacheable(content: str, finish_reason: Optional[str], validate: Optional[Callable[[str], bool]],
+                   record: Dict[str, Any]) -> bool:
+        """Whether a fresh reply may be cached: complete, and accepted by the caller's validator."""
+        if finish_reason == "length":
+            logger.warning("LLM call %s hit max_tokens=%d; not caching the truncated reply",
+                           record["call_site"] or "-", record["max_tokens"])
+            return False
+        if validate is not None and not validate(content):
+            logger.warning("LLM call %s returned a reply its caller rejects; not caching it",
+                           record["call_site"] or "-")
+            return False
+        return True
+
+    @staticmethod
+    def _payload(prompt: str, model: str, max_tokens: int, temperature: float) -> Dict[str, Any]:
+        return {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+
+    @staticmethod
+    def _new_record(call_site: str, model: str, max_tokens: int, prompt: str) -> Dict[str, Any]:
+        return {
+            "call_site": call_site,
+            "model": model,
+            "max_tokens": max_tokens,
+            "template": template_id(prompt),
+            "prompt_chars": len(prompt),
+            "status": None,
+            "attempts": 0,
+            "seconds": 0.0,
+            "first_token_seconds": None,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "error": None,
+            "cached": False,
+        }
+
+    @staticmethod
+    def _record_usage(record: Dict[str, Any], usage: Optional[Dict[str, Any]]):
+        if usage:
+            record["prompt_tokens"] = usage.get("prompt_tokens", 0)
+            record["completion_tokens"] = usage.get("completion_tokens", 0)
+
+    def _record(self, record: Dict[str, Any]):
+        with self._metrics_lock:
+            self.metrics.append(record)
+        if self.ledger is not None:
+            try:
+                self.ledger.record(record)
+            except sqlite3.Error as e:
+                # Accounting must never fail the call it accounts for
+                logger.warning("Could not record LLM usage: %s", e)
+        logger.info("LLM call %s: %s attempts=%d %.2fs tokens=%d+%d",
+                    record["call_site"] or "-", "cache hit" if record["cached"] else f"status={record['status']}",
+                    record["attempts"], record["seconds"], record["prompt_tokens"], record["completion_tokens"])
+
+    def _post(self, payload: Dict[str, Any], record: Dict[str, Any], stream: bool = False) -> requests.Response:
+        """POST with retries on connection errors, timeouts, 429 and 5xx; returns the 200 response."""
+        for attempt in range(self.max_retries + 1):
+            record["attempts"] = attempt + 1
+            retry_after = None
+            self.rate_limiter.wait()
+            try:
+                response = self.session.post(self.endpoint, json=payload, timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                record["status"] = response.status_code
+                if response.status_code == 200:
+                    return response
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                response.close()
+                if response.status_code not in RETRY_STATUSES:
+                    raise LLMError(error)
+                retry_after = response.headers.get("Retry-After")
+
+            if attempt == self.max_retries:
+                raise LLMError(f"{error} (after {attempt + 1} attempts)")
+            delay = backoff_delay(attempt, retry_after)
+            logger.warning("LLM request failed (%s); retrying in %.1fs", error, delay)
+            time.sleep(delay)
+
+    def metrics_summary(self) -> Dict[str, Any]:
+        """Totals over every call recorded so far, overall and per call site."""
+        with self._metrics_lock:
+            records = list(self.metrics)
+        summary = {"calls": 0, "errors": 0, "retries": 0, "cache_hits": 0, "seconds": 0.0,
+                   "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "by_call_site": {}}
+        for record in records:
+            site = summary["by_call_site"].setdefault(
+                record["call_site"] or "-",
+                {"calls": 0, "errors": 0, "cache_hits": 0, "seconds": 0.0,
+                 "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0})
+            for totals in (summary, site):
+                totals["calls"] += 1
+                totals["errors"] += 1 if record["error"] else 0
+                totals["cache_hits"] += 1 if record["cached"] else 0
+                totals["seconds"] = round(totals["seconds"] + record["seconds"], 3)
+                totals["prompt_tokens"] += record["prompt_tokens"]
+                totals["completion_tokens"] += record["completion_tokens"]
+                totals["cost_usd"] = round(totals["cost_usd"] + estimate_cost(
+                    record["model"], record["prompt_tokens"], record["completion_tokens"]), 6)
+            summary["retries"] += max(0, record["attempts"] - 1)
+        return summary
+
+    def print_metrics(self):
+        """Print metrics_summary() in the same plain style the step scripts use."""
+        summary = self.metrics_summary()
+        if not summary["calls"]:
+            return
+        print(f"LLM calls: {summary['calls']} ({summary['cache_hits']} cached, {summary['errors']} failed, "
+              f"{summary['retries']} retries), {summary['seconds']:.1f}s, tokens {summary['prompt_tokens']} in / "
+              f"{summary['completion_tokens']} out, ~${summary['cost_usd']:.4f}")
+        for call_site, site in sorted(summary["by_call_site"].items()):
+            print(f"  {call_site}: {site['calls']} calls ({site['cache_hits']} cached), {site['seconds']:.1f}s, "
+                  f"tokens {site['prompt_tokens']} in / {site['completion_tokens']} out, ~${site['cost_usd']:.4f}")
+        if self.cache is not None:
+            stats = self.cache.stats()
+            print(f"  response cache: {stats['hits']} hits, {stats['misses']} misses "
+                  f"({stats['hit_rate']:.0%}), {stats['entries']} entries")
+
+
+_client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> LLMClient:
+    """The process-wide client, so every caller shares one connection pool and one metrics log."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient(cache=ResponseCache(), ledger=UsageLedger())
+        return _client
+
+
+def has_api_key() -> bool:
+    return bool(get_client().api_key)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Concurrent fan-out for blocking LLM calls.
+
+The step scripts research services one at a time with a fixed time.sleep(2)
+between them, so N services cost N x (latency + 2 s). Here the jobs run on an
+asyncio event loop: each one is handed to a thread (the pooled llm_client
+session is thread-safe), at most `concurrency` are in flight at once, and results
+are collected as they complete but returned in job order. Request pacing is left
+to llm_client's rate limiter, which only throttles real API requests (retries
+included), so cache hits are never delayed.
+
+Usage:
+    from llm_runner import run_concurrently
+    results = run_concurrently(research_service, [(service, "residential"), ...])
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+# Research prompts in flight at once
+DEFAULT_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+
+
+async def gather_ordered(func: Callable[..., Any], jobs: Sequence[Tuple], concurrency: int = DEFAULT_CONCURRENCY,
+                         on_result: Optional[Callable[[int, Any], None]] = None) -> List[Any]:
+    """
+    Run func(*job) for every job in worker threads, at most `concurrency` at a time.
+
+    on_result(index, result) is called as each job finishes (in completion order);
+    the returned list is in job order. An exception raised by func propagates once
+    every job has finished.
+    """
+    if not jobs:
+        return []
+    concurrency = max(1, min(concurrency, len(jobs)))
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    results: List[Any] = [None] * len(jobs)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def run(index: int, job: Tuple):
+            async with semaphore:
+                return index, await loop.run_in_executor(executor, func, *job)
+
+        tasks = [asyncio.ensure_future(run(index, job)) for index, job in enumerate(jobs)]
+        error = None
+        for finished in asyncio.as_completed(tasks):
+            try:
+                index, result = await finished
+            except Exception as e:
+                error = error or e
+                continue
+            results[index] = result
+            if on_result is not None:
+                on_result(index, result)
+        if error is not None:
+            raise error
+    return results
+
+
+def run_concurrently(func: Callable[..., Any], jobs: Sequence[Tuple], concurrency: int = DEFAULT_CONCURRENCY,
+                     on_result: Optional[Callable[[int, Any], None]] = None) -> List[Any]:
+    """Synchronous entry point for gather_ordered, for the step scripts' main()."""
+    return asyncio.run(gather_ordered(func, jobs, concurrency, on_result))
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Local DeepSeek/OpenAI-compatible stub server.
+
+Serves POST /v1/chat/completions (plain JSON and `stream: true` server-sent
+events) with configurable latency, streaming speed and injected errors, so the
+LLM-heavy steps can be run, load-tested and benchmarked offline. Every client
+goes through llm_client, so pointing the pipeline at the stub is configuration
+only:
+
+    DEEPSEEK_API_BASE=http://127.0.0.1:8765/v1 DEEPSEEK_API_KEY=stub
+
+Replies are shaped like the real ones each prompt asks for (step 2 section
+research, the batched JSON research, step 3 numbered sections, service
+selection, business-name splits, geocoding), filled in from the prompt, so the
+downstream parsers and block generators exercise their normal paths. Fixture
+files can override replies for prompts containing a given substring.
+
+GET /stats returns request, error and stream counts per prompt kind.
+
+Usage:
+    python llm_stub_server.py --latency 1.5 --jitter 0.5 --error-rate 0.05
+    python llm_stub_server.py --fixtures fixtures.json --tokens-per-second 80
+    python run_pipeline.py --llm-stub
+"""
+
+import argparse
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+
+# Largest request body accepted
+MAX_BODY_BYTES = 1024 * 1024
+
+# Status codes an injected error is drawn from (all retried by llm_client)
+ERROR_STATUSES = (429, 500, 503)
+
+# Characters per streamed event, roughly one token
+_STREAM_PIECE = 4
+
+STEP_3_SECTIONS = (
+    "1. Construction Process",
+    "2. Variants",
+    "3. Sales and Supply Chain",
+    "4. Advantages and Benefits",
+    "5. Marketing Considerations",
+    "6. Warranty and Maintenance",
+)
+
+
+def _service_from_prompt(prompt):
+    """The service name a research prompt is about."""
+    match = (re.search(r"information about (.+?) for \w+ buildings", prompt)
+             or re.search(r"thoroughly: (.+?) \(", prompt))
+    return match.group(1).strip() if match else "Roofing"
+
+
+def _points(service, topic, count=5):
+    return [f"{topic} point {i} for {service}: handled by licensed crews to manufacturer spec." for i in range(1, count + 1)]
+
+
+def research_sections_reply(prompt):
+    """Step 2 per-service research: INSTALLATION / REPAIR / MAINTENANCE / VARIANTS sections."""
+    service = _service_from_prompt(prompt)
+    parts = []
+    for heading in ("INSTALLATION", "REPAIR", "MAINTENANCE", "VARIANTS"):
+        lines = [f"{i}. {point}" for i, point in enumerate(_points(service, heading.title()), 1)]
+        parts.append(f"{heading}:\n" + "\n".join(lines))
+    return "\n\n".join(parts)
+
+
+def batch_research_reply(prompt):
+    """Step 2 batched research: the JSON object described in the prompt, one entry per service key."""
+    services = []
+    for line in prompt.splitlines():
+        line = line.strip()
+        if line.startswith('{"key"'):
+            try:
+                services.append(json.loads(line))
+            except ValueError:
+                continue
+    return json.dumps({"services": [
+        {
+            "key": service["key"],
+            "installation": _points(service["name"], "Installation"),
+            "repair": _points(service["name"], "Repair"),
+            "maintenance": _points(service["name"], "Maintenance"),
+            "variants": _points(service["name"], "Variant"),
+        }
+        for service in services
+    ]})
+
+
+def numbered_sections_reply(prompt):
+    """Step 3 research: '## **N. Section**' headings with bullet points."""
+    service = _service_from_prompt(prompt)
+    parts = []
+    for heading in STEP_3_SECTIONS:
+        topic = heading.split(". ", 1)[1]
+        lines = [f"- **{topic} {i}:** {point}" for i, point in enumerate(_points(service, topic, 4), 1)]
+        parts.append(f"## **{heading}**\n" + "\n".join(lines))
+    return "\n\n".join(parts)
+
+
+def service_selection_reply(prompt):
+    """Four residential and four commercial services, taken from the option lists in the prompt."""
+    selection = {}
+    for category in ("residential", "commercial"):
+        options = []
+        match = re.search(rf"{category}[^\[]*\[([^\]]*)\]", prompt, re.IGNORECASE)
+        if match:
+            options = [option.strip(' "\'\n') for option in match.group(1).split(",") if option.strip(' "\'\n')]
+        options = options or ["Repairs", "Inspection", "Metal Roof", "Coatings"]
+        selection[category] = [{"id": i + 1, "name": name} for i, name in enumerate(options[:4])]
+    return json.dumps(selection)
+
+
+def business_name_reply(prompt):
+    match = re.search(r'business name: "([^"]+)"', prompt)
+    words = (match.group(1) if match else "Roofing Company").split()
+    if len(words) <= 2:
+        return json.dumps({"shouldSplit": False, "mainTitle": " ".join(words), "subTitle": ""})
+    return json.dumps({"shouldSplit": True, "mainTitle": " ".join(words[:-1]).upper(), "subTitle": words[-1].upper()})
+
+
+def geocode_reply(prompt):
+    # Deterministic per address, inside the continental US
+    seed = sum(ord(c) for c in prompt)
+    return json.dumps({"lat": round(30 + seed % 1500 / 100, 4), "lng": round(-120 + seed % 4000 / 100, 4)})
+
+
+# (kind, predicate, reply builder), checked in order
+RESPONDERS = (
+    ("batch_research", lambda p: '"services": [{"key"' in p, batch_research_reply),
+    ("research_sections", lambda p: "INSTALLATION:" in p, research_sections_reply),
+    ("numbered_sections", lambda p: "## **1. Construction Process**" in p, numbered_sections_reply),
+    ("business_name", lambda p: "roofing business name" in p.lower(), business_name_reply),
+    ("geocode", lambda p: "latitude and longitude" in p.lower(), geocode_reply),
+    ("service_selection", lambda p: '"residential"' in p and '"commercial"' in p, service_selection_reply),
+)
+
+
+def load_fixtures(path):
+    """Fixture file: a JSON list of {"match": substring, "response": text}."""
+    with open(path, encoding="utf-8") as f:
+        fixtures = json.load(f)
+    return [(fixture["match"], fixture["response"]) for fixture in fixtures]
+
+
+class StubConfig:
+    """Latency, error and fixture settings shared by every handler thread."""
+
+    def __init__(self, latency=0.5, jitter=0.0, error_rate=0.0, tokens_per_second=0.0, fixtures=(), seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.tokens_per_second = tokens_per_second
+        self.fixtures = list(fixtures)
+        self.random = random.Random(seed)
+        self.stats = {"requests": 0, "errors": 0, "streamed": 0, "by_kind": {}}
+        self._lock = threading.Lock()
+
+    def reply(self, prompt):
+        """(kind, reply text) for a prompt."""
+        for match, response in self.fixtures:
+            if match in prompt:
+                return "fixture", response
+        for kind, applies, build in RESPONDERS:
+            if applies(prompt):
+                return kind, build(prompt)
+        return "generic", "This is a stub response from the local DeepSeek-compatible server."
+
+    def delay(self):
+        with self._lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def injected_error(self):
+        with self._lock:
+            if self.error_rate and self.random.random() < self.error_rate:
+                return self.random.choice(ERROR_STATUSES)
+        return None
+
+    def count(self, kind, error=False, streamed=False):
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["errors"] += error
+            self.stats["streamed"] += streamed
+            self.stats["by_kind"][kind] = self.stats["by_kind"].get(kind, 0) + 1
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers chat-completion requests from the server's StubConfig."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.server.config._lock:
+                self._send_json(200, json.loads(json.dumps(self.server.config.stats)))
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._send_json(413, {"error": {"message": "Request body too large"}})
+            return
+        try:
+            body = json.loads(self.rfile.read(length))
+            prompt = "\n".join(message.get("content", "") for message in body["messages"])
+        except (ValueError, KeyError, TypeError, AttributeError):
+            self._send_json(400, {"error": {"message": "Invalid request body"}})
+            return
+
+        config = self.server.config
+        kind, text = config.reply(prompt)
+        stream = bool(body.get("stream"))
+        time.sleep(config.delay())
+
+        status = config.injected_error()
+        config.count(kind, error=status is not None, streamed=stream and status is None)
+        if status is not None:
+            self._send_json(status, {"error": {"message": f"Injected error {status}"}})
+            return
+
+        usage = {
+            "prompt_tokens": max(1, len(prompt) // 4),
+            "completion_tokens": max(1, len(text) // 4),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        model = body.get("model", "deepseek-chat")
+        if stream:
+            self._stream(model, text, usage if (body.get("stream_options") or {}).get("include_usage") else None)
+        else:
+            self._send_json(200, {
+                "id": "stub",
+                "object": "chat.completion",
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                             "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+    def _stream(self, model, text, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        pause = 1.0 / self.server.config.tokens_per_second if self.server.config.tokens_per_second else 0.0
+
+        def event(payload):
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        for start in range(0, len(text), _STREAM_PIECE):
+            event({"id": "stub", "object": "chat.completion.chunk", "model": model,
+                   "choices": [{"index": 0, "delta": {"content": text[start:start + _STREAM_PIECE]},
+                                "finish_reason": None}]})
+            if pause:
+                time.sleep(pause)
+        if usage:
+            event({"id": "stub", "object": "chat.completion.chunk", "model": model, "choices": [], "usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class StubServer(ThreadingHTTPServer):
+    """One thread per request, so concurrent clients see overlapping latency as with the real API."""
+
+    daemon_threads = True
+    request_queue_size = 64
+
+    def __init__(self, config, host="127.0.0.1", port=DEFAULT_PORT):
+        self.config = config
+        super().__init__((host, port), StubHandler)
+
+    @property
+    def api_base(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_stub_server(config=None, host="127.0.0.1", port=0):
+    """Start a stub server on a background thread (port 0 picks a free port) and return it."""
+    server = StubServer(config or StubConfig(), host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local DeepSeek-compatible stub API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before the reply starts")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latency varies uniformly by +/- this much")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429/500/503")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="Streaming speed (0 streams as fast as possible)")
+    parser.add_argument("--fixtures", help='JSON list of {"match": substring, "response": text}')
+    parser.add_argument("--seed", type=int, help="Seed for latency jitter and injected errors")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    config = StubConfig(args.latency, args.jitter, args.error_rate, args.tokens_per_second,
+                        load_fixtures(args.fixtures) if args.fixtures else (), args.seed)
+    server = StubServer(config, args.host, args.port)
+    logger.info(f"DeepSeek stub listening; set DEEPSEEK_API_BASE={server.api_base} DEEPSEEK_API_KEY=stub")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stub server stopped by user")
+    finally:
+        server.server_close()
+        logger.info(f"Served {config.stats['requests']} requests ({config.stats['errors']} injected errors)")
+
+
+if __name__ == "__main__":
+    main()
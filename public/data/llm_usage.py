@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Per-call LLM usage ledger and cost report.
+
+llm_client keeps per-call metrics only in memory, and every step runs in its own
+process, so nothing tells how many tokens (or dollars) one generated site took or
+which prompts dominate. Here every call the client records (call site, prompt
+template, model, max_tokens, prompt size, prompt and completion tokens, latency, attempts, cache
+hit, error) is also appended to raw_data/cache/llm_usage.sqlite, tagged with the
+pipeline run and the business it was made for. The report aggregates those rows
+per business and per run, broken down by call site, with an estimated cost and
+the largest completion seen next to the max_tokens each site asks for, and per
+prompt template (prompt_templates.py) with its average prompt size, which is what
+prompt-size and max_tokens tuning needs.
+
+Environment:
+    LLM_RUN_ID          groups calls from one pipeline run (run_pipeline.py sets it
+                        for every step; otherwise each process is its own run)
+    LLM_BUSINESS        business the calls are made for (default: business_name
+                        from raw_data/step_1/bbb_profile_data.json)
+    LLM_PRICE_INPUT     USD per million prompt tokens, overriding MODEL_PRICES
+    LLM_PRICE_OUTPUT    USD per million completion tokens, overriding MODEL_PRICES
+    LLM_USAGE_PATH      ledger file (default raw_data/cache/llm_usage.sqlite)
+
+Usage:
+    python llm_usage.py                          # most recent run
+    python llm_usage.py --run 20250101-120000-4242
+    python llm_usage.py --business "Cowboys-Vaqueros Construction"
+    python llm_usage.py --all --json usage_report.json
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_LEDGER_PATH = os.getenv("LLM_USAGE_PATH") or os.path.join(DATA_DIR, "raw_data", "cache", "llm_usage.sqlite")
+BBB_PROFILE_PATH = os.path.join(DATA_DIR, "raw_data", "step_1", "bbb_profile_data.json")
+
+# USD per million (prompt, completion) tokens: DeepSeek list prices, cache-miss input
+MODEL_PRICES = {
+    "deepseek-chat": (0.27, 1.10),
+    "deepseek-reasoner": (0.55, 2.19),
+}
+UNKNOWN_BUSINESS = "-"
+
+_COLUMNS = ("run_id", "business", "call_site", "template", "model", "max_tokens", "prompt_chars", "prompt_tokens",
+            "completion_tokens", "seconds", "first_token_seconds", "attempts", "status", "cached", "error",
+            "created")
+
+
+def default_run_id() -> str:
+    """LLM_RUN_ID, or a timestamp and pid identifying this process as its own run."""
+    return os.getenv("LLM_RUN_ID") or f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+
+def current_business() -> Optional[str]:
+    """LLM_BUSINESS, or the business name scraped in step 1; None while neither is known."""
+    business = os.getenv("LLM_BUSINESS")
+    if business:
+        return business
+    try:
+        with open(BBB_PROFILE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f).get("business_name") or None
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def model_prices(model: str) -> Tuple[float, float]:
+    """(prompt, completion) USD per million tokens for model; the env overrides apply to every model."""
+    prompt_price, completion_price = MODEL_PRICES.get(model, MODEL_PRICES["deepseek-chat"])
+    return (float(os.getenv("LLM_PRICE_INPUT", prompt_price)),
+            float(os.getenv("LLM_PRICE_OUTPUT", completion_price)))
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD for one call."""
+    prompt_price, completion_price = model_prices(model)
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class UsageLedger:
+    """
+    Usage:
+        ledger = UsageLedger()
+        ledger.record(record)         # an llm_client metrics record
+        report = ledger.report(run_id=ledger.run_id)
+
+    Safe to share between threads; every step process appends to the same file.
+    """
+
+    def __init__(self, ledger_path: str = DEFAULT_LEDGER_PATH, run_id: Optional[str] = None,
+                 business: Optional[str] = None):
+        self.ledger_path = ledger_path
+        self.run_id = run_id or default_run_id()
+        self._business = business
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(ledger_path), exist_ok=True)
+        self._conn = sqlite3.connect(ledger_path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS calls ("
+            "id INTEGER PRIMARY KEY, run_id TEXT NOT NULL, business TEXT NOT NULL, call_site TEXT NOT NULL, template TEXT, "
+            "model TEXT NOT NULL, max_tokens INTEGER, prompt_chars INTEGER, prompt_tokens INTEGER NOT NULL, "
+            "completion_tokens INTEGER NOT NULL, seconds REAL NOT NULL, first_token_seconds REAL, "
+            "attempts INTEGER NOT NULL, status INTEGER, cached INTEGER NOT NULL, error TEXT, created REAL NOT NULL)"
+        )
+        # Ledgers written before prompt templates existed lack the column
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(calls)")}
+        if "template" not in columns:
+            self._conn.execute("ALTER TABLE calls ADD COLUMN template TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS calls_run ON calls (run_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS calls_business ON calls (business)")
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @property
+    def business(self) -> str:
+        # Looked up on first use: step 1 writes the profile after the pipeline has started
+        if self._business is None:
+            self._business = current_business()
+        return self._business or UNKNOWN_BUSINESS
+
+    def record(self, record: Dict[str, Any]):
+        """Append one llm_client metrics record."""
+        row = (self.run_id, self.business, record.get("call_site") or "-", record.get("template") or "-",
+               record.get("model") or "",
+               record.get("max_tokens"), record.get("prompt_chars"), record.get("prompt_tokens", 0),
+               record.get("completion_tokens", 0), record.get("seconds", 0.0), record.get("first_token_seconds"),
+               record.get("attempts", 0), record.get("status"), 1 if record.get("cached") else 0,
+               record.get("error"), time.time())
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO calls ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})", row)
+            self._conn.commit()
+
+    def rows(self, run_id: Optional[str] = None, business: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Recorded calls, optionally for one run and/or one business, oldest first."""
+        query = f"SELECT {', '.join(_COLUMNS)} FROM calls"
+        clauses, params = [], []
+        if run_id:
+            clauses.append("run_id = ?")
+            params.append(run_id)
+        if business:
+            clauses.append("business = ?")
+            params.append(business)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            cursor = self._conn.execute(query + " ORDER BY id", params)
+            return [dict(zip(_COLUMNS, row)) for row in cursor]
+
+    def latest_run(self) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT run_id FROM calls ORDER BY id DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def report(self, run_id: Optional[str] = None, business: Optional[str] = None) -> Dict[str, Any]:
+        return build_report(self.rows(run_id, business))
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def _aggregate(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Totals for a group of calls; latency percentiles cover API calls only (cache hits take no time)."""
+    api_rows = [row for row in rows if not row["cached"]]
+    api_seconds = [row["seconds"] for row in api_rows]
+    return {
+        "calls": len(rows),
+        "cache_hits": sum(1 for row in rows if row["cached"]),
+        "errors": sum(1 for row in rows if row["error"]),
+        "retries": sum(max(0, (row["attempts"] or 0) - 1) for row in rows),
+        "prompt_chars": sum(row["prompt_chars"] or 0 for row in rows),
+        "prompt_tokens": sum(row["prompt_tokens"] for row in rows),
+        "completion_tokens": sum(row["completion_tokens"] for row in rows),
+        "cost_usd": round(sum(estimate_cost(row["model"], row["prompt_tokens"], row["completion_tokens"])
+                              for row in rows), 6),
+        "seconds": round(sum(api_seconds), 3),
+        "p50_seconds": round(_percentile(api_seconds, 0.5), 3),
+        "p95_seconds": round(_percentile(api_seconds, 0.95), 3),
+        "max_completion_tokens": max((row["completion_tokens"] for row in rows), default=0),
+        "max_tokens": max((row["max_tokens"] or 0 for row in rows), default=0),
+        "avg_prompt_chars": round(sum(row["prompt_chars"] or 0 for row in rows) / len(rows)) if rows else 0,
+        "avg_prompt_tokens": round(sum(row["prompt_tokens"] for row in api_rows) / len(api_rows)) if api_rows else 0,
+    }
+
+
+def _grouped(rows: List[Dict[str, Any]], column: str) -> Dict[str, List[Dict[str, Any]]]:
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        groups.setdefault(row[column] or "-", []).append(row)
+    return groups
+
+
+def build_report(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Totals overall, per business and per run (each broken down by call site), and per prompt template."""
+    def breakdown(group: List[Dict[str, Any]]) -> Dict[str, Any]:
+        totals = _aggregate(group)
+        totals["by_call_site"] = {site: _aggregate(site_rows)
+                                  for site, site_rows in sorted(_grouped(group, "call_site").items())}
+        return totals
+
+    return {
+        "totals": _aggregate(rows),
+        "by_business": {business: breakdown(group) for business, group in sorted(_grouped(rows, "business").items())},
+        "by_run": {run_id: breakdown(group) for run_id, group in _grouped(rows, "run_id").items()},
+        "by_template": {template: _aggregate(group) for template, group in sorted(_grouped(rows, "template").items())},
+    }
+
+
+def _line(label: str, totals: Dict[str, Any]) -> str:
+    return (f"{label}: {totals['calls']} calls ({totals['cache_hits']} cached, {totals['errors']} failed), "
+            f"tokens {totals['prompt_tokens']} in / {totals['completion_tokens']} out, "
+            f"${totals['cost_usd']:.4f}, p50 {totals['p50_seconds']:.1f}s / p95 {totals['p95_seconds']:.1f}s")
+
+
+def print_report(report: Dict[str, Any]):
+    """Print build_report() output in the same plain style the step scripts use."""
+    if not report["totals"]["calls"]:
+        print("No LLM calls recorded")
+        return
+    print(_line("LLM usage", report["totals"]))
+    for title, groups in (("Business", report["by_business"]), ("Run", report["by_run"])):
+        for name, totals in groups.items():
+            print(_line(f"  {title} {name}", totals))
+            for site, site_totals in totals["by_call_site"].items():
+                print(_line(f"    {site}", site_totals)
+                      + f", largest completion {site_totals['max_completion_tokens']}/{site_totals['max_tokens']}")
+    for template, totals in report["by_template"].items():
+        print(_line(f"  Template {template}", totals)
+              + f", prompt avg {totals['avg_prompt_chars']} chars / {totals['avg_prompt_tokens']} tokens")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report LLM token usage and estimated cost")
+    parser.add_argument("--ledger", default=DEFAULT_LEDGER_PATH, help="Usage ledger file")
+    parser.add_argument("--run", help="Report on this run id (default: the most recent run)")
+    parser.add_argument("--business", help="Report on this business only")
+    parser.add_argument("--all", action="store_true", help="Report on every recorded run")
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.ledger):
+        print(f"No usage ledger at {args.ledger}")
+        return
+    with UsageLedger(args.ledger, run_id="report") as ledger:
+        run_id = args.run
+        if not (run_id or args.all or args.business):
+            run_id = ledger.latest_run()
+        report = ledger.report(run_id=run_id, business=args.business)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Unified logo stage.
+
+Replaces the separate download (ScrapeBBB.download_image), format conversion
+(ignore/convert_logo.py, ignore/enhance_logo.py) and clipping (step_3/clipimage.py)
+passes, each of which decoded and re-encoded the logo. Here a logo is:
+
+1. downloaded once, streamed into memory (or read from disk),
+2. identified by sniffing its magic bytes rather than trusting the file name,
+3. decoded once and normalized to RGBA, no larger than TARGET_SIZE,
+4. turned into every derivative the site needs from that one buffer:
+   - source:  the downloaded bytes, unchanged, as logo.png (the scraped original
+              that color_extractor and clipimage read)
+   - logo:    the normalized logo.png (a real PNG, even when the source was a JPEG)
+   - clipped: clipped.png plus responsive sizes / WebP / AVIF (clipimage.clip_logo)
+   - favicon: favicon.ico (16/32/48) and logo192.png, padded to a square
+
+The source file itself is never overwritten: derivatives go to other directories,
+and the original is only written when it was downloaded or passed as bytes.
+Derivatives are cached in raw_data/cache/logo_cache.sqlite by the SHA-256 of the
+source bytes (and LOGO_STAGE_VERSION). URLs are remembered for URL_TTL_DAYS, so
+re-running the stage for a known logo neither downloads nor decodes anything
+until then; after that the URL is fetched again and a changed logo is picked up.
+No backup copies (logo.png.backup, logo.png.jpeg_backup) are written.
+
+Usage:
+    python logo_stage.py                                  # raw_data/step_1/logo.png
+    python logo_stage.py --url https://example.com/logo.jpg
+    python logo_stage.py --batch leads_logos.json --output-dir raw_data/logos --workers 8
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import cv2
+import numpy as np
+import requests
+from PIL import Image
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DATA_DIR, "step_3"))
+
+from clipimage import (DEFAULT_MODE, OUTPUT_FORMATS, RESPONSIVE_SIZES, assets_dir,  # noqa: E402
+                       available_formats, clip_logo, render_variants, write_variants)
+
+# Bump whenever normalization or any derivative changes output
+LOGO_STAGE_VERSION = "logo-v2"
+
+RAW_DATA_DIR = os.path.join(DATA_DIR, "raw_data")
+DEFAULT_INPUT = os.path.join(RAW_DATA_DIR, "step_1", "logo.png")
+DEFAULT_CACHE_PATH = os.path.join(RAW_DATA_DIR, "cache", "logo_cache.sqlite")
+
+# Where each derivative group is written by default; files after the first directory are hard links
+DEFAULT_DESTINATIONS = {
+    "source": [os.path.join(RAW_DATA_DIR, "step_1"), RAW_DATA_DIR],
+    "logo": [os.path.join(RAW_DATA_DIR, "step_3")],
+    "clipped": [os.path.join(RAW_DATA_DIR, "step_3"), RAW_DATA_DIR, assets_dir],
+    "favicon": [os.path.join(RAW_DATA_DIR, "step_3")],
+}
+
+# A remembered URL is trusted for this long before the logo is downloaded again
+URL_TTL_DAYS = float(os.getenv("LOGO_URL_TTL_DAYS", "7"))
+
+# Longest side of the normalized logo; smaller logos are not upscaled
+TARGET_SIZE = 512
+FAVICON_SIZES = (16, 32, 48)
+TOUCH_ICON_SIZE = 192
+
+MAX_DOWNLOAD_BYTES = 10 * 1024 * 1024
+DOWNLOAD_TIMEOUT = 30
+_CHUNK_SIZE = 64 * 1024
+
+# Magic bytes of the formats BBB and Google serve logos in
+_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"BM", "bmp"),
+    (b"\x00\x00\x01\x00", "ico"),
+]
+
+
+def sniff_format(data):
+    """Identify an image from its leading bytes; returns e.g. 'png', 'jpeg', 'svg', or None."""
+    for signature, fmt in _SIGNATURES:
+        if data.startswith(signature):
+            return fmt
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    if data[4:8] == b"ftyp" and data[8:12] in (b"avif", b"avis"):
+        return "avif"
+    head = data[:512].lstrip().lower()
+    if head.startswith(b"<svg") or (head.startswith(b"<?xml") and b"<svg" in head):
+        return "svg"
+    return None
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def download_logo(url, session=None, timeout=DOWNLOAD_TIMEOUT, max_bytes=MAX_DOWNLOAD_BYTES):
+    """Stream a logo into memory, refusing responses larger than max_bytes."""
+    session = session or requests
+    with session.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        buffer = BytesIO()
+        for chunk in response.iter_content(_CHUNK_SIZE):
+            buffer.write(chunk)
+            if buffer.tell() > max_bytes:
+                raise ValueError(f"Logo at {url} is larger than {max_bytes} bytes")
+    return buffer.getvalue()
+
+
+def decode_logo(data, target_size=TARGET_SIZE):
+    """Decode logo bytes once and normalize to an RGBA image no larger than target_size."""
+    fmt = sniff_format(data)
+    if fmt is None:
+        raise ValueError("Unrecognized logo format")
+    if fmt == "svg":
+        raise ValueError("SVG logos must be rasterized before the logo stage")
+
+    img = Image.open(BytesIO(data))
+    if img.format == "JPEG":
+        # Let the JPEG decoder downscale while decoding
+        img.draft("RGB", (target_size, target_size))
+    # Animated GIF/WebP logos use their first frame
+    img.seek(0)
+    img = img.convert("RGBA")
+    img.thumbnail((target_size, target_size), Image.LANCZOS)
+    return img, fmt
+
+
+def _square(img, size):
+    """Fit an RGBA image into a transparent size x size square."""
+    scaled = img.copy()
+    scaled.thumbnail((size, size), Image.LANCZOS)
+    canvas = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    canvas.paste(scaled, ((size - scaled.width) // 2, (size - scaled.height) // 2))
+    return canvas
+
+
+def _png_bytes(img):
+    out = BytesIO()
+    img.save(out, format="PNG")
+    return out.getvalue()
+
+
+def build_derivatives(img, clip_mode=DEFAULT_MODE, sizes=RESPONSIVE_SIZES, formats=OUTPUT_FORMATS):
+    """
+    Produce every derivative from one normalized RGBA image.
+
+    Returns {group: {file_name: bytes}} for the groups in DEFAULT_DESTINATIONS except "source".
+    """
+    rgba = np.asarray(img)
+    clipped = clip_logo(cv2.cvtColor(rgba, cv2.COLOR_RGBA2BGRA), clip_mode)
+
+    icon = _square(img, max(FAVICON_SIZES))
+    favicon = BytesIO()
+    icon.save(favicon, format="ICO", sizes=[(size, size) for size in FAVICON_SIZES])
+
+    return {
+        "logo": {"logo.png": _png_bytes(img)},
+        "clipped": render_variants(clipped, sizes, formats),
+        "favicon": {
+            "favicon.ico": favicon.getvalue(),
+            f"logo{TOUCH_ICON_SIZE}.png": _png_bytes(_square(img, TOUCH_ICON_SIZE)),
+        },
+    }
+
+
+class LogoCache:
+    """
+    Usage:
+        cache = LogoCache()
+        derivatives = cache.get(logo_hash, params)
+        if derivatives is None:
+            ...
+            cache.put(logo_hash, params, derivatives)
+    """
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, url_ttl_days=URL_TTL_DAYS):
+        self.cache_path = cache_path
+        self.url_ttl = url_ttl_days * 86400
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # Several batch workers may share the file; wait for locks rather than failing
+        self._conn = sqlite3.connect(cache_path, timeout=30)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, content_hash TEXT NOT NULL, "
+            "fetched REAL NOT NULL DEFAULT 0)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(urls)")}
+        if "fetched" not in columns:
+            # Tables from before the TTL: their URLs count as expired and are fetched again
+            self._conn.execute("ALTER TABLE urls ADD COLUMN fetched REAL NOT NULL DEFAULT 0")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS derivatives ("
+            "content_hash TEXT NOT NULL, version TEXT NOT NULL, params TEXT NOT NULL, "
+            "grp TEXT NOT NULL, name TEXT NOT NULL, data BLOB NOT NULL, "
+            "PRIMARY KEY (content_hash, version, params, grp, name))"
+        )
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def hash_for_url(self, url):
+        """The content hash last downloaded from url, or None when unknown or older than the TTL."""
+        row = self._conn.execute("SELECT content_hash, fetched FROM urls WHERE url = ?", (url,)).fetchone()
+        if row is None or time.time() - row[1] > self.url_ttl:
+            return None
+        return row[0]
+
+    def remember_url(self, url, logo_hash):
+        self._conn.execute("INSERT OR REPLACE INTO urls (url, content_hash, fetched) VALUES (?, ?, ?)",
+                           (url, logo_hash, time.time()))
+        self._conn.commit()
+
+    def get(self, logo_hash, params):
+        rows = self._conn.execute(
+            "SELECT grp, name, data FROM derivatives WHERE content_hash = ? AND version = ? AND params = ?",
+            (logo_hash, LOGO_STAGE_VERSION, params)
+        ).fetchall()
+        if not rows:
+            return None
+        derivatives = {}
+        for group, name, data in rows:
+            derivatives.setdefault(group, {})[name] = bytes(data)
+        return derivatives
+
+    def put(self, logo_hash, params, derivatives):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO derivatives (content_hash, version, params, grp, name, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(logo_hash, LOGO_STAGE_VERSION, params, group, name, data)
+             for group, files in derivatives.items() for name, data in files.items()]
+        )
+        self._conn.commit()
+
+
+class LogoStage:
+    """
+    Usage:
+        with LogoStage() as stage:
+            report = stage.process("https://example.com/logo.jpg")
+    """
+
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH, target_size=TARGET_SIZE, clip_mode=DEFAULT_MODE,
+                 sizes=RESPONSIVE_SIZES, formats=OUTPUT_FORMATS):
+        self.cache = LogoCache(cache_path)
+        self.target_size = target_size
+        self.clip_mode = clip_mode
+        self.sizes = tuple(sorted(set(sizes)))
+        self.formats = tuple(available_formats(formats))
+        self._session = requests.Session()
+        # Every option that changes the derivatives is part of the cache key
+        self.params = json.dumps([target_size, clip_mode, self.sizes, self.formats])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.cache.close()
+        self._session.close()
+
+    def process(self, source, destinations=None):
+        """
+        Run the stage for a logo URL, file path, or raw bytes.
+
+        destinations maps derivative groups to directories (DEFAULT_DESTINATIONS by
+        default); groups left out are not written. The "source" group (the original
+        bytes) is only written for URLs and bytes, and no file is ever written over a
+        source path. Returns a report with the content
+        hash, the sniffed source format (None when the source was not read at all),
+        whether it was downloaded or served from the cache, the elapsed time and the
+        bytes written per file.
+        """
+        start = time.perf_counter()
+        destinations = DEFAULT_DESTINATIONS if destinations is None else destinations
+        is_url = isinstance(source, str) and source.startswith(("http://", "https://"))
+        source_path = os.path.realpath(source) if isinstance(source, str) and not is_url else None
+
+        data = None
+        logo_hash = self.cache.hash_for_url(source) if is_url else None
+        derivatives = self.cache.get(logo_hash, self.params) if logo_hash else None
+        downloaded = False
+
+        if derivatives is None:
+            if is_url:
+                data = download_logo(source, self._session)
+                downloaded = True
+            elif isinstance(source, (bytes, bytearray)):
+                data = bytes(source)
+            else:
+                with open(source, "rb") as f:
+                    data = f.read()
+            logo_hash = content_hash(data)
+            if is_url:
+                self.cache.remember_url(source, logo_hash)
+            derivatives = self.cache.get(logo_hash, self.params)
+
+        cached = derivatives is not None
+        source_format = sniff_format(data) if data is not None else None
+        if not cached:
+            img, source_format = decode_logo(data, self.target_size)
+            derivatives = build_derivatives(img, self.clip_mode, self.sizes, self.formats)
+            # Kept with the derivatives so a cached URL can still restore the original
+            derivatives["source"] = {"logo.png": data}
+            self.cache.put(logo_hash, self.params, derivatives)
+
+        written = {}
+        for group, directories in destinations.items():
+            if not directories or not derivatives.get(group) or (group == "source" and source_path):
+                continue
+            for name, file_bytes in derivatives[group].items():
+                targets = [directory for directory in directories
+                           if os.path.realpath(os.path.join(directory, name)) != source_path]
+                if targets:
+                    written.update(write_variants({name: file_bytes}, targets))
+
+        return {
+            "content_hash": logo_hash,
+            "format": source_format,
+            "downloaded": downloaded,
+            "cached": cached,
+            "seconds": time.perf_counter() - start,
+            "bytes": written,
+            "total_bytes": sum(written.values())
+        }
+
+
+def _process_job(job):
+    """Process pool worker: run the stage for one business, returning (business_id, report, error)."""
+    business_id, source, output_dir, cache_path = job
+    try:
+        with LogoStage(cache_path) as stage:
+            destinations = {group: [output_dir] for group in DEFAULT_DESTINATIONS}
+            return business_id, stage.process(source, destinations), None
+    except Exception as e:
+        return business_id, None, str(e)
+
+
+def process_many(sources, output_root, cache_path=DEFAULT_CACHE_PATH, workers=None):
+    """
+    Run the stage for {business_id: url_or_path} in parallel, writing every
+    derivative to output_root/<business_id>/. Returns {business_id: report}.
+    """
+    jobs = [(business_id, source, os.path.join(output_root, business_id), cache_path)
+            for business_id, source in sources.items()]
+    reports = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for business_id, report, error in pool.map(_process_job, jobs):
+            if error:
+                print(f"Logo stage failed for {business_id}: {error}")
+                continue
+            reports[business_id] = report
+            print_report(business_id, report)
+    return reports
+
+
+def print_report(label, report):
+    status = "cached" if report["cached"] else f"decoded {report['format']}"
+    if report["downloaded"]:
+        status = "downloaded, " + status
+    print(f"{label}: {report['seconds'] * 1000:.1f} ms ({status}), "
+          f"{len(report['bytes'])} files, {report['total_bytes'] / 1024:.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download, normalize and derive every logo asset in one pass.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--input", help="Logo file (default: raw_data/step_1/logo.png)")
+    source.add_argument("--url", help="Logo URL to download")
+    source.add_argument("--batch", metavar="MANIFEST",
+                        help="JSON manifest of {business_id: url_or_path}; processed in parallel")
+    parser.add_argument("--output-dir", default=os.path.join(RAW_DATA_DIR, "logos"),
+                        help="Where batch mode writes <business_id>/ derivatives")
+    parser.add_argument("--workers", type=int, help="Process pool size for batch mode")
+    args = parser.parse_args()
+
+    if args.batch:
+        base_dir = os.path.dirname(os.path.abspath(args.batch))
+        with open(args.batch, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        sources = {
+            str(business_id): value if value.startswith(("http://", "https://")) else os.path.join(base_dir, value)
+            for business_id, value in manifest.items()
+        }
+        process_many(sources, args.output_dir, workers=args.workers)
+        return
+
+    with LogoStage() as stage:
+        report = stage.process(args.url or args.input or DEFAULT_INPUT)
+    print_report(args.url or args.input or DEFAULT_INPUT, report)
+
+
+if __name__ == "__main__":
+    main()
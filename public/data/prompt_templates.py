@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Registry of the prompts every step sends to DeepSeek.
+
+The prompts used to be large f-strings inlined in the step scripts (the research
+prompt twice).
+Here each one is a named, versioned template, parsed once at import into literal
+text and fields, with the source indentation removed. Rendering checks that
+exactly the declared parameters are given and returns a Prompt: the text, plus
+the template name and version. llm_client puts `name@version` into the response
+cache key and the usage ledger, so bumping a template's version invalidates
+exactly the cached replies of that prompt, and llm_usage.py reports prompt size
+and tokens per template.
+
+Bump a template's version whenever its wording or the reply it asks for changes.
+
+Usage:
+    from prompt_templates import render
+    prompt = render("research.detailed", service_name="Shingling", service_type="residential")
+    get_client().chat(prompt, ...)
+
+    python prompt_templates.py      # every template with its version, parameters and size
+"""
+
+import textwrap
+from string import Formatter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class PromptTemplateError(ValueError):
+    """Raised for an unknown template, a duplicate registration or invalid parameters."""
+
+
+class Prompt(str):
+    """Rendered prompt text that remembers which template (and version) produced it."""
+
+    def __new__(cls, text: str, template: str, version: int):
+        prompt = super().__new__(cls, text)
+        prompt.template = template
+        prompt.version = version
+        return prompt
+
+    @property
+    def template_id(self) -> str:
+        return f"{self.template}@v{self.version}"
+
+
+class PromptTemplate:
+    """A named, versioned template using str.format fields ({name}; {{ and }} for literal braces)."""
+
+    __slots__ = ("name", "version", "text", "fields", "_parts")
+
+    def __init__(self, name: str, version: int, text: str):
+        self.name = name
+        self.version = version
+        self.text = textwrap.dedent(text).strip()
+        self._parts: List[Tuple[str, Optional[str]]] = []
+        for literal, field, spec, conversion in Formatter().parse(self.text):
+            if field is not None and (not field.isidentifier() or spec or conversion):
+                raise PromptTemplateError(f"{name}: field {{{field}}} must be a plain name")
+            self._parts.append((literal, field))
+        self.fields = frozenset(field for _, field in self._parts if field is not None)
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}@v{self.version}"
+
+    @property
+    def literal_chars(self) -> int:
+        """Size of the fixed text, i.e. the prompt before any parameter is filled in."""
+        return sum(len(literal) for literal, _ in self._parts)
+
+    def render(self, **params) -> Prompt:
+        missing = self.fields - params.keys()
+        unexpected = params.keys() - self.fields
+        if missing:
+            raise PromptTemplateError(f"{self.id}: missing parameters {sorted(missing)}")
+        if unexpected:
+            raise PromptTemplateError(f"{self.id}: unexpected parameters {sorted(unexpected)}")
+        unset = sorted(name for name, value in params.items() if value is None)
+        if unset:
+            raise PromptTemplateError(f"{self.id}: parameters {unset} are None")
+        text = "".join(literal + (str(params[field]) if field is not None else "") for literal, field in self._parts)
+        return Prompt(text, self.name, self.version)
+
+
+class PromptRegistry:
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+
+    def register(self, name: str, version: int, text: str) -> PromptTemplate:
+        if name in self._templates:
+            raise PromptTemplateError(f"Template {name} is already registered")
+        template = PromptTemplate(name, version, text)
+        self._templates[name] = template
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise PromptTemplateError(f"Unknown prompt template {name}")
+
+    def render(self, name: str, **params) -> Prompt:
+        return self.get(name).render(**params)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._templates
+
+    def __iter__(self) -> Iterator[PromptTemplate]:
+        return iter(self._templates.values())
+
+
+PROMPTS = PromptRegistry()
+
+
+def render(name: str, **params) -> Prompt:
+    """Render a registered template; raises PromptTemplateError on unknown names or bad parameters."""
+    return PROMPTS.render(name, **params)
+
+
+# Six-section research (steps 2 and 3); headings are research_parser.RESEARCH_SECTION_HEADINGS
+PROMPTS.register("research.detailed", 1, """
+    Research the following roofing service thoroughly: {service_name} ({service_type})
+
+    I need detailed information from the perspective of a professional roofing contractor. Please address these topics:
+
+    1. Construction Process:
+       - Detailed step-by-step process for installing/implementing this service
+       - Materials required and their specifications
+       - Safety considerations and building code requirements
+       - Timeline estimates for completion
+
+    2. Variants:
+       - What are the different types/styles/materials available for this service?
+       - How do these variants differ in terms of durability, appearance, and cost?
+       - What are the premium vs. budget options?
+
+    3. Sales and Supply Chain:
+       - How do roofers typically procure materials for this service?
+       - Do they usually have inventory or order per project?
+       - What's the typical markup or profit margin for this service?
+       - How are these services typically quoted or estimated?
+
+    4. Advantages and Benefits:
+       - What are the main selling points for this service?
+       - How does it compare to alternative solutions?
+       - What long-term benefits should be highlighted to customers?
+       - Any energy efficiency or insurance benefits?
+
+    5. Marketing Considerations:
+       - What aspects of this service do roofers typically emphasize in marketing?
+       - What visuals or demonstrations are most effective in selling this service?
+       - Do roofers typically show pricing publicly for this service? Why or why not?
+       - What customer concerns or questions typically arise?
+
+    6. Warranty and Maintenance:
+       - What warranties are typically offered?
+       - What maintenance requirements exist for this service?
+       - What is the expected lifespan of this roof/service?
+       - What factors can extend or reduce the lifespan?
+
+    Format your response with section markers like this:
+
+    ## **1. Construction Process**
+    [Your detailed content here]
+
+    ## **2. Variants**
+    [Your detailed content here]
+
+    And so on for each section. Provide comprehensive information a roofing website could use to create authoritative service pages.
+    """)
+
+# Step 2 per-service research, split on the INSTALLATION:/REPAIR:/MAINTENANCE:/VARIANTS: headings
+PROMPTS.register("research.sections", 1, """
+    As a roofing expert, provide detailed information about {service_name} for {category} buildings.
+    Focus on these four specific aspects:
+
+    1. Installation Process:
+    - Step by step installation process
+    - Required materials and tools
+    - Safety considerations
+    - Typical timeline
+
+    2. Repair Procedures:
+    - Common repair scenarios
+    - Repair techniques
+    - Required tools and materials
+    - Emergency repair procedures
+
+    3. Maintenance Requirements:
+    - Regular maintenance schedule
+    - Preventive maintenance steps
+    - Inspection checklist
+    - Common maintenance issues
+
+    4. Available Variants:
+    - Different material options
+    - Style variations
+    - Price ranges
+    - Pros and cons of each variant
+
+    Format your response as four distinct sections with clear headings:
+    INSTALLATION:
+    [Installation details]
+
+    REPAIR:
+    [Repair details]
+
+    MAINTENANCE:
+    [Maintenance details]
+
+    VARIANTS:
+    [Variants details]
+    """)
+
+# Step 2 batched research; service_lines holds one {"key", "name", "category"} JSON object per line
+PROMPTS.register("research.batch", 1, """
+    As a roofing expert, research each of these roofing services for the given building category:
+    {service_lines}
+
+    For every service, cover four aspects:
+    - installation: step by step installation process, required materials and tools, safety considerations, typical timeline
+    - repair: common repair scenarios, repair techniques, required tools and materials, emergency repair procedures
+    - maintenance: regular maintenance schedule, preventive steps, inspection checklist, common issues
+    - variants: material options, style variations, price ranges, pros and cons of each
+
+    Respond with a single JSON object and nothing else, in exactly this shape:
+    {{"services": [{{"key": "0", "installation": ["..."], "repair": ["..."], "maintenance": ["..."], "variants": ["..."]}}]}}
+
+    Include one entry per service above, using its "key". Each aspect is a list of 4-8 short,
+    self-contained points (one sentence each, no numbering or markdown).
+    """)
+
+# Service selection (service_selection.py): pick services for a business from the option lists
+PROMPTS.register("services.select", 1, """
+    You are a professional roofing consultant. Based on the services provided by "{business_name}",
+    select 8 specific roofing services that would make sense for this company.
+
+    The company provides these services: {service_hints}
+
+    Here are the available service options:
+
+    RESIDENTIAL OPTIONS:
+    {residential_options}
+
+    COMMERCIAL OPTIONS:
+    {commercial_options}
+
+    Rules:
+    1. Select 4 residential services from the residential options
+    2. Select 4 commercial services from the commercial options
+    3. Choose services that match or complement the company's existing offerings
+    4. All service names must be 1-3 words maximum and be selected from the provided options lists
+    5. Make selections appropriate for a company named "{business_name}"
+       that offers these services: {service_hints}
+
+    Return JSON only in this format with no additional text:
+    {{
+      "residential": [
+        {{"id": 1, "name": "Service 1"}},
+        {{"id": 2, "name": "Service 2"}},
+        {{"id": 3, "name": "Service 3"}},
+        {{"id": 4, "name": "Service 4"}}
+      ],
+      "commercial": [
+        {{"id": 1, "name": "Service 1"}},
+        {{"id": 2, "name": "Service 2"}},
+        {{"id": 3, "name": "Service 3"}},
+        {{"id": 4, "name": "Service 4"}}
+      ]
+    }}
+
+    The service names must be exactly as they appear in the options lists above, with no modifications.
+    """)
+
+# Step 4: split the business name into a header title and subtitle
+PROMPTS.register("business_name.split", 1, """
+    I have a roofing business name: "{business_name}"
+
+    Should this name be split into a main title and subtitle for a website header? If yes, how would you split it?
+
+    Some guidelines:
+    1. If the name is very short (1-2 words), don't split it and just leave the subtitle empty
+    2. If the name contains words like "Construction", "Roofing", "Contractors", "Company", etc., these are good candidates for the subtitle
+    3. If the name has a clear brand name followed by a descriptor, split between those
+
+    Return your answer as a JSON with two keys:
+    - "shouldSplit": boolean (true or false)
+    - "mainTitle": string (the main title portion or the entire name if not splitting)
+    - "subTitle": string (the subtitle portion, or empty string if not splitting)
+    """)
+
+# geocoder.py: coordinates for an address the centroid table cannot place (by default only when
+# no table is built; GEOCODER_LLM=1 also asks with a table, GEOCODER_LLM=0 never asks)
+PROMPTS.register("geocode.address", 1, """
+    Please provide latitude and longitude coordinates for this address: {address}
+
+    Return only the coordinates as a JSON with 'lat' and 'lng' keys.
+    Example: {{"lat": 33.7490, "lng": -84.3880}}
+
+    Do not include any additional information or explanation, just the JSON.
+    """)
+
+
+def main():
+    print(f"{'template':<22} {'version':>7} {'chars':>6} {'~tokens':>8}  parameters")
+    for template in PROMPTS:
+        # ~4 characters per token for English prose
+        print(f"{template.name:<22} {template.version:>7} {template.literal_chars:>6} "
+              f"{template.literal_chars // 4:>8}  {', '.join(sorted(template.fields))}")
+
+
+if __name__ == "__main__":
+    main()
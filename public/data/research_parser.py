@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Single-pass parser for research answers.
+
+The research text the model returns is loosely structured markdown: section
+headings (`## **1. Construction Process**`, `INSTALLATION:`, `### **Key
+Benefits**`, whole-line bold titles), numbered steps, bullets, bold key/value
+pairs (`**Protection:** Shields your property...`) and markdown tables.
+Previously each consumer searched the raw text again (str.find for every
+heading pair, several uncompiled re.findall calls per helper). Here the text is
+tokenized once, one compiled pattern per line, into a tree of Sections that
+every block generator reads from.
+
+Usage:
+    tree = parse_research(text)
+    construction = tree.find("## **1. Construction Process**")
+    steps = construction.steps()            # numbered items
+    advantages = tree.find("Advantages").pairs()
+    for table in tree.all_tables():
+        table.records()                     # [{header: cell}, ...]
+"""
+
+import re
+from typing import Dict, Iterator, List, Optional
+
+# Headings of the six-section research prompt (the research.detailed template in prompt_templates.py)
+RESEARCH_SECTION_HEADINGS = {
+    "construction_process": "## **1. Construction Process**",
+    "variants": "## **2. Variants**",
+    "sales_supply": "## **3. Sales and Supply Chain**",
+    "advantages": "## **4. Advantages and Benefits**",
+    "marketing": "## **5. Marketing Considerations**",
+    "warranty_maintenance": "## **6. Warranty and Maintenance**",
+}
+
+# Depth given to headings that are not '#' headings. An all-caps label is a top-level section
+# (INSTALLATION:) outside any heading, but nests just below the heading it appears under, so
+# a "TIP:" or "NOTE:" line cannot close the enclosing "## **1. Construction Process**"
+_LABEL_LEVEL = 1        # INSTALLATION:
+_BOLD_LEVEL = 6         # **Step-by-Step Process** on its own line
+
+# One pattern per line; which named group matched decides the token kind
+_LINE = re.compile(r"""
+    ^[ \t]*(?:
+        (?P<rule>[-*_]{3,})[ \t]*$
+      | (?P<table_sep>\|?[ \t]*:?-{3,}:?[ \t]*(?:\|[ \t]*:?-{3,}:?[ \t]*)*\|?)[ \t]*$
+      | (?P<table>\|.*\|)[ \t]*$
+      | (?P<hashes>\#{1,6})[ \t]+(?P<heading>.+?)[ \t#]*$
+      | \*\*(?P<bold_heading>[^*\n]*[^*\s:][^*\n]*?):?\*\*[ \t]*:?[ \t]*$
+      | (?P<label>[A-Z][A-Z0-9 &/\-]{2,}):[ \t]*(?P<label_rest>.*?)[ \t]*$
+      | (?P<number>\d{1,3})[.)][ \t]+(?P<numbered>.+?)[ \t]*$
+      | [-*•+][ \t]+(?P<bullet>.+?)[ \t]*$
+      | (?P<text>\S.*?)[ \t]*$
+    )""", re.VERBOSE)
+
+# **Key:** value, **Key** - value, **Key**: value
+_PAIR = re.compile(r"^\*\*(?P<key>[^*\n]+?):?\*\*[ \t]*(?:[:–—-][ \t]*)?(?P<value>.*)$")
+_BOLD = re.compile(r"\*\*|__")
+_NUMBERING = re.compile(r"^\d+[.)]\s*")
+_DECORATION = "#*: \t"
+
+
+def heading_key(text: str) -> str:
+    """A heading reduced for comparison: decoration and leading numbering removed, case-folded."""
+    key = re.sub(r"\s+", " ", _BOLD.sub("", text).strip(_DECORATION))
+    return _NUMBERING.sub("", key).casefold()
+
+
+def _clean(text: str) -> str:
+    return _BOLD.sub("", text).strip()
+
+
+class Item:
+    """A numbered step, bullet or paragraph line; key/value are set when it leads with a bold label."""
+
+    __slots__ = ("kind", "number", "text", "key", "value")
+
+    def __init__(self, kind: str, content: str, number: Optional[int] = None):
+        self.kind = kind
+        self.number = number
+        match = _PAIR.match(content)
+        if match and match.group("key").strip():
+            self.key = _clean(match.group("key"))
+            self.value = _clean(match.group("value"))
+            self.text = f"{self.key} – {self.value}" if self.value else self.key
+        else:
+            self.key = None
+            self.value = None
+            self.text = _clean(content)
+
+
+class Table:
+    """A markdown table: header cells and body rows (bold markers removed)."""
+
+    __slots__ = ("header", "rows")
+
+    def __init__(self, header: List[str]):
+        self.header = header
+        self.rows: List[List[str]] = []
+
+    def records(self) -> List[Dict[str, str]]:
+        return [dict(zip(self.header, row)) for row in self.rows]
+
+
+class Section:
+    """A heading and everything under it until a heading of the same or a higher level."""
+
+    __slots__ = ("title", "key", "level", "items", "tables", "children", "_lines", "_start", "_end")
+
+    def __init__(self, title: str, level: int, lines: List[str], start: int):
+        self.title = _clean(title).rstrip(":").strip()
+        self.key = heading_key(title)
+        self.level = level
+        self.items: List[Item] = []
+        self.tables: List[Table] = []
+        self.children: List["Section"] = []
+        self._lines = lines
+        self._start = start
+        self._end = len(lines)
+
+    @property
+    def body(self) -> str:
+        """The raw text under the heading, subsections included."""
+        return "\n".join(self._lines[self._start:self._end]).strip()
+
+    def walk(self) -> Iterator["Section"]:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def find(self, heading: str) -> Optional["Section"]:
+        """
+        The first section (depth first, this one included) whose heading matches.
+        Decoration, case and numbering are ignored, so "## **1. Construction Process**",
+        "Construction Process" and "CONSTRUCTION PROCESS:" all match the same heading.
+        """
+        wanted = heading_key(heading)
+        for section in self.walk():
+            if section.key == wanted:
+                return section
+        for section in self.walk():
+            if section.key.startswith(wanted + " "):
+                return section
+        return None
+
+    def all_items(self) -> List[Item]:
+        return [item for section in self.walk() for item in section.items]
+
+    def all_tables(self) -> List[Table]:
+        return [table for section in self.walk() for table in section.tables]
+
+    def steps(self) -> List[Item]:
+        """Numbered items in this section and below, or its bullets if nothing is numbered."""
+        items = self.all_items()
+        return ([item for item in items if item.kind == "numbered"]
+                or [item for item in items if item.kind == "bullet"])
+
+    def pairs(self) -> List[Item]:
+        """Items that lead with a bold label (**Key:** value)."""
+        return [item for item in self.all_items() if item.key]
+
+    def points(self) -> List[str]:
+        """Every item's text, one per source line, without numbering, bullets or bold markers."""
+        return [item.text for item in self.all_items() if item.text]
+
+
+def parse_research(text: str) -> Section:
+    """Tokenize text once and return the root Section (level 0, no title)."""
+    lines = text.splitlines()
+    root = Section("", 0, lines, 0)
+    stack = [root]
+    labels = set()
+    table: Optional[Table] = None
+
+    def open_section(title: str, level: int, index: int) -> Section:
+        while stack[-1].level >= level:
+            stack.pop()._end = index
+        section = Section(title, level, lines, index + 1)
+        stack[-1].children.append(section)
+        stack.append(section)
+        return section
+
+    def label_level() -> int:
+        for section in reversed(stack):
+            if section not in labels:
+                return max(_LABEL_LEVEL, section.level + 1)
+        return _LABEL_LEVEL
+
+    for index, line in enumerate(lines):
+        match = _LINE.match(line)
+        if match is None or match.group("rule") is not None:
+            table = None
+            continue
+        if match.group("table_sep") is not None:
+            continue
+        if match.group("table") is not None:
+            cells = [_clean(cell) for cell in match.group("table").strip("|").split("|")]
+            if table is None:
+                table = Table(cells)
+                stack[-1].tables.append(table)
+            else:
+                table.rows.append(cells)
+            continue
+        table = None
+
+        if match.group("heading") is not None:
+            open_section(match.group("heading"), len(match.group("hashes")), index)
+        elif match.group("bold_heading") is not None:
+            open_section(match.group("bold_heading"), _BOLD_LEVEL, index)
+        elif match.group("label") is not None:
+            if match.group("label_rest"):
+                # "EPDM: rubber membrane" is a key/value line, not a heading
+                stack[-1].items.append(Item("text", f"**{match.group('label')}:** {match.group('label_rest')}"))
+            else:
+                labels.add(open_section(match.group("label"), label_level(), index))
+        elif match.group("numbered") is not None:
+            stack[-1].items.append(Item("numbered", match.group("numbered"), int(match.group("number"))))
+        elif match.group("bullet") is not None:
+            stack[-1].items.append(Item("bullet", match.group("bullet")))
+        elif match.group("text") is not None and match.group("text").strip(_DECORATION):
+            stack[-1].items.append(Item("text", match.group("text")))
+
+    return root
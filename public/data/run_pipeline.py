@@ -1,30 +1,73 @@
 #!/usr/bin/env python3
 """
 Master script to run the complete custom website templating generation pipeline.
+
+With --llm-stub, every DeepSeek call goes to a local stub server
+(llm_stub_server.py) instead of the real API, so the pipeline runs offline.
+Stub replies are kept out of the shared stores: the response cache, the service
+knowledge base and the usage ledger point at a temporary directory for the run.
+
+Every step's LLM calls are tagged with one run id (LLM_RUN_ID), and the run's
+token usage and estimated cost (llm_usage.py) are printed when it finishes.
 """
 
+import argparse
+import atexit
 import os
+import shutil
 import sys
 import subprocess
 import logging
+import tempfile
+import time
 from pathlib import Path
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 
-def run_script(script_path, step_name):
+def run_script(script_path, step_name, args=()):
     """Run a Python script and handle errors."""
     try:
         logging.info(f"Running {step_name}: {script_path}")
-        result = subprocess.run([sys.executable, script_path], check=True, capture_output=True, text=True)
+        result = subprocess.run([sys.executable, script_path, *args], check=True, capture_output=True, text=True)
         logging.info(f"✓ Completed {step_name}")
         return True
     except subprocess.CalledProcessError as e:
         logging.error(f"✗ Failed {step_name}: {e}")
         return False
 
+def start_llm_stub(latency):
+    """Start the local DeepSeek stub and point every step's llm_client at it."""
+    from llm_stub_server import StubConfig, start_stub_server
+    server = start_stub_server(StubConfig(latency=latency))
+    # Steps run as subprocesses and inherit these; .env.deepseek does not override them
+    os.environ["DEEPSEEK_API_BASE"] = server.api_base
+    os.environ["DEEPSEEK_API_KEY"] = "stub"
+    # Stub text must never be served to a real run or counted as spend, so the stores it
+    # would land in live in a throwaway directory (removed when the pipeline exits)
+    scratch = tempfile.mkdtemp(prefix="llm-stub-")
+    atexit.register(shutil.rmtree, scratch, True)
+    os.environ["LLM_CACHE_PATH"] = os.path.join(scratch, "llm_cache.sqlite")
+    os.environ["LLM_USAGE_PATH"] = os.path.join(scratch, "llm_usage.sqlite")
+    os.environ["SERVICE_KNOWLEDGE_PATH"] = os.path.join(scratch, "service_research.sqlite")
+    logging.info(f"Using local DeepSeek stub at {server.api_base} (cache, ledger and knowledge base in {scratch})")
+    return server
+
+def print_llm_usage(run_id):
+    """Token usage and estimated cost of this run, per business and call site."""
+    from llm_usage import DEFAULT_LEDGER_PATH, UsageLedger, print_report
+    if not os.path.exists(DEFAULT_LEDGER_PATH):
+        return
+    with UsageLedger(run_id=run_id) as ledger:
+        print_report(ledger.report(run_id=run_id))
+
 def main():
     """Run the complete pipeline."""
+    parser = argparse.ArgumentParser(description="Run the website templating pipeline.")
+    parser.add_argument("--llm-stub", action="store_true", help="Answer DeepSeek calls from a local stub server")
+    parser.add_argument("--stub-latency", type=float, default=0.5, help="Stub response latency in seconds")
+    args = parser.parse_args()
+    
     logging.info("STARTING CUSTOM WEBSITE TEMPLATING PIPELINE")
     
     base_dir = Path.cwd()
@@ -32,6 +75,13 @@ def main():
         logging.error("Run this script from the public/data directory")
         sys.exit(1)
     
+    if args.llm_stub:
+        start_llm_stub(args.stub_latency)
+    
+    # Steps run as subprocesses and inherit this, so the ledger groups their calls as one run
+    run_id = os.environ.setdefault("LLM_RUN_ID", f"pipeline-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    logging.info(f"LLM usage run id: {run_id}")
+    
     # Step 1: Data Collection
     logging.info("\nSTEP 1: DATA COLLECTION")
     os.chdir("step_1")
@@ -46,18 +96,7 @@ def main():
     os.chdir("step_2")
     if not run_script("AnalyzeReviews.py", "Review analysis"):
         return False
-    try:
-        logging.info("Running Color extraction: color_extractor.py (auto-respond 'n')")
-        result = subprocess.run(
-            [sys.executable, "color_extractor.py"],
-            input="n\n",
-            text=True,
-            capture_output=True,
-            check=True
-        )
-        logging.info("✓ Completed Color extraction")
-    except subprocess.CalledProcessError as e:
-        logging.error(f"✗ Failed Color extraction: {e}")
+    if not run_script("color_extractor.py", "Color extraction", ["--no-editor"]):
         return False
     if not run_script("research_services.py", "Service research"):
         return False
@@ -70,7 +109,8 @@ def main():
         return False
     if not run_script("generate_service_jsons.py", "Service content"):
         return False
-    if not run_script("clipimage.py", "Image processing"):
+    # Normalized logo, clipped variants and favicons in one pass (cached by logo content)
+    if not run_script(os.path.join("..", "logo_stage.py"), "Logo processing"):
         return False
     os.chdir("..")
     
@@ -82,6 +122,7 @@ def main():
     os.chdir("..")
     
     logging.info("\n🎉 PIPELINE COMPLETED! Check raw_data/combined_data.json")
+    print_llm_usage(run_id)
     return True
 
 if __name__ == "__main__":
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Incremental section parser for streamed research answers.
+
+Research prompts ask for sections under fixed headings (`INSTALLATION:` in
+step 2, `## **1. Construction Process**` in step 3). Rather than waiting for the
+full completion and then searching it for every heading, SectionStreamParser is
+fed the reply as it streams in (llm_client.chat_stream). It looks only at
+completed lines, recognizes a heading however the model decorates it (`###`,
+`**`, a trailing colon, different case) but not a sentence that merely starts
+with the same word, and hands each section to a callback the moment the next
+heading arrives, so work on the first section starts while the rest of the
+answer is still being generated.
+
+Usage:
+    parser = SectionStreamParser({"installation": "INSTALLATION:", ...}, on_section=handle)
+    for piece in get_client().chat_stream(prompt):
+        parser.feed(piece)
+    sections = parser.close()
+"""
+
+import re
+from typing import Callable, Dict, Iterable, Optional
+
+# Decoration a model may wrap a heading in: markdown heading marks, bold, colons, spaces
+_DECORATION = "#*: \t"
+
+
+def marker_key(text: str) -> str:
+    """
+    A heading with only its outer decoration stripped and whitespace collapsed, case-folded.
+
+    Unlike research_parser.heading_key, leading numbering and inner bold are kept, so a
+    numbered step such as "3. Maintenance: clear the gutters" inside the REPAIR section
+    does not open the MAINTENANCE section early.
+    """
+    return re.sub(r"\s+", " ", text.strip(_DECORATION)).casefold()
+
+
+class SectionStreamParser:
+    """
+    markers maps section names to the heading that starts them. Text before the first
+    heading is ignored; a heading may be followed by content on the same line.
+    on_section(name, text) is called once per section, in the order they complete.
+    """
+
+    def __init__(self, markers: Dict[str, str],
+                 on_section: Optional[Callable[[str, str], None]] = None):
+        self.on_section = on_section
+        self._headings = [(marker_key(marker), name) for name, marker in markers.items()]
+        # Longer headings first, so "1. Construction Process" is not shadowed by a shorter prefix
+        self._headings.sort(key=lambda item: len(item[0]), reverse=True)
+        self.sections: Dict[str, str] = {}
+        self._pending = ""
+        self._current: Optional[str] = None
+        self._lines = []
+
+    def feed(self, piece: str):
+        """Add streamed text; complete lines are parsed immediately."""
+        self._pending += piece
+        if "\n" not in piece:
+            return
+        *lines, self._pending = self._pending.split("\n")
+        for line in lines:
+            self._line(line)
+
+    def close(self) -> Dict[str, str]:
+        """Flush the last section and return every section found, {name: text}."""
+        if self._pending:
+            self._line(self._pending)
+            self._pending = ""
+        self._finish()
+        return self.sections
+
+    def _line(self, line: str):
+        match = self._match(line)
+        if match is None:
+            if self._current is not None:
+                self._lines.append(line)
+            return
+        name, rest = match
+        self._finish()
+        self._current = name
+        self._lines = [rest] if rest else []
+
+    def _match(self, line: str):
+        stripped = line.strip()
+        if not stripped or stripped[0] not in "#*" and not stripped[0].isalnum():
+            return None
+        key = marker_key(stripped)
+        for heading, name in self._headings:
+            if not key.startswith(heading) or name in self.sections or name == self._current:
+                continue
+            # "INSTALLATION: text" is a heading with content; "Installation of gutters" is not
+            after = key[len(heading):]
+            if not after or after.lstrip("*").startswith(":"):
+                # Anything after the heading on the same line is content
+                rest = stripped[self._heading_end(stripped, heading):].lstrip(_DECORATION)
+                return name, rest
+        return None
+
+    @staticmethod
+    def _heading_end(line: str, heading: str) -> int:
+        """Index in line just past the (decorated) heading whose key is heading."""
+        for end in range(len(heading), len(line) + 1):
+            if marker_key(line[:end]) == heading:
+                return end
+        return len(line)
+
+    def _finish(self):
+        if self._current is None:
+            return
+        text = "\n".join(self._lines).strip()
+        self.sections[self._current] = text
+        if self.on_section is not None:
+            self.on_section(self._current, text)
+        self._current = None
+        self._lines = []
+
+
+def parse_stream(pieces: Iterable[str], markers: Dict[str, str],
+                 on_section: Optional[Callable[[str, str], None]] = None) -> Dict[str, str]:
+    """Feed every piece of a streamed reply through a SectionStreamParser and return its sections."""
+    parser = SectionStreamParser(markers, on_section)
+    for piece in pieces:
+        parser.feed(piece)
+    return parser.close()
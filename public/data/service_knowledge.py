@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Pre-researched service knowledge base, shared by every business.
+
+Research for a service such as "Metal Roof (commercial)" says nothing about the
+business it is generated for, yet steps 2 and 3 asked DeepSeek for it on every
+run, up to 4,000 completion tokens per service. Here the research for each entry
+of ROOFING_SERVICE_OPTIONS x category is stored once in
+raw_data/knowledge/service_research.sqlite and looked up by later businesses;
+only services that are missing or stale reach the API. Per-business output is
+made by personalize_sections(), a local pass that names the business where the
+research speaks of a generic contractor.
+
+Two kinds of research are stored, one per prompt:
+    sections    step 2: installation / repair / maintenance / variants
+    detailed    step 3: the six "## **N. ...**" sections
+
+Both prompts of the sections kind (per-service and batched) store the same
+markdown form: batched points are rendered as the list a per-service answer uses
+(research_services.points_markdown). Only answers with every section non-empty
+are stored.
+
+Every entry records KNOWLEDGE_VERSION and the versions of the prompt templates
+that produce its kind (prompt_templates.py), so bumping either retires it.
+Entries also have a maximum age (refresh schedule): older entries count as
+stale, and `--build` (e.g. from cron) re-researches exactly those. A single bad
+entry is dropped with `--evict SERVICE` (or ServiceKnowledgeBase.invalidate) and
+researched again on next use.
+
+Environment:
+    SERVICE_KNOWLEDGE_MAX_AGE_DAYS   re-research entries older than this (default 90; 0: never)
+    SERVICE_KNOWLEDGE_BYPASS=1       skip lookups (fresh research is still stored)
+    SERVICE_KNOWLEDGE_PATH           knowledge base file (default raw_data/knowledge/service_research.sqlite)
+
+Usage:
+    from service_knowledge import knowledge_base, personalize_sections
+    sections = knowledge_base().get("sections", "commercial", "Metal Roof")
+    if sections is None:
+        ...
+        knowledge_base().put("sections", "commercial", "Metal Roof", sections)
+
+    python service_knowledge.py                     # entry counts, stale entries
+    python service_knowledge.py --build             # research missing and stale entries
+    python service_knowledge.py --build --refresh   # re-research every entry, bypassing the response cache
+    python service_knowledge.py --evict "Metal Roof" --category commercial   # drop one service's entries
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from prompt_templates import PROMPTS
+from service_selection import ROOFING_SERVICE_OPTIONS
+
+# Bump whenever stored research should no longer be used
+KNOWLEDGE_VERSION = "kb-v2"
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_KB_PATH = os.getenv("SERVICE_KNOWLEDGE_PATH") or os.path.join(DATA_DIR, "raw_data", "knowledge",
+                                                                    "service_research.sqlite")
+
+# Prompt templates whose replies are stored under each kind
+KIND_TEMPLATES = {
+    "sections": ("research.sections", "research.batch"),
+    "detailed": ("research.detailed",),
+}
+
+# Entries older than this are re-researched; override with SERVICE_KNOWLEDGE_MAX_AGE_DAYS (0 keeps them forever)
+DEFAULT_MAX_AGE_DAYS = 90
+
+# A reference to one unnamed contractor ("a licensed roofing contractor", "your roofer"); plurals
+# ("contractors typically order per project") describe the trade and are left alone
+_GENERIC_CONTRACTOR = re.compile(
+    r"\b(?:a|an|the|your)\s+(?:(?:professional|licensed|qualified|experienced|reputable|local|certified)\s+)*"
+    r"(?:roofing\s+)?(?:contractor|roofer)\b(?!['’]s)",
+    re.IGNORECASE,
+)
+
+
+def entry_version(kind: str) -> str:
+    """KNOWLEDGE_VERSION plus the template ids of a kind, e.g. kb-v2/research.detailed@v1."""
+    return "/".join((KNOWLEDGE_VERSION,) + tuple(PROMPTS.get(name).id for name in KIND_TEMPLATES[kind]))
+
+
+def max_age_days() -> float:
+    return float(os.getenv("SERVICE_KNOWLEDGE_MAX_AGE_DAYS") or DEFAULT_MAX_AGE_DAYS)
+
+
+def bypass_requested() -> bool:
+    return os.getenv("SERVICE_KNOWLEDGE_BYPASS", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class ServiceKnowledgeBase:
+    """
+    Usage:
+        kb = ServiceKnowledgeBase()
+        sections = kb.get("sections", "residential", "Shingling")
+        kb.put("sections", "residential", "Shingling", sections)
+
+    Safe to share between threads; several processes may share the file.
+    """
+
+    def __init__(self, kb_path: str = DEFAULT_KB_PATH, max_age: Optional[float] = None,
+                 bypass: Optional[bool] = None):
+        self.kb_path = kb_path
+        self.max_age = 86400 * (max_age_days() if max_age is None else max_age)
+        self.bypass = bypass_requested() if bypass is None else bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(kb_path), exist_ok=True)
+        self._conn = sqlite3.connect(kb_path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS research ("
+            "kind TEXT NOT NULL, category TEXT NOT NULL, service TEXT NOT NULL, version TEXT NOT NULL, "
+            "sections TEXT NOT NULL, created REAL NOT NULL, PRIMARY KEY (kind, category, service))"
+        )
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _fresh(self, kind: str, version: str, created: float, now: float) -> bool:
+        return version == entry_version(kind) and (not self.max_age or now - created <= self.max_age)
+
+    def get(self, kind: str, category: str, service: str) -> Optional[Dict[str, str]]:
+        """The stored sections, or None when missing, from another version, past the maximum age or bypassed."""
+        if self.bypass:
+            self.misses += 1
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, sections, created FROM research WHERE kind = ? AND category = ? AND service = ?",
+                (kind, category, service)).fetchone()
+            if row is None or not self._fresh(kind, row[0], row[2], time.time()):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[1])
+
+    def put(self, kind: str, category: str, service: str, sections: Dict[str, str]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO research (kind, category, service, version, sections, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, category, service, entry_version(kind), json.dumps(sections), time.time()))
+            self._conn.commit()
+
+    def invalidate(self, service: str, category: Optional[str] = None, kind: Optional[str] = None) -> int:
+        """Drop a service's entries (of one category and kind when given); returns how many were removed."""
+        query = "DELETE FROM research WHERE service = ?"
+        params = [service]
+        if category is not None:
+            query += " AND category = ?"
+            params.append(category)
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        with self._lock:
+            removed = self._conn.execute(query, params).rowcount
+            self._conn.commit()
+        return removed
+
+    def pending(self, kind: str) -> List[Tuple[str, str]]:
+        """(category, service) pairs of ROOFING_SERVICE_OPTIONS that are missing or stale for a kind."""
+        with self._lock:
+            rows = self._conn.execute("SELECT category, service, version, created FROM research WHERE kind = ?",
+                                      (kind,)).fetchall()
+        now = time.time()
+        fresh = {(category, service) for category, service, version, created in rows
+                 if self._fresh(kind, version, created, now)}
+        return [(category, service) for category, options in ROOFING_SERVICE_OPTIONS.items()
+                for service in options if (category, service) not in fresh]
+
+    def stats(self) -> Dict[str, int]:
+        """Fresh entries per kind, plus this process's hit/miss counters."""
+        total = sum(len(options) for options in ROOFING_SERVICE_OPTIONS.values())
+        stats = {kind: total - len(self.pending(kind)) for kind in KIND_TEMPLATES}
+        stats.update(options=total, hits=self.hits, misses=self.misses)
+        return stats
+
+
+_kb: Optional[ServiceKnowledgeBase] = None
+_kb_lock = threading.Lock()
+
+
+def knowledge_base() -> ServiceKnowledgeBase:
+    """The process-wide knowledge base."""
+    global _kb
+    with _kb_lock:
+        if _kb is None:
+            _kb = ServiceKnowledgeBase()
+        return _kb
+
+
+def is_complete(sections: Dict[str, str], names: Iterable[str]) -> bool:
+    """Every named section present and non-empty: only such research is worth storing."""
+    return all(isinstance(sections.get(name), str) and sections[name].strip() for name in names)
+
+
+def personalize(text: str, business_name: str) -> str:
+    """Name the business where generic research refers to an unnamed contractor."""
+    if not business_name:
+        return text
+    return _GENERIC_CONTRACTOR.sub(business_name, text)
+
+
+def personalize_sections(sections: Dict[str, str], business_name: str) -> Dict[str, str]:
+    return {name: personalize(text, business_name) for name, text in sections.items()}
+
+
+def build(kind: str) -> int:
+    """
+    Research the pending entries of a kind (every entry when bypassing); returns how many are now stored.
+
+    The step research functions look entries up and store complete results themselves.
+    """
+    sys.path.insert(0, os.path.join(DATA_DIR, "step_2"))
+    sys.path.insert(0, os.path.join(DATA_DIR, "step_3"))
+
+    kb = knowledge_base()
+    if kb.bypass:
+        targets = [(category, service) for category, options in ROOFING_SERVICE_OPTIONS.items() for service in options]
+    else:
+        targets = kb.pending(kind)
+    if not targets:
+        return 0
+
+    jobs = [({"id": index + 1, "name": service}, category) for index, (category, service) in enumerate(targets)]
+    if kind == "sections":
+        from research_services import research_services_batched
+        research_services_batched(jobs)
+    else:
+        from generate_service_jsons import research_service
+        from llm_runner import run_concurrently
+        run_concurrently(research_service, jobs)
+    return len(targets) - len(set(targets) & set(kb.pending(kind)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or build the shared service knowledge base")
+    parser.add_argument("--build", action="store_true", help="Research missing and stale entries")
+    parser.add_argument("--refresh", action="store_true",
+                        help="With --build, re-research every entry, bypassing the response cache")
+    parser.add_argument("--kind", choices=sorted(KIND_TEMPLATES), action="append",
+                        help="Kind of research to build or evict (default: all)")
+    parser.add_argument("--evict", metavar="SERVICE", action="append",
+                        help="Drop the stored research of a service so it is researched again")
+    parser.add_argument("--category", choices=sorted(ROOFING_SERVICE_OPTIONS),
+                        help="With --evict, only this category")
+    args = parser.parse_args()
+
+    if args.refresh:
+        # Read when the knowledge base and the LLM client are first created, so set before --evict
+        os.environ["SERVICE_KNOWLEDGE_BYPASS"] = "1"
+        os.environ["LLM_CACHE_BYPASS"] = "1"
+
+    for service in args.evict or []:
+        removed = sum(knowledge_base().invalidate(service, args.category, kind)
+                      for kind in args.kind or [None])
+        print(f"Evicted {removed} entries for {service}")
+    if args.build:
+        for kind in args.kind or sorted(KIND_TEMPLATES):
+            start = time.perf_counter()
+            stored = build(kind)
+            print(f"{kind}: {stored} entries researched in {time.perf_counter() - start:.1f}s")
+
+    kb = knowledge_base()
+    stats = kb.stats()
+    print(f"Service knowledge base {kb.kb_path} ({entry_version('sections')}, {entry_version('detailed')})")
+    for kind in sorted(KIND_TEMPLATES):
+        pending = kb.pending(kind)
+        print(f"  {kind}: {stats[kind]}/{stats['options']} fresh"
+              + (f", missing or stale: {', '.join(f'{service} ({category})' for category, service in pending)}"
+                 if pending else ""))
+
+
+if __name__ == "__main__":
+    main()
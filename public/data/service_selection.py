@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Service selection shared by every step.
+
+Steps 2 and 3 each asked DeepSeek to pick four residential and four commercial
+services from the same ROOFING_SERVICE_OPTIONS for the same BBB profile, with
+slightly different prompts, so every site paid for two selection calls that
+could disagree. Here the selection is made once and stored as an artifact,
+raw_data/step_2/service_selection.json:
+
+    {"version": "selection-v2", "input_hash": "...", "method": "local",
+     "business_name": "...", "created": "2025-01-01T12:00:00",
+     "services": {"residential": [...], "commercial": [...]}}
+
+method is "local", or "local+llm" when DeepSeek re-ranked the shortlist.
+
+input_hash covers everything the choice depends on (business name, the services
+listed on the BBB profile, the option lists, the prompt template version and
+SELECTION_VERSION, the option descriptors and the selection method). Any later
+step, or a re-run, that asks for the selection of the same profile gets the
+stored one; a changed profile or option list produces a new selection.
+
+The choice itself is made locally: every option has a short keyword descriptor
+(OPTION_DESCRIPTORS), the BBB service strings are compared with them by TF-IDF
+cosine similarity, and the four best options per category are taken, ties and
+empty profiles falling back to DEFAULT_SERVICES order. That is deterministic,
+needs no network and takes microseconds, so batch runs over many leads
+(--batch) cost nothing per lead. With SERVICE_SELECTION_RERANK=1 (or --rerank)
+DeepSeek re-ranks the local shortlist (RERANK_CANDIDATES per category); a
+reranked selection that fell back to the local one because of a missing API key
+or a failed call is not stored, so the next run tries again.
+
+Usage:
+    from service_selection import select_services, select_locally
+    services = select_services(bbb_data)       # stored, local (or reranked) selection
+    services = select_locally(bbb_data)        # pure function, no I/O
+
+    python service_selection.py                # selection for raw_data/step_1/bbb_profile_data.json
+    python service_selection.py --refresh      # ignore the stored selection
+    python service_selection.py --rerank       # let DeepSeek re-rank the local shortlist
+    python service_selection.py --batch profiles.json --output selections.json
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import math
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from llm_client import LLMError, get_client, parses_as_json
+from prompt_templates import PROMPTS, render
+
+# Bump whenever the selection rules or validation change
+SELECTION_VERSION = "selection-v2"
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+BBB_PROFILE_PATH = os.path.join(DATA_DIR, "raw_data", "step_1", "bbb_profile_data.json")
+SELECTION_PATH = os.path.join(DATA_DIR, "raw_data", "step_2", "service_selection.json")
+
+SELECTION_TEMPLATE = "services.select"
+SELECTION_MAX_TOKENS = 1000
+
+# Locally ranked options per category offered to DeepSeek when re-ranking
+RERANK_CANDIDATES = 8
+
+# These are shorter service options matching the combined_data.json format
+# Services are 1-3 words max as required
+ROOFING_SERVICE_OPTIONS = {
+    "residential": [
+        "Shingling",
+        "Guttering",
+        "Chimney",
+        "Skylights",
+        "Siding",
+        "Ventilation",
+        "Insulation",
+        "Waterproofing",
+        "Repairs",
+        "Inspection",
+        "Metal Roof",
+        "Ridge Vents",
+        "Attic Fans",
+        "Fascia",
+        "Flashing",
+        "Soffits"
+    ],
+    "commercial": [
+        "Coatings",
+        "Built-Up",
+        "Metal Roof",
+        "Drainage",
+        "TPO Systems",
+        "EPDM",
+        "PVC Membrane",
+        "Modified Bitumen",
+        "Restoration",
+        "Maintenance",
+        "Flat Roof",
+        "Roof Deck",
+        "Green Roof",
+        "Solar Panels",
+        "Sheet Metal",
+        "Ventilation"
+    ]
+}
+
+# Default services from combined_data.json to use as fallbacks
+DEFAULT_SERVICES = {
+    "residential": [
+        {"id": 1, "name": "Shingling"},
+        {"id": 2, "name": "Guttering"},
+        {"id": 3, "name": "Chimney"},
+        {"id": 4, "name": "Skylights"}
+    ],
+    "commercial": [
+        {"id": 1, "name": "Coatings"},
+        {"id": 2, "name": "Built-Up"},
+        {"id": 3, "name": "Metal Roof"},
+        {"id": 4, "name": "Drainage"}
+    ]
+}
+
+
+# Keywords a BBB service description uses for each option
+OPTION_DESCRIPTORS = {
+    "residential": {
+        "Shingling": "shingle shingles asphalt architectural roof replacement reroof new roof installation",
+        "Guttering": "gutter gutters guttering downspout downspouts gutter guards seamless",
+        "Chimney": "chimney chimneys masonry mason brick flue crown tuckpointing",
+        "Skylights": "skylight skylights roof window sun tunnel",
+        "Siding": "siding vinyl fiber cement exterior cladding",
+        "Ventilation": "ventilation vent vents attic airflow exhaust",
+        "Insulation": "insulation insulate attic spray foam energy",
+        "Waterproofing": "waterproofing waterproof leak leaks moisture water damage sealing",
+        "Repairs": "repair repairs roof leak fix patch storm damage emergency",
+        "Inspection": "inspection inspections assessment estimate insurance claim storm damage",
+        "Metal Roof": "metal roof standing seam steel aluminum tin",
+        "Ridge Vents": "ridge vent vents cap ventilation",
+        "Attic Fans": "attic fan fans solar exhaust ventilation",
+        "Fascia": "fascia board trim carpentry rot wood",
+        "Flashing": "flashing flashings step valley chimney leak seal",
+        "Soffits": "soffit soffits eaves vented trim",
+    },
+    "commercial": {
+        "Coatings": "coating coatings roof silicone acrylic elastomeric seal",
+        "Built-Up": "built-up built up bur tar gravel hot asphalt flat roof",
+        "Metal Roof": "metal roof standing seam steel panel",
+        "Drainage": "drainage drain drains scupper downspout ponding water",
+        "TPO Systems": "tpo thermoplastic single ply membrane flat roof",
+        "EPDM": "epdm rubber single ply membrane flat roof",
+        "PVC Membrane": "pvc membrane single ply vinyl flat roof",
+        "Modified Bitumen": "modified bitumen mod bit torch down rolled roofing flat roof",
+        "Restoration": "restoration restore recoat roof replacement leak repair",
+        "Maintenance": "maintenance preventive inspection repair leak upkeep",
+        "Flat Roof": "flat low slope roof membrane leak repair replacement",
+        "Roof Deck": "roof deck decking structural repair replacement",
+        "Green Roof": "green roof vegetated garden sustainable",
+        "Solar Panels": "solar panel panels photovoltaic energy installation",
+        "Sheet Metal": "sheet metal flashing coping custom fabrication gutters",
+        "Ventilation": "ventilation exhaust vent hvac curb",
+    },
+}
+
+# Words every BBB service string (and most descriptors) carry that say nothing about which service it is
+_STOPWORDS = frozenset({"a", "and", "for", "of", "the", "to", "in", "on", "with", "service", "servic",
+                        "specialist", "contractor", "company", "general", "provid", "inc", "llc", "roof"})
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word: str) -> str:
+    """Crude suffix stripping, enough to match "gutters", "guttering" and "gutter"."""
+    if len(word) > 3 and word.endswith("ies"):
+        word = word[:-3] + "y"
+    elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    for suffix in ("ing", "ed", "e"):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    stems = (_stem(word) for word in _WORD.findall(text.lower()))
+    return [stem for stem in stems if stem not in _STOPWORDS]
+
+
+class OptionIndex:
+    """TF-IDF vectors of one category's option descriptors, built once; rank() scores a profile against them."""
+
+    __slots__ = ("options", "idf", "vectors")
+
+    def __init__(self, descriptors: Dict[str, str], options: List[str]):
+        self.options = options
+        documents = {option: tokenize(f"{option} {descriptors[option]}") for option in options}
+        document_frequency: Dict[str, int] = {}
+        for tokens in documents.values():
+            for token in set(tokens):
+                document_frequency[token] = document_frequency.get(token, 0) + 1
+        count = len(options)
+        self.idf = {token: math.log((1 + count) / (1 + df)) + 1 for token, df in document_frequency.items()}
+        self.vectors = {option: self._vector(tokens) for option, tokens in documents.items()}
+
+    def _vector(self, tokens: List[str]) -> Dict[str, float]:
+        weights: Dict[str, float] = {}
+        for token in tokens:
+            if token in self.idf:
+                weights[token] = weights.get(token, 0.0) + self.idf[token]
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        return {token: weight / norm for token, weight in weights.items()} if norm else {}
+
+    def rank(self, text: str, preferred: List[str]) -> List[Tuple[str, float]]:
+        """
+        Every option with its cosine similarity to text, best first; equal scores keep the
+        order of preferred, then the order of the option list, so the result is deterministic.
+        """
+        query = self._vector(tokenize(text))
+        scores = {option: sum(weight * vector.get(token, 0.0) for token, weight in query.items())
+                  for option, vector in self.vectors.items()}
+        preference = {option: rank for rank, option in enumerate(preferred)}
+
+        def order(index_option):
+            index, option = index_option
+            return (-round(scores[option], 9), preference.get(option, len(preferred)), index)
+        return [(option, scores[option]) for _, option in sorted(enumerate(self.options), key=order)]
+
+
+_INDEXES = {category: OptionIndex(OPTION_DESCRIPTORS[category], ROOFING_SERVICE_OPTIONS[category])
+            for category in ("residential", "commercial")}
+
+
+def profile_text(bbb_data: Dict[str, Any]) -> str:
+    """The BBB service strings the selection is based on."""
+    parts = list(bbb_data.get("additional_services") or []) + list(bbb_data.get("services") or [])
+    return " ".join(part for part in parts if isinstance(part, str))
+
+
+def rank_options(bbb_data: Dict[str, Any], category: str) -> List[Tuple[str, float]]:
+    """Every option of a category with its similarity to the profile's services, best first."""
+    preferred = [service["name"] for service in DEFAULT_SERVICES[category]]
+    return _INDEXES[category].rank(profile_text(bbb_data), preferred)
+
+
+def select_locally(bbb_data: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """The four best-matching options per category; DEFAULT_SERVICES for a profile without services."""
+    return {
+        category: [{"id": slot + 1, "name": name} for slot, (name, _) in enumerate(rank_options(bbb_data, category)[:4])]
+        for category in ("residential", "commercial")
+    }
+
+
+def default_services() -> Dict[str, List[Dict[str, Any]]]:
+    """A copy of DEFAULT_SERVICES that callers may modify."""
+    return copy.deepcopy(DEFAULT_SERVICES)
+
+
+def load_bbb_profile(path: str = BBB_PROFILE_PATH) -> Dict[str, Any]:
+    """The BBB profile written by step 1, or {} when it is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f) or {}
+    except (OSError, ValueError):
+        return {}
+
+
+def rerank_requested() -> bool:
+    return os.getenv("SERVICE_SELECTION_RERANK", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def input_hash(bbb_data: Dict[str, Any], method: str) -> str:
+    """Hash of every input the selection depends on."""
+    material = {
+        "version": SELECTION_VERSION,
+        "method": method,
+        "business_name": bbb_data.get("business_name", "Roofing Company"),
+        "additional_services": bbb_data.get("additional_services") or [],
+        "services": bbb_data.get("services") or [],
+        "options": ROOFING_SERVICE_OPTIONS,
+        "descriptors": OPTION_DESCRIPTORS,
+    }
+    if method == "local+llm":
+        material["template"] = PROMPTS.get(SELECTION_TEMPLATE).id
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_selection(bbb_data: Optional[Dict[str, Any]] = None, path: str = SELECTION_PATH,
+                   method: Optional[str] = None) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """
+    The stored selection, or None when there is none, it is from another
+    SELECTION_VERSION or (when given) another method, or (when bbb_data is given)
+    it was made for other inputs.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            artifact = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(artifact, dict) or artifact.get("version") != SELECTION_VERSION:
+        return None
+    if method is not None and artifact.get("method") != method:
+        return None
+    if bbb_data is not None and artifact.get("input_hash") != input_hash(bbb_data, artifact.get("method", "")):
+        return None
+    return validate_selection(artifact.get("services"))
+
+
+def save_selection(bbb_data: Dict[str, Any], services: Dict[str, List[Dict[str, Any]]], method: str,
+                   path: str = SELECTION_PATH):
+    artifact = {
+        "version": SELECTION_VERSION,
+        "input_hash": input_hash(bbb_data, method),
+        "method": method,
+        "business_name": bbb_data.get("business_name", "Roofing Company"),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "services": services,
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Written to a temporary file first so a concurrent reader never sees half an artifact
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(artifact, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def validate_selection(services: Any, fallback: Optional[Dict[str, List[Dict[str, Any]]]] = None
+                       ) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """
+    Four residential and four commercial {"id", "name"} entries, with any name not in
+    ROOFING_SERVICE_OPTIONS (or repeated) replaced by the first service of fallback
+    (default DEFAULT_SERVICES) that the selection does not already hold; None if the
+    structure is wrong.
+    """
+    fallback = fallback or DEFAULT_SERVICES
+    if not isinstance(services, dict):
+        return None
+    validated = {}
+    for category in ("residential", "commercial"):
+        entries = services.get(category)
+        if not isinstance(entries, list) or len(entries) != 4:
+            return None
+        if not all(isinstance(entry, dict) for entry in entries):
+            return None
+        names = [entry.get("name") for entry in entries]
+        # Valid names are kept first, so a replacement can never duplicate a later entry
+        kept = []
+        for name in names:
+            valid = name in ROOFING_SERVICE_OPTIONS[category] and name not in kept
+            kept.append(name if valid else None)
+        spare = (service["name"] for service in fallback[category] if service["name"] not in kept)
+        validated[category] = []
+        for slot, name in enumerate(kept):
+            if name is None:
+                name = next(spare)
+                problem = "repeated" if names[slot] in kept else "not a valid choice"
+                print(f"Warning: {category} '{names[slot]}' is {problem}. Replacing with {name}.")
+            validated[category].append({"id": slot + 1, "name": name})
+    return validated
+
+
+def rerank_with_llm(bbb_data: Dict[str, Any], local: Dict[str, List[Dict[str, Any]]]
+                    ) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+    """Ask DeepSeek to pick from the local shortlist; None if the call or its reply fails."""
+    business_name = bbb_data.get("business_name", "Roofing Company")
+    additional_services = bbb_data.get("additional_services") or []
+    service_hints = ", ".join(additional_services) if additional_services else "Roofing Services, Construction Services"
+    print(f"Re-ranking services for {business_name} based on: {service_hints}")
+
+    shortlist = {category: [name for name, _ in rank_options(bbb_data, category)[:RERANK_CANDIDATES]]
+                 for category in ("residential", "commercial")}
+    prompt = render(SELECTION_TEMPLATE, business_name=business_name, service_hints=service_hints,
+                    residential_options=json.dumps(shortlist["residential"]),
+                    commercial_options=json.dumps(shortlist["commercial"]))
+    try:
+        print("Calling DeepSeek API to re-rank the local service shortlist...")
+        response = get_client().chat(prompt, max_tokens=SELECTION_MAX_TOKENS, call_site="service_selection",
+                                     validate=parses_as_json)
+    except LLMError as e:
+        print(f"Error selecting services: {e}")
+        return None
+
+    # Tolerates a ```json fence or stray text around the object
+    try:
+        services = json.loads(response[response.find("{"):response.rfind("}") + 1])
+    except ValueError as e:
+        print(f"Failed to parse JSON from DeepSeek API response: {e}")
+        return None
+    services = validate_selection(services, fallback=local)
+    if services is None:
+        print("Generated services have incorrect structure.")
+    return services
+
+
+def select_services(bbb_data: Optional[Dict[str, Any]] = None, refresh: bool = False,
+                    rerank: Optional[bool] = None, path: str = SELECTION_PATH) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    The services for a BBB profile (default: the step 1 profile): the stored selection
+    when it was made for the same inputs, otherwise a new local one (re-ranked by
+    DeepSeek when rerank, default SERVICE_SELECTION_RERANK), which is stored.
+    """
+    if bbb_data is None:
+        bbb_data = load_bbb_profile()
+    if not bbb_data:
+        print("No BBB profile data. Using default services.")
+        return default_services()
+
+    rerank = rerank_requested() if rerank is None else rerank
+    method = "local+llm" if rerank else "local"
+    if not refresh:
+        stored = load_selection(bbb_data, path, method)
+        if stored is not None:
+            print(f"Using stored service selection from {path}")
+            return stored
+
+    if not bbb_data.get("additional_services"):
+        print("No additional services found in BBB data. Using default services.")
+    services = select_locally(bbb_data)
+
+    if rerank:
+        reranked = rerank_with_llm(bbb_data, services) if get_client().api_key else None
+        if reranked is None:
+            # Not stored: the next run should get the re-ranking it asked for
+            print("DeepSeek re-ranking unavailable. Using the local selection.")
+            return services
+        services = reranked
+
+    save_selection(bbb_data, services, method, path)
+    print("Successfully selected services:")
+    for category, service_list in services.items():
+        print(f"\n{category.upper()} SERVICES:")
+        for service in service_list:
+            print(f"  - {service['name']}")
+    return services
+
+
+def select_batch(profiles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Local selections for many profiles (e.g. leads), without I/O or network calls."""
+    return [{"business_name": profile.get("business_name", ""), "services": select_locally(profile)}
+            for profile in profiles if isinstance(profile, dict)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Select the business's services once for every step")
+    parser.add_argument("--profile", default=BBB_PROFILE_PATH, help="BBB profile JSON")
+    parser.add_argument("--refresh", action="store_true", help="Ignore the stored selection")
+    parser.add_argument("--rerank", action="store_true", help="Let DeepSeek re-rank the local shortlist")
+    parser.add_argument("--batch", help="JSON list of BBB profiles to select services for locally")
+    parser.add_argument("--output", help="Write the --batch selections to this JSON file")
+    args = parser.parse_args()
+
+    if args.batch:
+        with open(args.batch, "r", encoding="utf-8") as f:
+            profiles = json.load(f)
+        if isinstance(profiles, dict):
+            profiles = [profiles]
+        start = time.perf_counter()
+        selections = select_batch(profiles)
+        elapsed = time.perf_counter() - start
+        print(f"Selected services for {len(selections)} profiles in {elapsed * 1000:.1f} ms")
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(selections, f, indent=2)
+            print(f"Saved selections to {args.output}")
+        else:
+            print(json.dumps(selections, indent=2))
+        return
+
+    services = select_services(load_bbb_profile(args.profile), refresh=args.refresh, rerank=args.rerank or None)
+    print(json.dumps(services, indent=2))
+
+
+if __name__ == "__main__":
+    main()
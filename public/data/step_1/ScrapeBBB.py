@@ -13,6 +13,11 @@ from chromedriver_py import binary_path  # this will get you the path to the bin
 from bs4 import BeautifulSoup
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+import sys
+
+# Shared pipeline modules live in public/data
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from logo_stage import LogoStage
 
 # Create raw_data/step_1 directory if it doesn't exist
 RAW_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "raw_data", "step_1")
@@ -203,17 +208,27 @@ def scrape_bbb_profile(url, headless=True):
            bbb_data["logo_url"] = logo_url
            logging.info(f"Logo URL: {logo_url}")
           
-           # Download the logo image to raw_data/step_1 directory
+           # Download the logo once, save it as logo.png (raw_data/step_1 and raw_data) and
+           # derive the normalized PNG, the clipped variants and favicons from the same buffer
            logo_filename = os.path.join(RAW_DATA_DIR, "logo.png")
-           success = download_image(logo_url, logo_filename)
+           try:
+               with LogoStage() as stage:
+                   report = stage.process(logo_url)
+               success = True
+               logging.info(f"Logo stage wrote {len(report['bytes'])} files "
+                            f"({'cached' if report['cached'] else report['format']})")
+           except Exception as e:
+               # Formats the stage cannot decode (e.g. SVG) are still saved as downloaded
+               logging.warning(f"Logo stage failed ({e}); saving the raw download instead")
+               success = download_image(logo_url, logo_filename)
+               if success:
+                   # Copy to raw_data root for backward compatibility
+                   raw_data_root = os.path.dirname(RAW_DATA_DIR)
+                   shutil.copy2(logo_filename, os.path.join(raw_data_root, "logo.png"))
+                   logging.info(f"Logo copied to {raw_data_root}/logo.png for compatibility")
            if success:
                bbb_data["logo_filename"] = "logo.png"
                logging.info(f"Logo downloaded to {logo_filename}")
-               
-               # Copy to raw_data root for backward compatibility
-               raw_data_root = os.path.dirname(RAW_DATA_DIR)
-               shutil.copy2(logo_filename, os.path.join(raw_data_root, "logo.png"))
-               logging.info(f"Logo copied to {raw_data_root}/logo.png for compatibility")
            else:
                bbb_data["logo_filename"] = "N/A"
                logging.error("Failed to download logo")
@@ -1,67 +1,264 @@
+import argparse
 import json
 import os
-from textblob import TextBlob
+from itertools import islice
+from sentiment_engine import SentimentEngine
+from review_aggregates import ReviewAggregator
 
-def analyze_reviews(input_file=None, output_file=None):
-    """
-    Reads reviews from input_file, performs sentiment analysis, 
-    and saves results to output_file in JSON format.
-    """
-    # Set up paths if not provided
-    if input_file is None:
-        # Get the path to raw_data/step_1/reviews.json
-        input_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
-                                 "raw_data", "step_1", "reviews.json")
-    
-    if output_file is None:
-        # Get the path to raw_data/step_2/sentiment_reviews.json
-        output_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
-                                  "raw_data", "step_2", "sentiment_reviews.json")
-    
-    # Ensure the output directory exists
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    
-    # Load reviews from JSON
-    with open(input_file, 'r', encoding='utf-8') as f:
-        reviews = json.load(f)
-    
-    sentiments = []
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# raw_data/step_1/reviews.json
+DEFAULT_INPUT = os.path.join(DATA_DIR, "raw_data", "step_1", "reviews.json")
+# raw_data/step_2/sentiment_reviews.json
+DEFAULT_OUTPUT = os.path.join(DATA_DIR, "raw_data", "step_2", "sentiment_reviews.json")
+# Aggregates are written next to the output file unless a path is given
+AGGREGATES_FILENAME = "review_aggregates.json"
+
+# Reviews analyzed (and held in memory) at a time in streaming mode
+STREAM_CHUNK_SIZE = 1000
+_READ_SIZE = 64 * 1024
+
+def _valid_reviews(reviews):
+    """Yield only reviews whose review_text is a string."""
     for review in reviews:
         # Extract the review text from the dictionary
         review_text = review.get('review_text', '')
-        
+
         # Ensure that review_text is a string
         if not isinstance(review_text, str):
             print(f"Skipping non-string review: {review}")
             continue
-        
-        # Perform sentiment analysis
-        blob = TextBlob(review_text)
-        polarity = blob.sentiment.polarity  # -1.0 (negative) to +1.0 (positive)
-        
-        # Determine sentiment label based on polarity
-        if polarity > 0:
-            sentiment_label = 'positive'
-        elif polarity < 0:
-            sentiment_label = 'negative'
-        else:
-            sentiment_label = 'neutral'
-        
-        # Append the results to the sentiments list
-        sentiments.append({
+
+        yield review
+
+def _analyze_chunk(reviews, engine):
+    """Score a list of valid reviews in one batch and build the output records."""
+    # Perform sentiment analysis (-1.0 negative to +1.0 positive)
+    results = engine.analyze_batch([review.get('review_text', '') for review in reviews])
+
+    return [
+        {
             'name': review.get('name', 'N/A'),
             'rating': review.get('rating', 'N/A'),
             'date': review.get('date', 'N/A'),
-            'review_text': review_text,
-            'sentiment': sentiment_label,
-            'polarity': polarity
-        })
-    
+            'review_text': review.get('review_text', ''),
+            'sentiment': result['sentiment'],
+            'polarity': result['polarity']
+        }
+        for review, result in zip(reviews, results)
+    ]
+
+def _save_aggregates(aggregator, aggregates_file):
+    """Write the review aggregates artifact used by later steps."""
+    os.makedirs(os.path.dirname(aggregates_file), exist_ok=True)
+    with open(aggregates_file, 'w', encoding='utf-8') as f:
+        json.dump(aggregator.to_dict(), f, ensure_ascii=False, indent=2)
+    print(f"Review aggregates saved in {aggregates_file}.")
+
+def analyze_reviews(input_file=None, output_file=None, engine=None, aggregates_file=None):
+    """
+    Reads reviews from input_file, performs sentiment analysis,
+    and saves results to output_file in JSON format.
+
+    Polarity is computed in one batch through SentimentEngine, so reviews
+    analyzed on a previous run are served from the on-disk cache. Rating,
+    sentiment and recency aggregates plus the top reviews are written to
+    aggregates_file (review_aggregates.json next to output_file by default).
+    """
+    # Set up paths if not provided
+    input_file = input_file or DEFAULT_INPUT
+    output_file = output_file or DEFAULT_OUTPUT
+    aggregates_file = aggregates_file or os.path.join(os.path.dirname(output_file), AGGREGATES_FILENAME)
+
+    # Ensure the output directory exists
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    # Load reviews from JSON
+    with open(input_file, 'r', encoding='utf-8') as f:
+        reviews = json.load(f)
+
+    owns_engine = engine is None
+    if owns_engine:
+        engine = SentimentEngine()
+    try:
+        sentiments = _analyze_chunk(list(_valid_reviews(reviews)), engine)
+    finally:
+        if owns_engine:
+            engine.close()
+
+    print(f"Analyzed {len(sentiments)} reviews ({engine.hits} cached, {engine.misses} newly scored).")
+
     # Save sentiment results to JSON
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(sentiments, f, ensure_ascii=False, indent=4)
-    
+
+    print(f"Sentiment analysis complete. Results saved in {output_file}.")
+
+    aggregator = ReviewAggregator()
+    for record in sentiments:
+        aggregator.add(record)
+    _save_aggregates(aggregator, aggregates_file)
+
+def _iter_json_array(f):
+    """Incrementally decode the objects of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buffer = f.read(_READ_SIZE).lstrip()
+    eof = False
+
+    if not buffer.startswith('['):
+        raise ValueError("Expected a JSON array of reviews")
+    pos = 1
+
+    while True:
+        # Skip whitespace and separators, refilling the buffer as needed
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                raise ValueError("Unterminated JSON array of reviews")
+            more = f.read(_READ_SIZE)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        if buffer[pos] == ']':
+            return
+
+        try:
+            review, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The next object spans the buffer boundary; read more and retry
+            more = f.read(_READ_SIZE)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+
+        yield review
+        pos = end
+
+        # Drop consumed text so memory stays bounded by the largest review
+        if pos >= _READ_SIZE:
+            buffer, pos = buffer[pos:], 0
+
+def iter_reviews(input_file):
+    """
+    Stream reviews from a JSON array file or a JSONL file (one review per line).
+    The format is detected from the first non-whitespace character.
+    """
+    with open(input_file, 'r', encoding='utf-8') as f:
+        first = ''
+        while True:
+            char = f.read(1)
+            if not char or not char.isspace():
+                first = char
+                break
+        f.seek(0)
+
+        if first == '[':
+            yield from _iter_json_array(f)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+class _JsonArrayWriter:
+    """Appends records to a JSON array, producing the same layout as json.dump(..., indent=4)."""
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def write(self, record):
+        item = json.dumps(record, ensure_ascii=False, indent=4).replace('\n', '\n    ')
+        self.f.write(('[\n    ' if self.count == 0 else ',\n    ') + item)
+        self.count += 1
+
+    def close(self):
+        self.f.write('\n]' if self.count else '[]')
+
+class _JsonlWriter:
+    """Appends one record per line."""
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def write(self, record):
+        self.f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.count += 1
+
+    def close(self):
+        pass
+
+def analyze_reviews_stream(input_file=None, output_file=None, output_format=None,
+                           chunk_size=STREAM_CHUNK_SIZE, engine=None, aggregates_file=None):
+    """
+    Streaming variant of analyze_reviews for large, multi-business corpora.
+
+    Reads reviews from a JSON array or JSONL file, analyzes them chunk_size at a time
+    and appends results to output_file as it goes, so memory stays bounded regardless
+    of corpus size. Aggregates are accumulated on the fly and written to
+    aggregates_file at the end. output_format is 'json' (a JSON array readable by
+    json.load, the default) or 'jsonl'; when omitted it is inferred from the output
+    file extension.
+
+    Returns the number of reviews written.
+    """
+    input_file = input_file or DEFAULT_INPUT
+    output_file = output_file or DEFAULT_OUTPUT
+    aggregates_file = aggregates_file or os.path.join(os.path.dirname(output_file), AGGREGATES_FILENAME)
+    if output_format is None:
+        output_format = 'jsonl' if output_file.endswith('.jsonl') else 'json'
+    if output_format not in ('json', 'jsonl'):
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    owns_engine = engine is None
+    if owns_engine:
+        engine = SentimentEngine()
+
+    reviews = _valid_reviews(iter_reviews(input_file))
+    aggregator = ReviewAggregator()
+    try:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            writer = _JsonlWriter(f) if output_format == 'jsonl' else _JsonArrayWriter(f)
+            while True:
+                chunk = list(islice(reviews, chunk_size))
+                if not chunk:
+                    break
+                for record in _analyze_chunk(chunk, engine):
+                    writer.write(record)
+                    aggregator.add(record)
+            writer.close()
+    finally:
+        if owns_engine:
+            engine.close()
+
+    print(f"Analyzed {writer.count} reviews ({engine.hits} cached, {engine.misses} newly scored).")
     print(f"Sentiment analysis complete. Results saved in {output_file}.")
+    _save_aggregates(aggregator, aggregates_file)
+    return writer.count
+
+def main():
+    parser = argparse.ArgumentParser(description="Run sentiment analysis over scraped reviews.")
+    parser.add_argument("--input", help="Reviews file (JSON array, or JSONL with --stream)")
+    parser.add_argument("--output", help="Where to write the analyzed reviews")
+    parser.add_argument("--aggregates", help="Where to write the review aggregates artifact")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream the input in chunks instead of loading it all at once")
+    parser.add_argument("--format", choices=["json", "jsonl"],
+                        help="Output format in streaming mode (default: from the output extension)")
+    parser.add_argument("--chunk-size", type=int, default=STREAM_CHUNK_SIZE,
+                        help="Reviews analyzed per chunk in streaming mode")
+    args = parser.parse_args()
+
+    if args.stream:
+        analyze_reviews_stream(args.input, args.output, args.format, args.chunk_size,
+                               aggregates_file=args.aggregates)
+    else:
+        analyze_reviews(args.input, args.output, aggregates_file=args.aggregates)
 
 if __name__ == "__main__":
-    analyze_reviews()
+    main()
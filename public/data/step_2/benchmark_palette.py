@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark palette_engine against ColorThief on the repo's logo files.
+
+Usage:
+    python benchmark_palette.py                 # all known logos in the repo
+    python benchmark_palette.py path/to/a.png   # specific files
+    python benchmark_palette.py --repeat 5
+"""
+
+import argparse
+import os
+import time
+
+from colorthief import ColorThief
+from PIL import UnidentifiedImageError
+
+from palette_engine import extract_palette
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.dirname(SCRIPT_DIR)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(DATA_DIR))
+NUM_COLORS = 8
+
+DEFAULT_LOGOS = [
+    os.path.join(DATA_DIR, "raw_data", "step_1", "logo.png"),
+    os.path.join(DATA_DIR, "raw_data", "logo.png"),
+    os.path.join(PROJECT_ROOT, "public", "assets", "images", "logo.png"),
+    os.path.join(PROJECT_ROOT, "public", "assets", "images", "logo.jpeg"),
+    os.path.join(PROJECT_ROOT, "public", "personal", "old", "img", "nav", "logo.png"),
+    os.path.join(PROJECT_ROOT, "public", "personal", "old", "img", "nav", "logo_white.png"),
+]
+
+
+def rgb_to_hex(rgb):
+    return "#{:02x}{:02x}{:02x}".format(*rgb)
+
+
+def best_time(fn, repeat):
+    """Return (fastest wall time in ms, result of the last call)."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def colorthief_extract(path):
+    """What color_extractor.main used to do: two full decodes at quality=1."""
+    thief = ColorThief(path)
+    dominant = thief.get_color(quality=1)
+    palette = thief.get_palette(color_count=NUM_COLORS, quality=1)
+    return dominant, palette
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare palette_engine with ColorThief.")
+    parser.add_argument("logos", nargs="*", help="Logo files to benchmark (default: repo logos)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per logo; the fastest is reported")
+    args = parser.parse_args()
+
+    logos = [path for path in (args.logos or DEFAULT_LOGOS) if os.path.exists(path)]
+    if not logos:
+        print("No logo files found.")
+        return
+
+    print(f"{'logo':<55} {'colorthief ms':>14} {'engine ms':>10} {'speedup':>8}")
+    for path in logos:
+        name = os.path.relpath(path, PROJECT_ROOT)
+        try:
+            thief_ms, (thief_dominant, thief_palette) = best_time(lambda: colorthief_extract(path), args.repeat)
+            engine_ms, (dominant, palette) = best_time(lambda: extract_palette(path, NUM_COLORS), args.repeat)
+        except (UnidentifiedImageError, OSError) as e:
+            print(f"{name:<55} skipped: {e}")
+            continue
+
+        print(f"{name:<55} {thief_ms:>14.1f} {engine_ms:>10.1f} {thief_ms / engine_ms:>7.1f}x")
+        print(f"    colorthief: {rgb_to_hex(thief_dominant)} | {' '.join(rgb_to_hex(c) for c in thief_palette)}")
+        print(f"    engine:     {rgb_to_hex(dominant)} | {' '.join(rgb_to_hex(c) for c in palette)}")
+
+
+if __name__ == "__main__":
+    main()
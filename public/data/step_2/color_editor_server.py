@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+"""
+Color scheme editor server.
+
+A threaded HTTP server that lets several designers edit several businesses'
+color schemes at once. Nothing is served from the working directory and the
+process never chdirs: the editor page is rendered in memory for each business,
+and schemes are read and written through a small JSON API.
+
+    GET  /                          editor for the first business (or ?business=<id>)
+    GET  /api/schemes               [{"business_id", "dirty"}, ...]
+    GET  /api/schemes/<id>          {"business_id", "colors", "saved", "dirty", "contrast"}
+    PUT  /api/schemes/<id>/preview  body {"accent": "#rrggbb", ...}; updates the in-memory draft only
+    POST /api/schemes/<id>          body optional colors; writes the draft to colors_output.json
+
+Preview updates only touch memory. colors_output.json is rewritten (atomically)
+when a designer clicks Save.
+
+Usage:
+    python color_editor_server.py                                   # raw_data/colors_output.json
+    python color_editor_server.py --schemes ../raw_data/color_schemes --host 0.0.0.0
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import urllib.parse
+import webbrowser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scheme_solver import SCHEME_ROLES, scheme_contrast
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RAW_DATA_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'raw_data')
+DEFAULT_PORT = 8000
+DEFAULT_BUSINESS_ID = "default"
+SCHEME_FILENAME = "colors_output.json"
+
+# Largest request body accepted by the API
+MAX_BODY_BYTES = 16 * 1024
+
+_HEX_COLOR = re.compile(r'^#?([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$')
+_BUSINESS_ID = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+ROLE_DESCRIPTIONS = {
+    "accent": ("Accent Color", "Buttons, links, and primary interactive elements"),
+    "banner": ("Banner Color", "Headers, navigation bars, and prominent UI elements"),
+    "faint-color": ("Faint Color", "Backgrounds, subtle highlights, and secondary elements"),
+    "second-accent": ("Second Accent Color", "Call-to-actions, highlights, and accent elements"),
+}
+
+
+def normalize_hex(value):
+    """Return value as lowercase #rrggbb, or raise ValueError."""
+    match = _HEX_COLOR.match(str(value).strip())
+    if not match:
+        raise ValueError(f"Invalid color: {value!r}")
+    digits = match.group(1).lower()
+    if len(digits) == 3:
+        digits = ''.join(c * 2 for c in digits)
+    return '#' + digits
+
+
+def validate_colors(colors, partial=False):
+    """Validate a {role: hex} mapping; unknown roles are rejected. Returns normalized colors."""
+    if not isinstance(colors, dict):
+        raise ValueError("Expected a JSON object of colors")
+    unknown = set(colors) - set(SCHEME_ROLES)
+    if unknown:
+        raise ValueError(f"Unknown roles: {', '.join(sorted(unknown))}")
+    if not partial:
+        missing = set(SCHEME_ROLES) - set(colors)
+        if missing:
+            raise ValueError(f"Missing roles: {', '.join(sorted(missing))}")
+    return {role: normalize_hex(value) for role, value in colors.items()}
+
+
+def _hex_to_rgb(hex_str):
+    return tuple(int(hex_str[i:i + 2], 16) for i in (1, 3, 5))
+
+
+class SchemeStore:
+    """
+    Thread-safe saved schemes plus per-business in-memory drafts.
+
+    Each business maps to a colors_output.json path, and optionally to extra
+    paths the saved scheme is copied to (the single-business pipeline keeps a
+    copy next to color_extractor.py).
+    """
+
+    def __init__(self, paths, mirrors=None):
+        self.paths = dict(paths)
+        self.mirrors = {business_id: list(copies) for business_id, copies in (mirrors or {}).items()}
+        self._lock = threading.Lock()
+        self._saved = {}
+        self._drafts = {}
+        self._write_locks = {business_id: threading.Lock() for business_id in self.paths}
+
+    @classmethod
+    def from_directory(cls, schemes_dir):
+        """Store over <schemes_dir>/<business_id>/colors_output.json, as written by batch extraction."""
+        paths = {}
+        for entry in sorted(os.listdir(schemes_dir)):
+            path = os.path.join(schemes_dir, entry, SCHEME_FILENAME)
+            if _BUSINESS_ID.match(entry) and os.path.isfile(path):
+                paths[entry] = path
+        return cls(paths)
+
+    def business_ids(self):
+        return list(self.paths)
+
+    def _load_saved(self, business_id):
+        """Saved scheme for a business, read from disk once. Call with self._lock held."""
+        if business_id not in self._saved:
+            with open(self.paths[business_id], 'r', encoding='utf-8') as f:
+                self._saved[business_id] = json.load(f)
+        return self._saved[business_id]
+
+    def get(self, business_id):
+        """Return {'business_id', 'colors', 'saved', 'dirty', 'contrast'} for a business."""
+        if business_id not in self.paths:
+            raise KeyError(business_id)
+        with self._lock:
+            saved = dict(self._load_saved(business_id))
+            draft = self._drafts.get(business_id)
+        colors = dict(draft if draft is not None else saved)
+        return {
+            "business_id": business_id,
+            "colors": colors,
+            "saved": saved,
+            "dirty": draft is not None and draft != saved,
+            "contrast": self.contrast(colors)
+        }
+
+    def preview(self, business_id, colors):
+        """Merge colors into the business's draft without touching disk."""
+        if business_id not in self.paths:
+            raise KeyError(business_id)
+        colors = validate_colors(colors, partial=True)
+        with self._lock:
+            base = self._drafts.get(business_id) or self._load_saved(business_id)
+            self._drafts[business_id] = {**base, **colors}
+        return self.get(business_id)
+
+    def save(self, business_id, colors=None):
+        """Write the draft (updated with colors, if given) to the business's colors_output.json."""
+        if colors:
+            self.preview(business_id, colors)
+        with self._write_locks[business_id]:
+            with self._lock:
+                scheme = dict(self._drafts.get(business_id) or self._load_saved(business_id))
+            path = self.paths[business_id]
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(scheme, f, indent=2)
+            os.replace(tmp_path, path)
+            for copy_path in self.mirrors.get(business_id, []):
+                shutil.copy2(path, copy_path)
+            with self._lock:
+                self._saved[business_id] = scheme
+                if self._drafts.get(business_id) == scheme:
+                    del self._drafts[business_id]
+        logger.info(f"Saved color scheme for {business_id} to {path}")
+        return self.get(business_id)
+
+    @staticmethod
+    def contrast(colors):
+        """WCAG contrast of each role against its text color (see scheme_solver.scheme_contrast)."""
+        rgb = {}
+        for role in SCHEME_ROLES:
+            try:
+                rgb[role] = _hex_to_rgb(normalize_hex(colors[role]))
+            except (KeyError, ValueError):
+                continue
+        return scheme_contrast(rgb)
+
+
+def render_editor(business_id, colors, business_ids=()):
+    """Editor page for one business, with live preview and save through the JSON API."""
+    items = []
+    for role in SCHEME_ROLES:
+        label, used_for = ROLE_DESCRIPTIONS[role]
+        items.append(f"""
+            <div class="color-item">
+                <div class="color-preview" id="{role}-preview" style="background-color: {colors[role]};"></div>
+                <label for="{role}">{label}:</label>
+                <input type="color" id="{role}" value="{colors[role]}" oninput="setColor('{role}', this.value)">
+                <input type="text" id="{role}-text" value="{colors[role]}" oninput="setColor('{role}', this.value)">
+                <p class="contrast" id="{role}-contrast"></p>
+                <p>Used for: {used_for}</p>
+            </div>""")
+
+    switcher = ""
+    if len(business_ids) > 1:
+        options = ''.join(
+            f'<option value="{bid}"{" selected" if bid == business_id else ""}>{bid}</option>'
+            for bid in business_ids
+        )
+        switcher = f"""
+    <p>Business: <select onchange="location.search = '?business=' + encodeURIComponent(this.value)">{options}</select></p>"""
+
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Color Scheme Editor - {business_id}</title>
+    <style>
+        body {{
+            font-family: Arial, sans-serif;
+            max-width: 800px;
+            margin: 0 auto;
+            padding: 20px;
+        }}
+        h1 {{
+            text-align: center;
+            color: #333;
+        }}
+        .color-container {{
+            display: flex;
+            flex-wrap: wrap;
+            gap: 20px;
+            margin-bottom: 30px;
+        }}
+        .color-item {{
+            flex: 1;
+            min-width: 200px;
+            border: 1px solid #ddd;
+            border-radius: 8px;
+            padding: 15px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        }}
+        .color-preview {{
+            height: 100px;
+            border-radius: 4px;
+            margin-bottom: 10px;
+        }}
+        label {{
+            display: block;
+            font-weight: bold;
+            margin-bottom: 5px;
+        }}
+        input[type="color"] {{
+            width: 100%;
+            height: 40px;
+            cursor: pointer;
+        }}
+        input[type="text"] {{
+            width: 100%;
+            padding: 8px;
+            box-sizing: border-box;
+            margin-top: 5px;
+        }}
+        .contrast {{ font-size: 14px; }}
+        .contrast.fail {{ color: #c62828; font-weight: bold; }}
+        #save {{
+            background-color: #4CAF50;
+            color: white;
+            border: none;
+            padding: 10px 20px;
+            display: block;
+            font-size: 16px;
+            margin: 20px auto 5px;
+            cursor: pointer;
+            border-radius: 4px;
+        }}
+        #save:hover {{
+            background-color: #45a049;
+        }}
+        #status {{ text-align: center; color: #555; }}
+        .color-sample {{
+            margin-top: 30px;
+            border: 1px solid #ddd;
+            padding: 20px;
+            border-radius: 8px;
+        }}
+        .sample-header {{
+            background-color: {colors["banner"]};
+            color: white;
+            padding: 10px 20px;
+            border-radius: 4px;
+        }}
+        .sample-button {{
+            background-color: {colors["accent"]};
+            color: white;
+            border: none;
+            padding: 8px 16px;
+            border-radius: 4px;
+            margin-top: 10px;
+        }}
+        .sample-content {{
+            background-color: {colors["faint-color"]};
+            padding: 15px;
+            border-radius: 4px;
+            margin: 15px 0;
+        }}
+        .sample-highlight {{
+            background-color: {colors["second-accent"]};
+            color: white;
+            padding: 5px 10px;
+            border-radius: 4px;
+            display: inline-block;
+            margin: 5px 0;
+        }}
+    </style>
+</head>
+<body>
+    <h1>Color Scheme Editor</h1>{switcher}
+    <p>Changes preview instantly. Click "Save Colors" to write them to the color scheme.</p>
+
+    <div class="color-container">{''.join(items)}
+    </div>
+
+    <h2>Color Sample Preview</h2>
+    <div class="color-sample">
+        <div class="sample-header">This is a banner using the Banner Color</div>
+        <div class="sample-content">
+            <p>This is content with a Faint Color background.</p>
+            <button class="sample-button">Accent Color Button</button>
+            <p>Here is some text with a <span class="sample-highlight">Second Accent highlight</span> to show contrast.</p>
+        </div>
+    </div>
+
+    <button id="save" onclick="saveColors()">Save Colors</button>
+    <p id="status"></p>
+
+    <script>
+        const BUSINESS_ID = {json.dumps(business_id)};
+        const API = '/api/schemes/' + encodeURIComponent(BUSINESS_ID);
+        const colors = {json.dumps(colors)};
+        let previewTimer = null;
+
+        function setColor(role, value) {{
+            if (!/^#([0-9A-F]{{3}}){{1,2}}$/i.test(value)) {{
+                return;
+            }}
+            if (value.length === 4) {{
+                value = '#' + value.slice(1).split('').map(c => c + c).join('');
+            }}
+            colors[role] = value.toLowerCase();
+            document.getElementById(role).value = colors[role];
+            if (document.activeElement.id !== role + '-text') {{
+                document.getElementById(role + '-text').value = colors[role];
+            }}
+            document.getElementById(role + '-preview').style.backgroundColor = colors[role];
+            updateSamplePreview();
+
+            // Keep the server-side draft in sync, at most a few times per second
+            clearTimeout(previewTimer);
+            previewTimer = setTimeout(() => send('PUT', API + '/preview'), 250);
+        }}
+
+        function updateSamplePreview() {{
+            document.querySelector('.sample-header').style.backgroundColor = colors['banner'];
+            document.querySelector('.sample-button').style.backgroundColor = colors['accent'];
+            document.querySelector('.sample-content').style.backgroundColor = colors['faint-color'];
+            document.querySelector('.sample-highlight').style.backgroundColor = colors['second-accent'];
+        }}
+
+        function showContrast(contrast) {{
+            for (const [role, info] of Object.entries(contrast)) {{
+                const el = document.getElementById(role + '-contrast');
+                el.textContent = 'Contrast with ' + info.text + ' text: ' + info.contrast + ':1' +
+                    (info.passes ? '' : ' (below WCAG AA)');
+                el.className = 'contrast' + (info.passes ? '' : ' fail');
+            }}
+        }}
+
+        async function send(method, url) {{
+            const response = await fetch(url, {{
+                method: method,
+                headers: {{'Content-Type': 'application/json'}},
+                body: JSON.stringify(colors)
+            }});
+            const data = await response.json();
+            if (!response.ok) {{
+                document.getElementById('status').textContent = 'Error: ' + data.error;
+                return null;
+            }}
+            showContrast(data.contrast);
+            document.getElementById('status').textContent = data.dirty ? 'Unsaved changes' : 'All changes saved';
+            return data;
+        }}
+
+        async function saveColors() {{
+            clearTimeout(previewTimer);
+            await send('POST', API);
+        }}
+
+        fetch(API).then(r => r.json()).then(data => showContrast(data.contrast));
+    </script>
+</body>
+</html>
+"""
+
+
+class ColorEditorHandler(BaseHTTPRequestHandler):
+    """Routes editor and API requests to the server's SchemeStore."""
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send(self, status, body, content_type='application/json'):
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload))
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        if not length:
+            return None
+        return json.loads(self.rfile.read(length))
+
+    def _route(self):
+        """Split the request path into (api parts or None, query params)."""
+        parsed = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(parsed.query)
+        parts = [urllib.parse.unquote(p) for p in parsed.path.strip('/').split('/') if p]
+        if parts[:2] == ['api', 'schemes']:
+            return parts[2:], query
+        return None, query
+
+    def do_GET(self):
+        store = self.server.store
+        api, query = self._route()
+        try:
+            if api is None:
+                if urllib.parse.urlparse(self.path).path not in ('/', '/index.html'):
+                    self._send_json(404, {"error": "Not found"})
+                    return
+                business_ids = store.business_ids()
+                business_id = query.get('business', business_ids[:1])[0]
+                scheme = store.get(business_id)
+                self._send(200, render_editor(business_id, scheme['colors'], business_ids), 'text/html')
+            elif not api:
+                self._send_json(200, [{"business_id": business_id, "dirty": store.get(business_id)['dirty']}
+                                      for business_id in store.business_ids()])
+            elif len(api) == 1:
+                self._send_json(200, store.get(api[0]))
+            else:
+                self._send_json(404, {"error": "Not found"})
+        except (KeyError, IndexError):
+            self._send_json(404, {"error": "Unknown business"})
+
+    def do_PUT(self):
+        api, _ = self._route()
+        if not api or len(api) != 2 or api[1] != 'preview':
+            self._send_json(404, {"error": "Not found"})
+            return
+        self._handle(lambda body: self.server.store.preview(api[0], body or {}))
+
+    def do_POST(self):
+        api, _ = self._route()
+        if not api or len(api) != 1:
+            self._send_json(404, {"error": "Not found"})
+            return
+        self._handle(lambda body: self.server.store.save(api[0], body))
+
+    def _handle(self, action):
+        try:
+            self._send_json(200, action(self._read_json()))
+        except KeyError:
+            self._send_json(404, {"error": "Unknown business"})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except OSError as e:
+            logger.error(f"Error saving color scheme: {e}")
+            self._send_json(500, {"error": f"Error saving colors: {e}"})
+
+
+class ColorEditorServer(ThreadingHTTPServer):
+    """One thread per request; the store is shared by every handler."""
+
+    daemon_threads = True
+    # socketserver's default backlog of 5 resets connections when several editors are busy
+    request_queue_size = 64
+
+    def __init__(self, store, host="", port=DEFAULT_PORT):
+        self.store = store
+        super().__init__((host, port), ColorEditorHandler)
+
+
+def serve_editor(store, host="", port=DEFAULT_PORT, open_browser=True):
+    """Serve the editor until interrupted."""
+    httpd = ColorEditorServer(store, host, port)
+    url = f"http://localhost:{httpd.server_address[1]}/"
+    logger.info(f"Starting color editor for {len(store.business_ids())} business(es) at {url}")
+
+    if open_browser:
+        webbrowser.open(url)
+
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Server stopped by user")
+    finally:
+        httpd.server_close()
+        logger.info("Server closed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the color scheme editor.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--scheme", default=os.path.join(RAW_DATA_DIR, SCHEME_FILENAME),
+                        help="A single colors_output.json to edit")
+    source.add_argument("--schemes", metavar="DIR",
+                        help="Directory of <business_id>/colors_output.json (batch extraction output)")
+    parser.add_argument("--host", default="", help="Interface to bind (default: all)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--no-browser", action="store_true", help="Do not open a browser window")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.schemes:
+        store = SchemeStore.from_directory(args.schemes)
+    else:
+        store = SchemeStore({DEFAULT_BUSINESS_ID: args.scheme})
+    if not store.business_ids():
+        print("No color schemes found.")
+        return
+    serve_editor(store, args.host, args.port, open_browser=not args.no_browser)
+
+
+if __name__ == "__main__":
+    main()
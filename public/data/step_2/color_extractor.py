@@ -3,21 +3,18 @@
 
 import os
 import json
-import colorsys
+import argparse
 import requests
 from PIL import Image
 from io import BytesIO
-from colorthief import ColorThief
+from palette_engine import extract_palette
+from palette_cache import PaletteCache, content_hash
+from scheme_solver import SCHEME_ROLES, solve_accessible_scheme
+from color_editor_server import DEFAULT_BUSINESS_ID, SchemeStore, render_editor, serve_editor
 import logging
 import shutil
 import sys
-import random
-import http.server
-import socketserver
-import webbrowser
-import threading
-import urllib.parse
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
 # Configure logging to both file and console
 logging.basicConfig(
@@ -39,6 +36,15 @@ COLORS_OUTPUT = os.path.abspath(os.path.join(RAW_DATA_DIR, 'colors_output.json')
 BBB_PROFILE = os.path.abspath(os.path.join(RAW_DATA_DIR, 'bbb_profile_data.json'))
 HTML_EDITOR = os.path.abspath(os.path.join(SCRIPT_DIR, 'color_editor.html'))
 NUM_COLORS = 8  # Increased to have more options to choose from
+LOGO_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif', '.bmp')
+
+# Professional scheme used when there is no logo or extraction fails
+DEFAULT_COLORS = {
+    "accent": "#2B4C7E",     # Professional blue
+    "banner": "#D32F2F",     # Red
+    "faint-color": "#E0F7FA", # Light blue
+    "second-accent": "#FFA000" # Amber
+}
 
 PORT = 8000  # Port for the web server
 
@@ -88,380 +94,175 @@ def hex_to_rgb(hex_str):
     b = int(hex_str[4:6], 16)
     return (r, g, b)
 
-def color_distance(color1, color2):
-    """Calculate Euclidean distance between two RGB colors"""
-    return sum((a - b) ** 2 for a, b in zip(color1, color2)) ** 0.5
-
-def generate_unique_colors(palette_rgb, num_colors=4):
-    """Generate completely unique colors from the palette or create new ones if needed"""
-    
-    # If we have enough colors in the palette, use them directly
-    if len(palette_rgb) >= num_colors:
-        # First, try to pick colors that are maximally different from each other
-        selected_colors = [palette_rgb[0]]  # Start with the first color
-        
-        for _ in range(num_colors - 1):
-            # For each remaining color in the palette, find the one that's most different from already selected colors
-            max_min_distance = -1
-            best_color = None
-            
-            for color in palette_rgb:
-                if color in selected_colors:
-                    continue
-                    
-                # Calculate minimum distance to any already selected color
-                min_distance = min(color_distance(color, selected) for selected in selected_colors)
-                
-                if min_distance > max_min_distance:
-                    max_min_distance = min_distance
-                    best_color = color
-            
-            if best_color:
-                selected_colors.append(best_color)
-        
-        return selected_colors
-    
-    # If we don't have enough colors in the palette, generate new ones
-    # Start with the available colors from the palette
-    unique_colors = list(palette_rgb)
-    
-    # Generate additional colors using color theory
-    while len(unique_colors) < num_colors:
-        # Create a new random color
-        new_r = random.randint(30, 225)
-        new_g = random.randint(30, 225)
-        new_b = random.randint(30, 225)
-        new_color = (new_r, new_g, new_b)
-        
-        # Check if it's different enough from existing colors
-        if all(color_distance(new_color, color) > 50 for color in unique_colors):
-            unique_colors.append(new_color)
-    
-    return unique_colors[:num_colors]
-
 def generate_color_scheme(palette_rgb):
-    """Generate a color scheme with truly unique colors"""
+    """
+    Generate a color scheme whose roles are readable with the site's text colors.
     
-    # Generate 4 unique colors
-    unique_colors = generate_unique_colors(palette_rgb, 4)
+    Roles are assigned by scheme_solver: the most distinct assignment that meets
+    WCAG AA for each role, darkening or lightening a color only when no palette
+    color passes.
+    """
+    colors, report = solve_accessible_scheme(palette_rgb)
+    for role, info in report.items():
+        note = " (lightness adjusted)" if info['adjusted'] else ""
+        logger.info(f"{role}: {rgb_to_hex(colors[role])} with {info['text']} text {info['contrast']}:1{note}")
     
     # Create a color scheme
-    color_scheme = {
-        "accent": rgb_to_hex(unique_colors[0]),
-        "banner": rgb_to_hex(unique_colors[1]),
-        "faint-color": rgb_to_hex(unique_colors[2]),
-        "second-accent": rgb_to_hex(unique_colors[3])
-    }
+    color_scheme = {role: rgb_to_hex(colors[role]) for role in SCHEME_ROLES}
     
     return color_scheme
 
-def generate_html_editor(colors):
-    """Generate an HTML page for viewing and editing colors"""
-    html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Color Scheme Editor</title>
-    <style>
-        body {{
-            font-family: Arial, sans-serif;
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 20px;
-        }}
-        h1 {{
-            text-align: center;
-            color: #333;
-        }}
-        .color-container {{
-            display: flex;
-            flex-wrap: wrap;
-            gap: 20px;
-            margin-bottom: 30px;
-        }}
-        .color-item {{
-            flex: 1;
-            min-width: 200px;
-            border: 1px solid #ddd;
-            border-radius: 8px;
-            padding: 15px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
-        .color-preview {{
-            height: 100px;
-            border-radius: 4px;
-            margin-bottom: 10px;
-        }}
-        label {{
-            display: block;
-            font-weight: bold;
-            margin-bottom: 5px;
-        }}
-        input[type="color"] {{
-            width: 100%;
-            height: 40px;
-            cursor: pointer;
-        }}
-        input[type="text"] {{
-            width: 100%;
-            padding: 8px;
-            box-sizing: border-box;
-            margin-top: 5px;
-        }}
-        button {{
-            background-color: #4CAF50;
-            color: white;
-            border: none;
-            padding: 10px 20px;
-            text-align: center;
-            text-decoration: none;
-            display: block;
-            font-size: 16px;
-            margin: 20px auto;
-            cursor: pointer;
-            border-radius: 4px;
-        }}
-        button:hover {{
-            background-color: #45a049;
-        }}
-        .color-sample {{
-            margin-top: 30px;
-            border: 1px solid #ddd;
-            padding: 20px;
-            border-radius: 8px;
-        }}
-        .sample-header {{
-            background-color: {colors["banner"]};
-            color: white;
-            padding: 10px 20px;
-            border-radius: 4px;
-        }}
-        .sample-button {{
-            background-color: {colors["accent"]};
-            color: white;
-            border: none;
-            padding: 8px 16px;
-            border-radius: 4px;
-            cursor: pointer;
-            margin-top: 10px;
-        }}
-        .sample-content {{
-            background-color: {colors["faint-color"]};
-            padding: 15px;
-            border-radius: 4px;
-            margin: 15px 0;
-        }}
-        .sample-highlight {{
-            background-color: {colors["second-accent"]};
-            padding: 5px 10px;
-            border-radius: 4px;
-            display: inline-block;
-            margin: 5px 0;
-        }}
-    </style>
-</head>
-<body>
-    <h1>Color Scheme Editor</h1>
-    <p>Adjust the colors below and click "Save Colors" to update your color scheme.</p>
+def extract_logo_colors(logo_path, cache=None):
+    """
+    Extract (dominant_rgb, palette_rgb, color_scheme) for a logo file.
     
-    <form action="/save_colors" method="get">
-        <div class="color-container">
-            <div class="color-item">
-                <div class="color-preview" id="accent-preview" style="background-color: {colors["accent"]};"></div>
-                <label for="accent">Accent Color:</label>
-                <input type="color" id="accent" name="accent" value="{colors["accent"]}" onchange="updatePreview('accent')">
-                <input type="text" id="accent-text" value="{colors["accent"]}" oninput="updateColor('accent')">
-                <p>Used for: Buttons, links, and primary interactive elements</p>
-            </div>
-            
-            <div class="color-item">
-                <div class="color-preview" id="banner-preview" style="background-color: {colors["banner"]};"></div>
-                <label for="banner">Banner Color:</label>
-                <input type="color" id="banner" name="banner" value="{colors["banner"]}" onchange="updatePreview('banner')">
-                <input type="text" id="banner-text" value="{colors["banner"]}" oninput="updateColor('banner')">
-                <p>Used for: Headers, navigation bars, and prominent UI elements</p>
-            </div>
-            
-            <div class="color-item">
-                <div class="color-preview" id="faint-color-preview" style="background-color: {colors["faint-color"]};"></div>
-                <label for="faint-color">Faint Color:</label>
-                <input type="color" id="faint-color" name="faint-color" value="{colors["faint-color"]}" onchange="updatePreview('faint-color')">
-                <input type="text" id="faint-color-text" value="{colors["faint-color"]}" oninput="updateColor('faint-color')">
-                <p>Used for: Backgrounds, subtle highlights, and secondary elements</p>
-            </div>
-            
-            <div class="color-item">
-                <div class="color-preview" id="second-accent-preview" style="background-color: {colors["second-accent"]};"></div>
-                <label for="second-accent">Second Accent Color:</label>
-                <input type="color" id="second-accent" name="second-accent" value="{colors["second-accent"]}" onchange="updatePreview('second-accent')">
-                <input type="text" id="second-accent-text" value="{colors["second-accent"]}" oninput="updateColor('second-accent')">
-                <p>Used for: Call-to-actions, highlights, and accent elements</p>
-            </div>
-        </div>
+    Results are cached by the hash of the logo's bytes, so repeat runs and leads
+    sharing the same logo skip decoding and quantization entirely.
+    """
+    # Read the logo once; the same bytes are hashed for the cache and decoded
+    with open(logo_path, 'rb') as f:
+        logo_bytes = f.read()
+    logger.info("Successfully opened logo file for reading")
+    logo_hash = content_hash(logo_bytes)
+    
+    owns_cache = cache is None
+    if owns_cache:
+        cache = PaletteCache()
+    try:
+        cached = cache.get(logo_hash, NUM_COLORS)
+        if cached:
+            logger.info(f"Using cached colors for logo {logo_hash[:12]}")
+            return cached['dominant'], cached['palette'], cached['scheme']
         
-        <h2>Color Sample Preview</h2>
-        <div class="color-sample">
-            <div class="sample-header">This is a banner using the Banner Color</div>
-            <div class="sample-content">
-                <p>This is content with a Faint Color background.</p>
-                <button class="sample-button">Accent Color Button</button>
-                <p>Here is some text with a <span class="sample-highlight">Second Accent highlight</span> to show contrast.</p>
-            </div>
-        </div>
+        # Verify the image can be opened with PIL
+        try:
+            img = Image.open(BytesIO(logo_bytes))
+            logger.info(f"Successfully opened logo with PIL - Format: {img.format}, Size: {img.size}, Mode: {img.mode}")
+        except Exception as e:
+            logger.error(f"Error opening logo with PIL: {e}")
+            raise
         
-        <button type="submit">Save Colors</button>
-    </form>
-
-    <script>
-        function updatePreview(colorType) {{
-            const colorInput = document.getElementById(colorType);
-            const preview = document.getElementById(colorType + '-preview');
-            const textInput = document.getElementById(colorType + '-text');
-            
-            preview.style.backgroundColor = colorInput.value;
-            textInput.value = colorInput.value;
-            updateSamplePreview();
-        }}
+        # Proceed with color extraction (decodes the already opened image once)
+        with img:
+            dominant_rgb, palette_rgb = extract_palette(img, color_count=NUM_COLORS)
+        logger.info(f"Successfully extracted dominant color")
+        logger.info(f"Successfully extracted color palette with {len(palette_rgb)} colors")
         
-        function updateColor(colorType) {{
-            const textInput = document.getElementById(colorType + '-text');
-            const colorInput = document.getElementById(colorType);
-            const preview = document.getElementById(colorType + '-preview');
-            
-            // Validate hex color
-            const isValidHex = /^#([0-9A-F]{{3}}){{1,2}}$/i.test(textInput.value);
-            
-            if (isValidHex) {{
-                colorInput.value = textInput.value;
-                preview.style.backgroundColor = textInput.value;
-                updateSamplePreview();
-            }}
-        }}
+        # Generate color scheme with truly unique colors
+        colors = generate_color_scheme(palette_rgb)
+        logger.info("Generated color scheme with unique colors")
         
-        function updateSamplePreview() {{
-            const accentColor = document.getElementById('accent').value;
-            const bannerColor = document.getElementById('banner').value;
-            const faintColor = document.getElementById('faint-color').value;
-            const secondAccentColor = document.getElementById('second-accent').value;
-            
-            document.querySelector('.sample-header').style.backgroundColor = bannerColor;
-            document.querySelector('.sample-button').style.backgroundColor = accentColor;
-            document.querySelector('.sample-content').style.backgroundColor = faintColor;
-            document.querySelector('.sample-highlight').style.backgroundColor = secondAccentColor;
-        }}
-    </script>
-</body>
-</html>
-"""
+        cache.put(logo_hash, NUM_COLORS, dominant_rgb, palette_rgb, colors)
+        return dominant_rgb, palette_rgb, colors
+    finally:
+        if owns_cache:
+            cache.close()
+
+def generate_html_editor(colors):
+    """Write a snapshot of the color editor page (served live by start_web_server)"""
+    html = render_editor(DEFAULT_BUSINESS_ID, colors)
     with open(HTML_EDITOR, 'w', encoding='utf-8') as f:
         f.write(html)
     
     return HTML_EDITOR
 
-class ColorEditorHandler(http.server.SimpleHTTPRequestHandler):
-    def do_GET(self):
-        # Handle color save request
-        if self.path.startswith('/save_colors'):
-            parsed_url = urllib.parse.urlparse(self.path)
-            query_params = urllib.parse.parse_qs(parsed_url.query)
-            
-            # Extract color values from query parameters
-            new_colors = {
-                "accent": query_params.get('accent', ['#2B4C7E'])[0],
-                "banner": query_params.get('banner', ['#D32F2F'])[0],
-                "faint-color": query_params.get('faint-color', ['#E0F7FA'])[0],
-                "second-accent": query_params.get('second-accent', ['#FFA000'])[0]
-            }
-            
-            # Save the new colors
-            try:
-                with open(COLORS_OUTPUT, 'w', encoding='utf-8') as f:
-                    json.dump(new_colors, f, indent=2)
-                logger.info(f"Updated color scheme saved to {COLORS_OUTPUT}")
-                
-                # Also copy to local directory
-                local_output = os.path.join(SCRIPT_DIR, 'colors_output.json')
-                shutil.copy2(COLORS_OUTPUT, local_output)
-                logger.info(f"Also copied updated color scheme to {local_output}")
-                
-                # Send response
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html')
-                self.end_headers()
-                
-                # Create a success page
-                success_page = f"""<!DOCTYPE html>
-<html>
-<head>
-    <title>Colors Saved</title>
-    <meta http-equiv="refresh" content="2;url=/" />
-    <style>
-        body {{ font-family: Arial, sans-serif; text-align: center; padding-top: 50px; }}
-        .success {{ color: green; }}
-    </style>
-</head>
-<body>
-    <h1 class="success">Colors Saved Successfully!</h1>
-    <p>Redirecting back to the editor...</p>
-    <div style="margin: 30px auto; display: flex; justify-content: center; gap: 10px;">
-        <div style="width: 50px; height: 50px; background-color: {new_colors['accent']}"></div>
-        <div style="width: 50px; height: 50px; background-color: {new_colors['banner']}"></div>
-        <div style="width: 50px; height: 50px; background-color: {new_colors['faint-color']}"></div>
-        <div style="width: 50px; height: 50px; background-color: {new_colors['second-accent']}"></div>
-    </div>
-</body>
-</html>
-"""
-                self.wfile.write(success_page.encode())
-                
-            except Exception as e:
-                logger.error(f"Error saving updated color scheme: {e}")
-                self.send_response(500)
-                self.send_header('Content-type', 'text/html')
-                self.end_headers()
-                self.wfile.write(f"Error saving colors: {str(e)}".encode())
-            
-            return
-            
-        # Serve the editor HTML if requesting root
-        if self.path == '/' or self.path == '/index.html':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html')
-            self.end_headers()
-            
-            with open(HTML_EDITOR, 'rb') as file:
-                self.wfile.write(file.read())
-            return
-            
-        # For any other path, use the default handler
-        return http.server.SimpleHTTPRequestHandler.do_GET(self)
-
-def start_web_server(html_path):
-    """Start a web server to host the color editor"""
-    # Change to the directory containing the HTML file
-    os.chdir(os.path.dirname(html_path))
+def start_web_server(store=None):
+    """
+    Serve the color editor for this business (or every business in store).
     
-    # Create the server
-    handler = ColorEditorHandler
-    httpd = socketserver.TCPServer(("", PORT), handler)
+    The server is threaded and renders the editor in memory, so it neither changes
+    the working directory nor rewrites colors_output.json until a scheme is saved.
+    """
+    if store is None:
+        local_output = os.path.join(SCRIPT_DIR, 'colors_output.json')
+        store = SchemeStore({DEFAULT_BUSINESS_ID: COLORS_OUTPUT}, mirrors={DEFAULT_BUSINESS_ID: [local_output]})
     
-    logger.info(f"Starting web server at port {PORT}")
     logger.info(f"Open your browser to http://localhost:{PORT}/")
+    serve_editor(store, port=PORT)
+
+def load_logo_manifest(source):
+    """
+    Resolve a batch source to {business_id: logo_path}.
     
-    # Open the browser automatically
-    webbrowser.open(f"http://localhost:{PORT}/")
+    source may be:
+    - a JSON manifest, either {"business_id": "path/to/logo.png", ...} or
+      [{"business_id": "...", "logo_path": "..."}, ...] (relative paths are
+      resolved against the manifest's directory)
+    - a directory of logo files (business id = file name without extension)
+    - a directory of per-business folders each containing a logo.* file
+    """
+    logos = {}
+    if os.path.isfile(source):
+        base_dir = os.path.dirname(os.path.abspath(source))
+        with open(source, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if isinstance(manifest, dict):
+            entries = manifest.items()
+        else:
+            entries = [(item.get('business_id') or item.get('id'), item.get('logo_path') or item.get('logo'))
+                       for item in manifest]
+        for business_id, logo_path in entries:
+            if business_id and logo_path:
+                logos[str(business_id)] = os.path.join(base_dir, logo_path)
+        return logos
     
-    # Start the server
+    for entry in sorted(os.listdir(source)):
+        entry_path = os.path.join(source, entry)
+        if os.path.isfile(entry_path) and entry.lower().endswith(LOGO_EXTENSIONS):
+            logos[os.path.splitext(entry)[0]] = entry_path
+        elif os.path.isdir(entry_path):
+            for name in sorted(os.listdir(entry_path)):
+                if name.lower().startswith('logo') and name.lower().endswith(LOGO_EXTENSIONS):
+                    logos[entry] = os.path.join(entry_path, name)
+                    break
+    return logos
+
+def _extract_for_business(job):
+    """Process pool worker: extract and write the scheme for one business."""
+    business_id, logo_path, output_dir = job
     try:
-        httpd.serve_forever()
-    except KeyboardInterrupt:
-        logger.info("Server stopped by user")
-    finally:
-        httpd.server_close()
-        logger.info("Server closed")
+        _, _, colors = extract_logo_colors(logo_path)
+        error = None
+    except Exception as e:
+        colors, error = dict(DEFAULT_COLORS), str(e)
+    
+    output_path = os.path.join(output_dir, business_id, 'colors_output.json')
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(colors, f, indent=2)
+    return business_id, colors, error
+
+def batch_extract(logos, output_dir, workers=None):
+    """
+    Extract color schemes for many businesses in parallel without any prompts.
+    
+    Args:
+        logos: {business_id: logo_path}
+        output_dir: Each scheme is written to output_dir/<business_id>/colors_output.json
+        workers: Process pool size (defaults to the CPU count)
+    
+    Returns:
+        {business_id: color_scheme}. Businesses whose logo could not be processed
+        get DEFAULT_COLORS and are logged as failures.
+    """
+    jobs = [(business_id, logo_path, output_dir) for business_id, logo_path in logos.items()]
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for business_id, colors, error in pool.map(_extract_for_business, jobs):
+            if error:
+                logger.error(f"Color extraction failed for {business_id}: {error}. Used default colors.")
+            results[business_id] = colors
+    logger.info(f"Extracted {len(results)} color schemes into {output_dir}")
+    return results
 
-def main():
+def main(launch_editor=None):
+    """
+    Extract the color scheme for the single business in raw_data.
+    
+    Args:
+        launch_editor: True/False to start (or skip) the color editor without asking.
+            When None, the user is asked only if stdin is an interactive terminal.
+    """
     logger.info("Starting color extraction process")
     logger.info(f"Looking for logo at {LOGO_PATH}")
     
@@ -500,53 +301,20 @@ def main():
     # Check if logo exists and use it for color extraction
     if not os.path.exists(LOGO_PATH):
         logger.warning(f"No logo found at {LOGO_PATH}. Using default professional color scheme...")
-        colors = {
-            "accent": "#2B4C7E",     # Professional blue
-            "banner": "#D32F2F",     # Red
-            "faint-color": "#E0F7FA", # Light blue
-            "second-accent": "#FFA000" # Amber
-        }
+        colors = dict(DEFAULT_COLORS)
     else:
         logger.info(f"Found logo at {LOGO_PATH}, extracting colors...")
         try:
-            # Verify logo file can be read
-            with open(LOGO_PATH, 'rb') as f:
-                logger.info("Successfully opened logo file for reading")
-            
-            # Verify the image can be opened with PIL
-            try:
-                img = Image.open(LOGO_PATH)
-                logger.info(f"Successfully opened logo with PIL - Format: {img.format}, Size: {img.size}, Mode: {img.mode}")
-                img.close()
-            except Exception as e:
-                logger.error(f"Error opening logo with PIL: {e}")
-                raise
-            
-            # Proceed with color extraction
-            thief = ColorThief(LOGO_PATH)
-            dominant_rgb = thief.get_color(quality=1)
-            logger.info(f"Successfully extracted dominant color")
-            
-            palette_rgb = thief.get_palette(color_count=NUM_COLORS, quality=1)
-            logger.info(f"Successfully extracted color palette with {len(palette_rgb)} colors")
+            dominant_rgb, palette_rgb, colors = extract_logo_colors(LOGO_PATH)
             
             # Log extracted colors
             logger.info(f"Dominant color: {rgb_to_hex(dominant_rgb)}")
             logger.info(f"Color palette: {[rgb_to_hex(color) for color in palette_rgb]}")
             
-            # Generate color scheme with truly unique colors
-            colors = generate_color_scheme(palette_rgb)
-            logger.info("Generated color scheme with unique colors")
-            
         except Exception as e:
             logger.error(f"Error during color extraction: {e}")
             # Fallback to default colors with unique values
-            colors = {
-                "accent": "#2B4C7E",     # Professional blue
-                "banner": "#D32F2F",     # Red
-                "faint-color": "#E0F7FA", # Light blue
-                "second-accent": "#FFA000" # Amber
-            }
+            colors = dict(DEFAULT_COLORS)
             logger.info("Using fallback colors due to error")
 
     # Save the color scheme to raw_data directory
@@ -570,19 +338,23 @@ def main():
     html_path = generate_html_editor(colors)
     logger.info(f"Generated HTML editor at {html_path}")
     
-    # Start web server in a separate thread
-    logger.info("Starting web server for color editor")
+    if launch_editor is None and not sys.stdin.isatty():
+        logger.info("Non-interactive run; skipping the color editor prompt")
+        launch_editor = False
     
     try:
-        # Ask user if they want to launch the color editor
-        print("\n========== COLOR EDITOR ==========")
-        print(f"Colors extracted and saved to {COLORS_OUTPUT}")
-        print("Would you like to open the color editor to adjust these colors? (y/n)")
-        user_input = input().strip().lower()
+        if launch_editor is None:
+            # Ask user if they want to launch the color editor
+            print("\n========== COLOR EDITOR ==========")
+            print(f"Colors extracted and saved to {COLORS_OUTPUT}")
+            print("Would you like to open the color editor to adjust these colors? (y/n)")
+            user_input = input().strip().lower()
+            launch_editor = user_input == 'y' or user_input == 'yes'
         
-        if user_input == 'y' or user_input == 'yes':
+        if launch_editor:
             # Start the web server
-            start_web_server(html_path)
+            logger.info("Starting web server for color editor")
+            start_web_server()
         else:
             print("Color editor not launched. You can run this script again if you want to edit colors later.")
     except KeyboardInterrupt:
@@ -592,5 +364,27 @@ def main():
         print(f"Error starting color editor: {e}")
         print("Colors have been extracted and saved, but the editor could not be launched.")
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Extract a website color scheme from business logos.")
+    parser.add_argument("--batch", metavar="PATH",
+                        help="Directory of logos or JSON manifest of {business_id: logo_path}; "
+                             "extracts every scheme in parallel without prompting")
+    parser.add_argument("--output-dir", default=os.path.join(RAW_DATA_DIR, "color_schemes"),
+                        help="Where batch mode writes <business_id>/colors_output.json")
+    parser.add_argument("--workers", type=int, help="Process pool size for batch mode")
+    editor = parser.add_mutually_exclusive_group()
+    editor.add_argument("--editor", dest="launch_editor", action="store_true", default=None,
+                        help="Open the color editor after extraction without asking "
+                             "(in batch mode, for every extracted business)")
+    editor.add_argument("--no-editor", dest="launch_editor", action="store_false",
+                        help="Never prompt for or open the color editor")
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    args = parse_args()
+    if args.batch:
+        batch_extract(load_logo_manifest(args.batch), args.output_dir, args.workers)
+        if args.launch_editor:
+            start_web_server(SchemeStore.from_directory(args.output_dir))
+    else:
+        main(launch_editor=args.launch_editor) 
\ No newline at end of file
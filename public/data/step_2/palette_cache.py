@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+On-disk cache of logo color extraction results.
+
+Entries map the SHA-256 of the logo file's bytes (plus the palette size) to the
+extracted dominant color, palette and generated color scheme. Every entry is
+stored under PALETTE_CACHE_VERSION, so changing the extraction or scheme
+algorithm only requires bumping that constant. Leads that share a template
+logo, and repeat runs over the same logo, skip extraction entirely.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Any, Dict, Optional
+
+# Bump whenever palette_engine, scheme_solver or color_extractor.generate_color_scheme changes output
+PALETTE_CACHE_VERSION = "palette-v5"
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "raw_data", "cache", "palette_cache.sqlite")
+
+
+def content_hash(data: bytes) -> str:
+    """Hash of an image's raw bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class PaletteCache:
+    """
+    Usage:
+        cache = PaletteCache()
+        entry = cache.get(logo_hash, num_colors)
+        if entry is None:
+            ...
+            cache.put(logo_hash, num_colors, dominant, palette, scheme)
+    """
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH):
+        self.cache_path = cache_path
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # Several batch workers may share the file; wait for locks rather than failing
+        self._conn = sqlite3.connect(cache_path, timeout=30)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS palettes ("
+            "content_hash TEXT NOT NULL, num_colors INTEGER NOT NULL, version TEXT NOT NULL, "
+            "result TEXT NOT NULL, PRIMARY KEY (content_hash, num_colors, version))"
+        )
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def get(self, logo_hash: str, num_colors: int) -> Optional[Dict[str, Any]]:
+        """Return {'dominant', 'palette', 'scheme'} for a logo, or None if not cached."""
+        row = self._conn.execute(
+            "SELECT result FROM palettes WHERE content_hash = ? AND num_colors = ? AND version = ?",
+            (logo_hash, num_colors, PALETTE_CACHE_VERSION)
+        ).fetchone()
+        if row is None:
+            return None
+        entry = json.loads(row[0])
+        entry['dominant'] = tuple(entry['dominant'])
+        entry['palette'] = [tuple(color) for color in entry['palette']]
+        return entry
+
+    def put(self, logo_hash: str, num_colors: int, dominant, palette, scheme: Dict[str, str]):
+        """Store the extraction result for a logo."""
+        result = json.dumps({
+            'dominant': list(dominant),
+            'palette': [list(color) for color in palette],
+            'scheme': scheme
+        })
+        self._conn.execute(
+            "INSERT OR REPLACE INTO palettes (content_hash, num_colors, version, result) VALUES (?, ?, ?, ?)",
+            (logo_hash, num_colors, PALETTE_CACHE_VERSION, result)
+        )
+        self._conn.commit()
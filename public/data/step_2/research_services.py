@@ -1,82 +1,38 @@
 #!/usr/bin/env python3
+import argparse
 import json
 import os
 import re
 import random
-import requests
-import time
-import dotenv
-from pathlib import Path
-from typing import Dict, List, Any
+import sys
+from typing import Any, Callable, Dict, List, Optional
 
-# Load the DeepSeek API key from .env.deepseek file
-env_path = Path(__file__).parent.parent / ".env.deepseek"
-dotenv.load_dotenv(env_path)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_client import ENV_PATH, LLMError, get_client, parses_as_json  # noqa: E402
+from llm_runner import DEFAULT_CONCURRENCY, run_concurrently  # noqa: E402
+from prompt_templates import render  # noqa: E402
+from research_parser import RESEARCH_SECTION_HEADINGS, parse_research  # noqa: E402
+from section_stream import parse_stream  # noqa: E402
+from service_knowledge import is_complete, knowledge_base, personalize_sections  # noqa: E402
+from service_selection import BBB_PROFILE_PATH, load_bbb_profile, select_services  # noqa: E402
 
-# Get API key from environment variable
-DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
-API_ENDPOINT = "https://api.deepseek.com/v1/chat/completions"
+# Get API key from environment variable (llm_client loads .env.deepseek)
+DEEPSEEK_API_KEY = get_client().api_key
+
+# Research answers cover several long sections
+MAX_TOKENS = 4000
+
+# Batched research: every selected service in one JSON request (deepseek-chat allows up to 8K output tokens)
+BATCH_MAX_TOKENS = 8000
+RESEARCH_SECTIONS = ("installation", "repair", "maintenance", "variants")
+RESEARCH_MARKERS = {section: f"{section.upper()}:" for section in RESEARCH_SECTIONS}
+
+# Sections whose points are steps; batched replies render them as a numbered list like per-service answers
+NUMBERED_SECTIONS = frozenset({"installation"})
 
 if not DEEPSEEK_API_KEY:
     print("WARNING: DeepSeek API key not found. Please set it in the .env.deepseek file in the public/data directory.")
-    print(f"Looking for .env.deepseek at: {env_path}")
-
-# These are shorter service options matching the combined_data.json format
-# Services are 1-3 words max as required
-ROOFING_SERVICE_OPTIONS = {
-    "residential": [
-        "Shingling",
-        "Guttering",
-        "Chimney",
-        "Skylights",
-        "Siding",
-        "Ventilation",
-        "Insulation",
-        "Waterproofing",
-        "Repairs",
-        "Inspection",
-        "Metal Roof",
-        "Ridge Vents",
-        "Attic Fans",
-        "Fascia",
-        "Flashing",
-        "Soffits"
-    ],
-    "commercial": [
-        "Coatings",
-        "Built-Up",
-        "Metal Roof",
-        "Drainage",
-        "TPO Systems",
-        "EPDM",
-        "PVC Membrane",
-        "Modified Bitumen",
-        "Restoration",
-        "Maintenance",
-        "Flat Roof",
-        "Roof Deck",
-        "Green Roof",
-        "Solar Panels",
-        "Sheet Metal",
-        "Ventilation"
-    ]
-}
-
-# Default services from combined_data.json to use as fallbacks
-DEFAULT_SERVICES = {
-    "residential": [
-        {"id": 1, "name": "Shingling"},
-        {"id": 2, "name": "Guttering"},
-        {"id": 3, "name": "Chimney"},
-        {"id": 4, "name": "Skylights"}
-    ],
-    "commercial": [
-        {"id": 1, "name": "Coatings"},
-        {"id": 2, "name": "Built-Up"},
-        {"id": 3, "name": "Metal Roof"},
-        {"id": 4, "name": "Drainage"}
-    ]
-}
+    print(f"Looking for .env.deepseek at: {ENV_PATH}")
 
 def slugify(text):
     """Convert text to URL-friendly slug"""
@@ -88,115 +44,28 @@ def slugify(text):
 
 def call_deepseek_api(prompt: str) -> str:
     """Call the DeepSeek API with a given prompt and return the response."""
-    headers = {
-        "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    data = {
-        "model": "deepseek-chat",
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.7,
-        "max_tokens": 4000
-    }
-    
-    response = requests.post(API_ENDPOINT, headers=headers, json=data)
-    
-    if response.status_code == 200:
-        return response.json()["choices"][0]["message"]["content"]
-    else:
-        print(f"Error: {response.status_code}")
-        print(response.text)
-        return f"Error: {response.status_code} - {response.text}"
+    try:
+        return get_client().chat(prompt, max_tokens=MAX_TOKENS, call_site="step_2.research_services")
+    except LLMError as e:
+        print(f"Error: {e}")
+        return f"Error: {e}"
 
 
 def generate_research_prompt(service_name: str, service_type: str) -> str:
     """Generate a comprehensive research prompt for DeepSeek about a roofing service."""
-    return f"""
-    Research the following roofing service thoroughly: {service_name} ({service_type})
-    
-    I need detailed information from the perspective of a professional roofing contractor. Please address these topics:
-    
-    1. Construction Process:
-       - Detailed step-by-step process for installing/implementing this service
-       - Materials required and their specifications
-       - Safety considerations and building code requirements
-       - Timeline estimates for completion
-    
-    2. Variants:
-       - What are the different types/styles/materials available for this service?
-       - How do these variants differ in terms of durability, appearance, and cost?
-       - What are the premium vs. budget options?
-    
-    3. Sales and Supply Chain:
-       - How do roofers typically procure materials for this service?
-       - Do they usually have inventory or order per project?
-       - What's the typical markup or profit margin for this service?
-       - How are these services typically quoted or estimated?
-    
-    4. Advantages and Benefits:
-       - What are the main selling points for this service?
-       - How does it compare to alternative solutions?
-       - What long-term benefits should be highlighted to customers?
-       - Any energy efficiency or insurance benefits?
-    
-    5. Marketing Considerations:
-       - What aspects of this service do roofers typically emphasize in marketing?
-       - What visuals or demonstrations are most effective in selling this service?
-       - Do roofers typically show pricing publicly for this service? Why or why not?
-       - What customer concerns or questions typically arise?
-    
-    6. Warranty and Maintenance:
-       - What warranties are typically offered?
-       - What maintenance requirements exist for this service?
-       - What is the expected lifespan of this roof/service?
-       - What factors can extend or reduce the lifespan?
-    
-    Format your response with section markers like this:
-    
-    ## **1. Construction Process**
-    [Your detailed content here]
-    
-    ## **2. Variants**
-    [Your detailed content here]
-    
-    And so on for each section. Provide comprehensive information a roofing website could use to create authoritative service pages.
-    """
+    return render("research.detailed", service_name=service_name, service_type=service_type)
 
 
 def extract_section(text: str, section_name: str) -> str:
     """Extract a section from the research results."""
-    try:
-        section_markers = {
-            "construction_process": ["## **1. Construction Process**", "## **2"],
-            "variants": ["## **2. Variants**", "## **3"],
-            "sales_supply": ["## **3. Sales and Supply Chain**", "## **4"],
-            "advantages": ["## **4. Advantages and Benefits**", "## **5"],
-            "marketing": ["## **5. Marketing Considerations**", "## **6"],
-            "warranty_maintenance": ["## **6. Warranty and Maintenance**", "##"]
-        }
-        
-        markers = section_markers.get(section_name)
-        if not markers:
-            return "Section not found"
-        
-        start_marker, end_marker = markers
-        
-        start = text.find(start_marker)
-        if start == -1:
-            return f"**  \n\nSection placeholder for {section_name}"
-        
-        start += len(start_marker)
-        
-        end = text.find(end_marker, start)
-        if end == -1:
-            end = len(text)
-        
-        content = text[start:end].strip()
-        return f"**  \n\n{content}"
-    except Exception as e:
-        print(f"Error extracting section {section_name}: {e}")
-        return f"**  \n\nError extracting {section_name}"
+    heading = RESEARCH_SECTION_HEADINGS.get(section_name)
+    if not heading:
+        return "Section not found"
+    
+    section = parse_research(text).find(heading)
+    if section is None:
+        return f"**  \n\nSection placeholder for {section_name}"
+    return f"**  \n\n{section.body}"
 
 
 def create_block(block_name, config, search_terms="", image_path=None):
@@ -275,20 +144,7 @@ def generate_overview_advantages(title, items, service_id, category, block_num):
 
 def extract_construction_steps(construction_text):
     """Extract steps from construction process text"""
-    steps = []
-    if "**Step-by-Step" in construction_text or "**Installation Process" in construction_text:
-        # Try to extract steps by finding numbers followed by text
-        step_matches = re.findall(r'\d+\.\s\*\*([^*]+)\*\*\s[–\-]\s([^\n\.]+)', construction_text)
-        if step_matches:
-            for step_title, step_desc in step_matches:
-                steps.append(f"{step_title.strip()} – {step_desc.strip()}")
-        
-        # Fallback: look for lines with numbers at the beginning
-        if not steps:
-            step_matches = re.findall(r'\d+\.\s+\*\*([^*]+)\*\*([^\n\.]+)', construction_text)
-            if step_matches:
-                for step_title, step_desc in step_matches:
-                    steps.append(f"{step_title.strip()} {step_desc.strip()}")
+    steps = [step.text for step in parse_research(construction_text).steps()]
     
     # If we couldn't extract structured steps, create some generic ones
     if not steps:
@@ -305,25 +161,15 @@ def extract_construction_steps(construction_text):
 
 def extract_advantages(advantages_text):
     """Extract advantages from advantages text"""
-    advantages = []
-    if "**Key" in advantages_text or "**Selling" in advantages_text:
-        # Try to find advantages with bullet points
-        adv_matches = re.findall(r'\*\*([^:*]+):\*\*\s([^\n\.]+)', advantages_text)
-        if adv_matches:
-            for adv_title, adv_desc in adv_matches:
-                advantages.append({
-                    "title": adv_title.strip(),
-                    "description": adv_desc.strip()
-                })
+    tree = parse_research(advantages_text)
+    advantages = [{"title": pair.key, "description": pair.value} for pair in tree.pairs() if pair.value]
     
-    # If no structured advantages found, create some based on the text
+    # If no structured advantages found, use the subheadings as titles
     if not advantages:
-        # Look for any phrases that might be advantages
-        potential_advantages = re.findall(r'\*\*([^*\n]+)\*\*', advantages_text)
-        for i, adv in enumerate(potential_advantages[:4]):
+        for section in list(tree.walk())[1:5]:
             advantages.append({
-                "title": adv.strip(),
-                "description": f"Professional {adv.lower()} for optimal performance and durability."
+                "title": section.title,
+                "description": f"Professional {section.title.lower()} for optimal performance and durability."
             })
     
     # If still no advantages, use generic ones
@@ -340,29 +186,29 @@ def extract_advantages(advantages_text):
 
 def extract_variants(variants_text):
     """Extract different product/service variants from the text"""
+    tree = parse_research(variants_text)
     variants = []
     
-    # Try to find tables with options
-    table_match = re.search(r'\|\s*([^|]+)\s*\|\s*([^|]+)\s*\|\s*([^|]+)\s*\|', variants_text)
-    if table_match:
-        # Try to extract table rows
-        rows = re.findall(r'\|\s*\*\*([^*|]+)\*\*\s*\|\s*([^|]+)\s*\|\s*([^|]+)\s*\|', variants_text)
-        if rows:
-            for name, durability, cost in rows:
-                variants.append({
-                    "title": name.strip(),
-                    "description": f"Durability: {durability.strip()}",
-                    "price": cost.strip()
-                })
-    
-    # If no table found, try to extract product types
+    # Prefer a comparison table: name, durability, cost columns
+    for table in tree.all_tables():
+        if len(table.header) >= 3:
+            for row in table.rows:
+                if len(row) >= 3 and row[0]:
+                    variants.append({
+                        "title": row[0],
+                        "description": f"Durability: {row[1]}",
+                        "price": row[2]
+                    })
+        if variants:
+            break
+    
+    # If no table found, use the bold product types
     if not variants:
-        type_sections = re.findall(r'\*\*([^*:]+):\*\*\s+([^\n]+)', variants_text)
-        for type_name, type_desc in type_sections:
-            if "budget" not in type_name.lower() and "premium" not in type_name.lower():
+        for pair in tree.pairs():
+            if "budget" not in pair.key.lower() and "premium" not in pair.key.lower():
                 variants.append({
-                    "title": type_name.strip(),
-                    "description": type_desc.strip(),
+                    "title": pair.key,
+                    "description": pair.value,
                     "price": f"${random.randint(5, 15)}/sq. ft."
                 })
     
@@ -377,82 +223,36 @@ def extract_variants(variants_text):
     return variants
 
 
-def research_service(service: Dict[str, Any], category: str) -> Dict[str, Any]:
-    """Research a specific service using DeepSeek API."""
-    print(f"Researching {service['name']} ({category})...")
+def research_service(service: Dict[str, Any], category: str,
+                     on_section: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
+    """
+    Research a specific service using DeepSeek API.
     
-    research_prompt = f"""
-    As a roofing expert, provide detailed information about {service['name']} for {category} buildings.
-    Focus on these four specific aspects:
-
-    1. Installation Process:
-    - Step by step installation process
-    - Required materials and tools
-    - Safety considerations
-    - Typical timeline
-
-    2. Repair Procedures:
-    - Common repair scenarios
-    - Repair techniques
-    - Required tools and materials
-    - Emergency repair procedures
-
-    3. Maintenance Requirements:
-    - Regular maintenance schedule
-    - Preventive maintenance steps
-    - Inspection checklist
-    - Common maintenance issues
-
-    4. Available Variants:
-    - Different material options
-    - Style variations
-    - Price ranges
-    - Pros and cons of each variant
-
-    Format your response as four distinct sections with clear headings:
-    INSTALLATION:
-    [Installation details]
-
-    REPAIR:
-    [Repair details]
-
-    MAINTENANCE:
-    [Maintenance details]
-
-    VARIANTS:
-    [Variants details]
+    The answer is streamed; on_section(section, text) is called for each of
+    RESEARCH_SECTIONS as soon as it has been received. Research already in the
+    service knowledge base is returned without a request; complete answers are stored there.
     """
+    stored = knowledge_base().get("sections", category, service['name'])
+    if stored is not None:
+        print(f"Using stored research for {service['name']} ({category})")
+        if on_section is not None:
+            for section in RESEARCH_SECTIONS:
+                on_section(section, stored[section])
+        return stored
+    
+    print(f"Researching {service['name']} ({category})...")
+    
+    research_prompt = render("research.sections", service_name=service['name'], category=category)
     
     try:
-        response = call_deepseek_api(research_prompt)
-        
-        # Extract each section
-        sections = {
-            "installation": "",
-            "repair": "",
-            "maintenance": "",
-            "variants": ""
-        }
-        
-        for section in sections.keys():
-            section_start = response.find(f"{section.upper()}:")
-            if section_start != -1:
-                next_section = float('inf')
-                for other_section in sections.keys():
-                    if other_section != section:
-                        pos = response.find(f"{other_section.upper()}:", section_start + 1)
-                        if pos != -1 and pos < next_section:
-                            next_section = pos
-                
-                if next_section == float('inf'):
-                    sections[section] = response[section_start:].strip()
-                else:
-                    sections[section] = response[section_start:next_section].strip()
-                
-                # Remove the section header
-                sections[section] = sections[section].replace(f"{section.upper()}:", "").strip()
-        
-        return sections
+        # Sections are parsed as the answer streams in; on_section sees each one as soon as it is complete
+        stream = get_client().chat_stream(research_prompt, max_tokens=MAX_TOKENS,
+                                          call_site="step_2.research_services")
+        sections = parse_stream(stream, RESEARCH_MARKERS, on_section)
+        research = {section: sections.get(section, "") for section in RESEARCH_SECTIONS}
+        if is_complete(research, RESEARCH_SECTIONS):
+            knowledge_base().put("sections", category, service['name'], research)
+        return research
         
     except Exception as e:
         print(f"Error researching {service['name']}: {e}")
@@ -464,6 +264,112 @@ def research_service(service: Dict[str, Any], category: str) -> Dict[str, Any]:
         }
 
 
+def generate_batch_research_prompt(jobs: List[tuple]) -> str:
+    """One prompt asking for the research sections of every (service, category) job as JSON."""
+    service_lines = "\n".join(
+        json.dumps({"key": str(index), "name": service["name"], "category": category})
+        for index, (service, category) in enumerate(jobs)
+    )
+    return render("research.batch", service_lines=service_lines)
+
+
+def points_markdown(section: str, points: List[str]) -> str:
+    """
+    Batched research points as the markdown list a per-service answer uses: numbered
+    steps for NUMBERED_SECTIONS, bullets otherwise. Both modes then store, and write to
+    services_research.json, the same representation.
+    """
+    if section in NUMBERED_SECTIONS:
+        return "\n".join(f"{number}. {point}" for number, point in enumerate(points, 1))
+    return "\n".join(f"- {point}" for point in points)
+
+
+def parse_batch_research(response: str, jobs: List[tuple]) -> Dict[int, Dict[str, str]]:
+    """
+    Validate a batched research reply and split it per job.
+
+    Returns {job index: {section: text}} for every entry that has all RESEARCH_SECTIONS as
+    non-empty lists of strings (or strings); each section is rendered by points_markdown.
+    Missing or malformed entries are left out.
+    """
+    # Tolerates a ```json fence or stray text around the object
+    text = response.strip()
+    try:
+        data = json.loads(text[text.find("{"):text.rfind("}") + 1])
+    except ValueError:
+        return {}
+    entries = data.get("services") if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        return {}
+
+    results = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            index = int(entry.get("key"))
+        except (TypeError, ValueError):
+            continue
+        if not 0 <= index < len(jobs) or index in results:
+            continue
+        sections = {}
+        for section in RESEARCH_SECTIONS:
+            value = entry.get(section)
+            if isinstance(value, str):
+                value = value.splitlines()
+            if not isinstance(value, list):
+                break
+            # Points are asked for without numbering or markdown; drop any the model added anyway
+            points = [re.sub(r"^(?:\d{1,3}[.)]|[-*•+])\s+", "", point.strip())
+                      for point in value if isinstance(point, str) and point.strip()]
+            if not points:
+                break
+            sections[section] = points_markdown(section, points)
+        else:
+            results[index] = sections
+    return results
+
+
+def research_services_batched(jobs: List[tuple]) -> List[Dict[str, str]]:
+    """
+    Research every (service, category) job with one JSON request, in job order.
+
+    Jobs found in the service knowledge base are not sent. Jobs missing from, or malformed
+    in, the batched reply (or all of them, if the request fails) are researched individually
+    with research_service, concurrently.
+    """
+    kb = knowledge_base()
+    results = {}
+    for index, (service, category) in enumerate(jobs):
+        stored = kb.get("sections", category, service["name"])
+        if stored is not None:
+            results[index] = stored
+    if results:
+        print(f"Using stored research for {len(results)} of {len(jobs)} services")
+    
+    pending = [index for index in range(len(jobs)) if index not in results]
+    if pending:
+        batch = [jobs[index] for index in pending]
+        print(f"Researching {len(batch)} services in one batched request...")
+        try:
+            response = get_client().chat(generate_batch_research_prompt(batch), max_tokens=BATCH_MAX_TOKENS,
+                                         call_site="step_2.research_batch", json_mode=True,
+                                         validate=parses_as_json)
+            for position, sections in parse_batch_research(response, batch).items():
+                service, category = batch[position]
+                kb.put("sections", category, service["name"], sections)
+                results[pending[position]] = sections
+        except LLMError as e:
+            print(f"Batched research failed: {e}")
+
+    missing = [index for index in range(len(jobs)) if index not in results]
+    if missing:
+        print(f"Falling back to per-service research for {len(missing)} of {len(jobs)} services")
+        fallback = run_concurrently(research_service, [jobs[index] for index in missing])
+        results.update(zip(missing, fallback))
+    return [results[index] for index in range(len(jobs))]
+
+
 def create_placeholder_research(service_name):
     """Create placeholder research data when DeepSeek is not available"""
     return {
@@ -477,152 +383,21 @@ def create_placeholder_research(service_name):
 
 
 def get_bbb_services() -> Dict[str, List[Dict[str, Any]]]:
-    """Extract services from BBB profile data if available, otherwise use fallbacks."""
-    try:
-        # Fix the path to look in raw_data/step_1 for BBB profile data
-        bbb_data_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
-                                    "raw_data", "step_1", "bbb_profile_data.json")
-        
-        print(f"Looking for BBB data at: {bbb_data_path}")
-        
-        # Try to load BBB profile data
-        with open(bbb_data_path, "r") as f:
-            bbb_data = json.load(f)
-        
-        if not bbb_data:
-            print("BBB data exists but is empty. Using default services.")
-            return DEFAULT_SERVICES
-        
-        # Extract additional services from BBB data
-        additional_services = bbb_data.get('additional_services', [])
-        business_name = bbb_data.get('business_name', 'Roofing Company')
-        
-        if not additional_services:
-            print("No additional services found in BBB data. Using default services.")
-            return DEFAULT_SERVICES
-        
-        # Print the additional services we found
+    """
+    Select services for the BBB profile, or use fallbacks. The selection is stored
+    (service_selection.py) and reused by later steps and re-runs for the same profile.
+    """
+    print(f"Looking for BBB data at: {BBB_PROFILE_PATH}")
+    bbb_data = load_bbb_profile()
+    
+    # Print the additional services we found
+    additional_services = bbb_data.get('additional_services', [])
+    if additional_services:
         print(f"Found additional services in BBB data:")
         for service in additional_services:
             print(f"  - {service}")
-        
-        # Generate appropriate services using AI if DeepSeek key is available
-        if DEEPSEEK_API_KEY:
-            print("Using DeepSeek API to generate services based on BBB profile data...")
-            generated_services = generate_services_from_bbb(bbb_data, additional_services)
-            if generated_services:
-                return generated_services
-            else:
-                print("Failed to generate services with DeepSeek. Using default services.")
-                return DEFAULT_SERVICES
-        else:
-            print("DeepSeek API key not available. Using default services.")
-            return DEFAULT_SERVICES
-            
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        print(f"Error loading BBB data: {e}. Using default services.")
-        return DEFAULT_SERVICES
-
-
-def generate_services_from_bbb(bbb_data: Dict[str, Any], additional_services: List[str]) -> Dict[str, List[Dict[str, Any]]]:
-    """Generate specific, realistic services based on BBB profile data."""
-    business_name = bbb_data.get('business_name', 'Roofing Company')
-    service_hints = ', '.join(additional_services) if additional_services else "Roofing Services, Construction Services"
-    
-    print(f"Generating services for {business_name} based on: {service_hints}")
-    
-    # Convert the options to JSON string
-    residential_options = json.dumps(ROOFING_SERVICE_OPTIONS["residential"])
-    commercial_options = json.dumps(ROOFING_SERVICE_OPTIONS["commercial"])
-    
-    prompt = f"""
-    You are a professional roofing consultant. Based on the services provided by "{business_name}", 
-    select 8 specific roofing services that would make sense for this company.
-    
-    The company provides these services: {service_hints}
-    
-    Here are the available service options:
-    
-    RESIDENTIAL OPTIONS:
-    {residential_options}
     
-    COMMERCIAL OPTIONS:
-    {commercial_options}
-    
-    Rules:
-    1. Select 4 residential services from the residential options
-    2. Select 4 commercial services from the commercial options
-    3. Choose services that match or complement the company's existing offerings
-    4. All service names must be 1-3 words maximum and be selected from the provided options lists
-    5. Make selections appropriate for a company named "{business_name}" 
-       that offers these services: {service_hints}
-    
-    Return JSON only in this format with no additional text:
-    {{
-      "residential": [
-        {{"id": 1, "name": "Service 1"}},
-        {{"id": 2, "name": "Service 2"}},
-        {{"id": 3, "name": "Service 3"}},
-        {{"id": 4, "name": "Service 4"}}
-      ],
-      "commercial": [
-        {{"id": 1, "name": "Service 1"}},
-        {{"id": 2, "name": "Service 2"}},
-        {{"id": 3, "name": "Service 3"}},
-        {{"id": 4, "name": "Service 4"}}
-      ]
-    }}
-    
-    The service names must be exactly as they appear in the options lists above, with no modifications.
-    """
-    
-    try:
-        print("Calling DeepSeek API to select services based on company's offerings...")
-        response = call_deepseek_api(prompt)
-        
-        # Extract JSON from response
-        json_start = response.find('{')
-        json_end = response.rfind('}') + 1
-        
-        if json_start >= 0 and json_end > json_start:
-            json_str = response[json_start:json_end]
-            try:
-                services = json.loads(json_str)
-                
-                # Validate the structure 
-                if ('residential' in services and 'commercial' in services and
-                        len(services['residential']) == 4 and len(services['commercial']) == 4):
-                    
-                    # Verify all selected residential services are in the options list
-                    for service in services['residential']:
-                        if service['name'] not in ROOFING_SERVICE_OPTIONS['residential']:
-                            print(f"Warning: '{service['name']}' is not in the valid residential options. Replacing with a default service.")
-                            service['name'] = DEFAULT_SERVICES["residential"][service['id'] - 1]["name"]
-                    
-                    # Verify all selected commercial services are in the options list
-                    for service in services['commercial']:
-                        if service['name'] not in ROOFING_SERVICE_OPTIONS['commercial']:
-                            print(f"Warning: '{service['name']}' is not in the valid commercial options. Replacing with a default service.")
-                            service['name'] = DEFAULT_SERVICES["commercial"][service['id'] - 1]["name"]
-                    
-                    print("Successfully selected services:")
-                    for category, service_list in services.items():
-                        print(f"\n{category.upper()} SERVICES:")
-                        for service in service_list:
-                            print(f"  - {service['name']}")
-                    return services
-                else:
-                    print("Generated services have incorrect structure.")
-            except json.JSONDecodeError as e:
-                print(f"Failed to parse JSON from DeepSeek API response: {e}")
-        else:
-            print("Could not find valid JSON in DeepSeek API response.")
-        
-        print("Failed to generate services with DeepSeek. Using default services.")
-        return DEFAULT_SERVICES
-    except Exception as e:
-        print(f"Error generating services: {e}. Using default services.")
-        return DEFAULT_SERVICES
+    return select_services(bbb_data)
 
 
 def update_template_with_services(services):
@@ -714,6 +489,11 @@ def update_template_with_services(services):
 
 def main():
     """Generate service list and research data."""
+    parser = argparse.ArgumentParser(description="Select and research the business's roofing services")
+    parser.add_argument("--per-service", action="store_true",
+                        help="Send one research prompt per service instead of one batched JSON request")
+    args = parser.parse_args()
+    
     print("Starting research_services.py script...")
     
     try:
@@ -738,31 +518,42 @@ def main():
             json.dump(services, f, indent=2)
         print(f"Also saved services list to {step2_services_path}")
         
-        # Research each service
+        # Research every service concurrently; results come back in service order
         research_data = {
             "residential": [],
             "commercial": []
         }
         
-        for category in ['residential', 'commercial']:
-            print(f"\nResearching {category} services:")
-            for service in services[category]:
-                print(f"  - {service['name']}")
-                
-                # Get research data
-                service_research = research_service(service, category)
-                
-                # Add to research data
-                research_data[category].append({
-                    "id": service["id"],
-                    "name": service["name"],
-                    "installation": service_research["installation"],
-                    "repair": service_research["repair"],
-                    "maintenance": service_research["maintenance"],
-                    "variants": service_research["variants"]
-                })
-                
-                time.sleep(2)  # Rate limiting
+        jobs = [(service, category) for category in ['residential', 'commercial'] for service in services[category]]
+        if args.per_service:
+            print(f"\nResearching {len(jobs)} services (up to {DEFAULT_CONCURRENCY} at a time):")
+            
+            def section_ready(service):
+                return lambda section, text: print(f"  - {service['name']}: {section} ready ({len(text)} chars)")
+            
+            def report(index, result):
+                service, category = jobs[index]
+                print(f"  - {service['name']} ({category}) done")
+            
+            results = run_concurrently(research_service,
+                                       [(service, category, section_ready(service)) for service, category in jobs],
+                                       on_result=report)
+        else:
+            print()
+            results = research_services_batched(jobs)
+        
+        # The research is shared across businesses; name this one where it speaks of a generic contractor
+        business_name = load_bbb_profile().get("business_name", "")
+        for (service, category), service_research in zip(jobs, results):
+            service_research = personalize_sections(service_research, business_name)
+            research_data[category].append({
+                "id": service["id"],
+                "name": service["name"],
+                "installation": service_research["installation"],
+                "repair": service_research["repair"],
+                "maintenance": service_research["maintenance"],
+                "variants": service_research["variants"]
+            })
         
         # Save research data
         research_output_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 
@@ -778,6 +569,7 @@ def main():
             json.dump(research_data, f, indent=2)
         print(f"Also saved detailed research to {detailed_output_path}")
         
+        get_client().print_metrics()
         print("\nScript completed successfully!")
         
     except Exception as e:
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Single-pass aggregates over analyzed reviews.
+
+ReviewAggregator is fed one sentiment record at a time (so it works with both the
+in-memory and streaming modes of AnalyzeReviews) and produces a compact artifact
+that downstream steps read instead of re-scanning every review:
+
+    {
+      "version": 1,
+      "review_count": 16,
+      "rating_histogram": {"1": 2, "2": 0, "3": 1, "4": 0, "5": 13, "unknown": 0},
+      "average_rating": 4.38,
+      "sentiment_distribution": {"positive": 12, "neutral": 1, "negative": 3},
+      "mean_polarity": 0.31,
+      "recency_buckets": {"last_30_days": 0, "last_6_months": 1, ...},
+      "top_reviews": [ ...top_k review records ordered by (rating, polarity)... ]
+    }
+"""
+
+import heapq
+import re
+from typing import Any, Dict, Optional
+
+AGGREGATES_VERSION = 1
+TOP_K = 12
+
+RECENCY_BUCKETS = ["last_30_days", "last_6_months", "last_year", "older", "unknown"]
+
+# Google Maps style relative dates: "a week ago", "3 months ago", "2 years ago"
+_RELATIVE_DATE = re.compile(r'^(a|an|\d+)\s+(minute|hour|day|week|month|year)s?\s+ago$', re.IGNORECASE)
+_UNIT_DAYS = {"minute": 0, "hour": 0, "day": 1, "week": 7, "month": 30, "year": 365}
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def age_in_days(date_text: Any) -> Optional[int]:
+    """Approximate age of a review from its relative date string, or None if unparseable."""
+    if not isinstance(date_text, str):
+        return None
+    match = _RELATIVE_DATE.match(date_text.strip())
+    if not match:
+        return None
+    amount, unit = match.groups()
+    count = 1 if amount.lower() in ("a", "an") else int(amount)
+    return count * _UNIT_DAYS[unit.lower()]
+
+
+def recency_bucket(date_text: Any) -> str:
+    """Classify a review date into one of RECENCY_BUCKETS."""
+    days = age_in_days(date_text)
+    if days is None:
+        return "unknown"
+    if days <= 30:
+        return "last_30_days"
+    if days <= 182:
+        return "last_6_months"
+    if days <= 365:
+        return "last_year"
+    return "older"
+
+
+class ReviewAggregator:
+    """Accumulates review statistics and a bounded top-k heap in one pass."""
+
+    def __init__(self, top_k: int = TOP_K):
+        self.top_k = top_k
+        self.review_count = 0
+        self.rating_histogram = {str(stars): 0 for stars in range(1, 6)}
+        self.rating_histogram["unknown"] = 0
+        self.rating_sum = 0.0
+        self.rated_count = 0
+        self.sentiment_distribution = {"positive": 0, "neutral": 0, "negative": 0}
+        self.polarity_sum = 0.0
+        self.recency_buckets = {bucket: 0 for bucket in RECENCY_BUCKETS}
+        # Min-heap of (rating, polarity, -sequence, record); the smallest entry is evicted first
+        self._heap = []
+
+    def add(self, record: Dict[str, Any]):
+        """Fold one analyzed review (as written to sentiment_reviews.json) into the aggregates."""
+        self.review_count += 1
+
+        rating = _to_float(record.get('rating'))
+        if rating is not None and 1 <= round(rating) <= 5:
+            self.rating_histogram[str(int(round(rating)))] += 1
+            self.rating_sum += rating
+            self.rated_count += 1
+        else:
+            self.rating_histogram["unknown"] += 1
+
+        sentiment = record.get('sentiment')
+        if sentiment in self.sentiment_distribution:
+            self.sentiment_distribution[sentiment] += 1
+
+        polarity = _to_float(record.get('polarity')) or 0.0
+        self.polarity_sum += polarity
+
+        self.recency_buckets[recency_bucket(record.get('date'))] += 1
+
+        # Negative sequence keeps earlier reviews ahead on ties, matching a stable sort
+        entry = (rating or 0.0, polarity, -self.review_count, record)
+        if len(self._heap) < self.top_k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:3] > self._heap[0][:3]:
+            heapq.heapreplace(self._heap, entry)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the aggregate artifact."""
+        top_reviews = [entry[3] for entry in sorted(self._heap, key=lambda e: e[:3], reverse=True)]
+        return {
+            "version": AGGREGATES_VERSION,
+            "review_count": self.review_count,
+            "rating_histogram": self.rating_histogram,
+            "average_rating": round(self.rating_sum / self.rated_count, 2) if self.rated_count else None,
+            "sentiment_distribution": self.sentiment_distribution,
+            "mean_polarity": self.polarity_sum / self.review_count if self.review_count else 0.0,
+            "recency_buckets": self.recency_buckets,
+            "top_k": self.top_k,
+            "top_reviews": top_reviews
+        }
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Accessible color scheme solver.
+
+Assigns palette colors to the four scheme roles (accent, banner, faint-color,
+second-accent) so that every role is readable with the text color the site
+renders on it (WCAG AA, 4.5:1), while keeping the four colors as far apart in
+CIELAB as possible. The contrast ratio of every palette color against every
+other, plus black and white, is computed in one vectorized pass; all role
+assignments are then scored at once.
+
+When no palette color satisfies a role's constraint, the color's CIELAB
+lightness is shifted the smallest amount that does, keeping its hue, so the
+scheme still reads as the logo's colors. faint-color is a page background, so
+its constraint also asks for a light tint (ROLE_MIN_LIGHTNESS).
+"""
+
+from itertools import permutations
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+from palette_engine import MIN_DELTA_E, RGB, delta_e_matrix, lab_to_rgb, rgb_to_lab, select_distinct_colors
+
+# WCAG 2.x AA contrast target for normal-size text
+WCAG_AA = 4.5
+
+SCHEME_ROLES = ("accent", "banner", "faint-color", "second-accent")
+
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+
+# Text colors the site draws on each role; a role passes if any of them reaches the target ratio.
+# Accent buttons use both black and white labels, banners and selected items use white text,
+# and faint-color is a page background under dark text.
+ROLE_TEXT = {
+    "accent": ("white", "black"),
+    "banner": ("white",),
+    "faint-color": ("black",),
+    "second-accent": ("white",),
+}
+
+# Minimum CIELAB L* per role: faint-color sits behind body text and subtle highlights,
+# so a saturated mid-tone that merely reaches AA against black is lightened to a tint
+ROLE_MIN_LIGHTNESS = {"faint-color": 85.0}
+
+# Palette colors considered for role assignment (8P4 = 1680 assignments are scored)
+MAX_CANDIDATES = 8
+
+# Lightness levels tried when a color has to be darkened or lightened to pass
+_LIGHTNESS_STEPS = np.linspace(0.0, 100.0, 201)
+
+
+def relative_luminance(rgb) -> np.ndarray:
+    """WCAG relative luminance of an (N, 3) array of 8-bit sRGB colors."""
+    srgb = np.asarray(rgb, dtype=np.float64).reshape(-1, 3) / 255.0
+    linear = np.where(srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4)
+    return linear @ np.array([0.2126, 0.7152, 0.0722])
+
+
+def contrast_ratio(luminance_a: np.ndarray, luminance_b: np.ndarray) -> np.ndarray:
+    """Elementwise (broadcast) WCAG contrast ratio between two luminance arrays."""
+    lighter = np.maximum(luminance_a, luminance_b)
+    darker = np.minimum(luminance_a, luminance_b)
+    return (lighter + 0.05) / (darker + 0.05)
+
+
+def contrast_matrix(rgb) -> np.ndarray:
+    """Pairwise WCAG contrast ratios between colors, shape (N, N)."""
+    luminance = relative_luminance(rgb)
+    return contrast_ratio(luminance[:, None], luminance[None, :])
+
+
+def _text_contrast(rgb) -> np.ndarray:
+    """Contrast of each color against black and white text, shape (N, 2), from one matrix."""
+    colors = np.vstack([np.asarray(rgb, dtype=np.float64).reshape(-1, 3), BLACK, WHITE])
+    return contrast_matrix(colors)[:-2, -2:]
+
+
+def _role_mask(text_contrast: np.ndarray, lightness: np.ndarray, role: str, min_contrast: float) -> np.ndarray:
+    """
+    Whether each color passes a role's constraint, given (..., 2) black/white contrasts
+    and CIELAB lightness (...): readable text, and at least the role's minimum L*.
+    """
+    columns = [0 if text == "black" else 1 for text in ROLE_TEXT[role]]
+    readable = (text_contrast[..., columns] >= min_contrast).any(axis=-1)
+    return readable & (lightness >= ROLE_MIN_LIGHTNESS.get(role, 0.0))
+
+
+def _adjust_lightness(rgb: np.ndarray, role: str, min_contrast: float) -> np.ndarray:
+    """
+    For each color, the nearest-lightness variant (same CIELAB a*, b*) that passes
+    the role's constraint. Pure black or white always passes, so a variant exists.
+    """
+    lab = rgb_to_lab(rgb)
+    steps = len(_LIGHTNESS_STEPS)
+    variants = np.repeat(lab[:, None, :], steps, axis=1)
+    variants[:, :, 0] = _LIGHTNESS_STEPS
+    variant_rgb = lab_to_rgb(variants.reshape(-1, 3))
+
+    luminance = relative_luminance(variant_rgb)
+    text_contrast = np.stack([contrast_ratio(luminance, 0.0), contrast_ratio(luminance, 1.0)], axis=1)
+    # Lightness of the gamut-clipped variant, which is what the page shows
+    lightness = rgb_to_lab(variant_rgb)[:, 0]
+    passes = _role_mask(text_contrast, lightness, role, min_contrast).reshape(len(lab), steps)
+
+    distance = np.abs(_LIGHTNESS_STEPS[None, :] - lab[:, :1])
+    distance[~passes] = np.inf
+    best = np.argmin(distance, axis=1)
+    return variant_rgb.reshape(len(lab), steps, 3)[np.arange(len(lab)), best]
+
+
+def solve_accessible_scheme(palette_rgb: Sequence[RGB], min_contrast: float = WCAG_AA,
+                            max_candidates: int = MAX_CANDIDATES
+                            ) -> Tuple[Dict[str, RGB], Dict[str, Dict]]:
+    """
+    Assign palette colors to SCHEME_ROLES.
+
+    Every assignment of distinct palette colors to roles is scored at once; a color
+    that fails a role's constraint is replaced by its lightness-adjusted variant for
+    that role. Generated fill-ins (select_distinct_colors) are added to the candidates
+    whenever the logo colors alone are too few or too alike to give four colors
+    MIN_DELTA_E apart. The chosen assignment is, in order of preference:
+      1. one whose colors are all at least MIN_DELTA_E apart,
+      2. with a logo color, not a fill-in, as accent,
+      3. with the fewest fill-ins,
+      4. with the fewest adjusted logo colors,
+      5. with the dominant (first) palette color as accent,
+      6. with the fewest adjusted fill-ins,
+      7. with the largest minimum pairwise Delta E.
+
+    min_contrast is the target for every role (WCAG AA by default).
+
+    Returns (colors, report): colors maps each role to an RGB tuple, and report is
+    scheme_contrast(colors) with an 'adjusted' flag added to each role.
+    """
+    logo_colors = list(dict.fromkeys(tuple(int(c) for c in color) for color in palette_rgb))[:max_candidates]
+    # Farthest-point selection keeps the logo colors that are distinct and adds fill-ins
+    # only for what they cannot cover, e.g. a palette of near-identical grays
+    distinct = select_distinct_colors(logo_colors or [WHITE], max(len(SCHEME_ROLES), len(logo_colors)))
+    palette = logo_colors + [color for color in distinct if color not in logo_colors][:len(SCHEME_ROLES)]
+    base = np.array(palette, dtype=np.float64)
+    base_count = len(base)
+    generated = np.array([color not in logo_colors for color in palette])
+
+    # Per role, the color each palette entry contributes: itself if it passes, else its adjusted variant
+    base_contrast = _text_contrast(base)
+    base_lightness = rgb_to_lab(base)[:, 0]
+    base_mask = {role: _role_mask(base_contrast, base_lightness, role, min_contrast) for role in SCHEME_ROLES}
+    role_colors = []
+    adjusted = []
+    for role in SCHEME_ROLES:
+        colors = base.copy()
+        if not base_mask[role].all():
+            colors[~base_mask[role]] = _adjust_lightness(base[~base_mask[role]], role, min_contrast)
+        role_colors.append(colors)
+        adjusted.append(~base_mask[role])
+    role_colors = np.array(role_colors)  # (roles, base_count, 3)
+    adjusted = np.array(adjusted)
+
+    # Delta E between every (role, palette entry) pair of candidate colors
+    flat_lab = rgb_to_lab(role_colors.reshape(-1, 3))
+    delta_e = delta_e_matrix(flat_lab, flat_lab)
+
+    assignments = np.array(list(permutations(range(base_count), len(SCHEME_ROLES))))
+    flat_index = np.arange(len(SCHEME_ROLES)) * base_count + assignments
+    pairs = [(a, b) for a in range(len(SCHEME_ROLES)) for b in range(a + 1, len(SCHEME_ROLES))]
+    min_delta = np.min([delta_e[flat_index[:, a], flat_index[:, b]] for a, b in pairs], axis=0)
+    assigned_adjusted = adjusted[np.arange(len(SCHEME_ROLES)), assignments]
+    assigned_generated = generated[assignments]
+    adjusted_logo = (assigned_adjusted & ~assigned_generated).sum(axis=1)
+    adjusted_generated = (assigned_adjusted & assigned_generated).sum(axis=1)
+
+    # np.lexsort sorts by the last key first
+    order = np.lexsort((
+        -min_delta,
+        adjusted_generated,
+        assignments[:, 0] != 0,
+        adjusted_logo,
+        assigned_generated.sum(axis=1),
+        assigned_generated[:, 0],
+        min_delta < MIN_DELTA_E,
+    ))
+    best = assignments[order[0]]
+
+    chosen = role_colors[np.arange(len(SCHEME_ROLES)), best].astype(int)
+    colors = {role: tuple(int(c) for c in chosen[i]) for i, role in enumerate(SCHEME_ROLES)}
+    report = scheme_contrast(colors, min_contrast)
+    for i, role in enumerate(SCHEME_ROLES):
+        report[role]["adjusted"] = bool(adjusted[i, best[i]])
+    return colors, report
+
+
+def scheme_contrast(colors: Dict[str, RGB], min_contrast: float = WCAG_AA) -> Dict[str, Dict]:
+    """
+    Contrast of each role in a scheme against its best text color.
+
+    colors maps role names (any subset of SCHEME_ROLES) to RGB tuples. Returns
+    {role: {'text', 'contrast', 'passes'}} for the roles present.
+    """
+    roles = [role for role in SCHEME_ROLES if role in colors]
+    if not roles:
+        return {}
+    text_contrast = _text_contrast([colors[role] for role in roles])
+    lightness = rgb_to_lab([colors[role] for role in roles])[:, 0]
+    report = {}
+    for i, role in enumerate(roles):
+        texts = ROLE_TEXT[role]
+        ratios = {text: float(text_contrast[i, 0 if text == "black" else 1]) for text in texts}
+        text = max(texts, key=ratios.get)
+        report[role] = {
+            "text": text,
+            "contrast": round(ratios[text], 2),
+            "passes": bool(_role_mask(text_contrast[i], lightness[i], role, min_contrast))
+        }
+    return report
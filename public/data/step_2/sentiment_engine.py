@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Batched, cached sentiment analysis for review text.
+
+Polarity scores are stored in a small sqlite database keyed by the SHA-256 of
+the review text and ANALYZER_VERSION, so re-running the analysis over a corpus
+only pays for reviews that have not been scored before. Large batches of
+uncached texts are scored in parallel across a process pool.
+"""
+
+import hashlib
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+from typing import Dict, Iterable, List, Optional
+
+from textblob import TextBlob
+
+try:
+    _TEXTBLOB_VERSION = metadata.version("textblob")
+except metadata.PackageNotFoundError:
+    _TEXTBLOB_VERSION = "unknown"
+
+# Bump the suffix whenever the scoring logic changes so stale cache rows are ignored
+ANALYZER_VERSION = f"textblob-{_TEXTBLOB_VERSION}-v1"
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "raw_data", "cache", "sentiment_cache.sqlite")
+
+# Below this many uncached texts the process pool startup costs more than it saves
+PARALLEL_THRESHOLD = 2000
+CHUNK_SIZE = 500
+
+# sqlite limits the number of bound parameters per statement
+_LOOKUP_BATCH = 500
+
+
+def polarity_to_label(polarity: float) -> str:
+    """Map a polarity score (-1.0 to +1.0) to a sentiment label."""
+    if polarity > 0:
+        return 'positive'
+    elif polarity < 0:
+        return 'negative'
+    return 'neutral'
+
+
+def text_hash(text: str) -> str:
+    """Return the cache key for a review text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _score_chunk(texts: List[str]) -> List[float]:
+    """Score a chunk of texts. Module level so it can be pickled into worker processes."""
+    return [TextBlob(text).sentiment.polarity for text in texts]
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class SentimentEngine:
+    """
+    Scores lists of texts, reusing cached results from previous runs.
+
+    Usage:
+        with SentimentEngine() as engine:
+            results = engine.analyze_batch(["Great job!", "Never again."])
+            # [{'sentiment': 'positive', 'polarity': 1.0}, ...]
+    """
+
+    def __init__(self, cache_path: Optional[str] = DEFAULT_CACHE_PATH, workers: Optional[int] = None,
+                 parallel_threshold: int = PARALLEL_THRESHOLD, chunk_size: int = CHUNK_SIZE):
+        """
+        Args:
+            cache_path: sqlite file used for the on-disk cache, or None to disable caching.
+            workers: Process pool size for large batches (defaults to the CPU count).
+            parallel_threshold: Minimum number of uncached texts before the process pool is used.
+            chunk_size: Number of texts sent to a worker at a time.
+        """
+        self.cache_path = cache_path
+        self.workers = workers or os.cpu_count() or 1
+        self.parallel_threshold = parallel_threshold
+        self.chunk_size = chunk_size
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+
+        if cache_path:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            self._conn = sqlite3.connect(cache_path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sentiment ("
+                "text_hash TEXT NOT NULL, version TEXT NOT NULL, polarity REAL NOT NULL, "
+                "PRIMARY KEY (text_hash, version))"
+            )
+            self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Close the cache database."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _lookup(self, keys: List[str]) -> Dict[str, float]:
+        """Fetch cached polarities for the given keys."""
+        found = {}
+        if self._conn is None:
+            return found
+        for batch in _chunks(keys, _LOOKUP_BATCH):
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT text_hash, polarity FROM sentiment WHERE version = ? AND text_hash IN ({placeholders})",
+                [ANALYZER_VERSION, *batch]
+            )
+            found.update(rows)
+        return found
+
+    def _store(self, scored: Dict[str, float]):
+        """Persist newly computed polarities."""
+        if self._conn is None or not scored:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO sentiment (text_hash, version, polarity) VALUES (?, ?, ?)",
+            [(key, ANALYZER_VERSION, polarity) for key, polarity in scored.items()]
+        )
+        self._conn.commit()
+
+    def _score(self, texts: List[str]) -> List[float]:
+        """Score uncached texts, fanning out to a process pool for large inputs."""
+        if len(texts) < self.parallel_threshold or self.workers <= 1:
+            return _score_chunk(texts)
+
+        polarities = []
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for chunk_result in pool.map(_score_chunk, _chunks(texts, self.chunk_size)):
+                polarities.extend(chunk_result)
+        return polarities
+
+    def analyze_batch(self, texts: List[str]) -> List[Dict[str, object]]:
+        """
+        Analyze a list of texts.
+
+        Returns a list (in input order) of dicts with 'sentiment' and 'polarity' keys.
+        Duplicate texts are only scored once.
+        """
+        keys = [text_hash(text) for text in texts]
+        unique_keys = list(dict.fromkeys(keys))
+
+        polarities = self._lookup(unique_keys)
+        self.hits += len(polarities)
+
+        # Texts that still need scoring, one representative per key
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in polarities and key not in pending:
+                pending[key] = text
+        self.misses += len(pending)
+
+        if pending:
+            scored = dict(zip(pending.keys(), self._score(list(pending.values()))))
+            self._store(scored)
+            polarities.update(scored)
+
+        return [
+            {'sentiment': polarity_to_label(polarities[key]), 'polarity': polarities[key]}
+            for key in keys
+        ]
+
+    def analyze(self, text: str) -> Dict[str, object]:
+        """Analyze a single text."""
+        return self.analyze_batch([text])[0]
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Role assignment of the accessible scheme solver.
+
+    python -m pytest test_scheme_solver.py
+"""
+
+from itertools import combinations
+
+from palette_engine import MIN_DELTA_E, delta_e_matrix, rgb_to_lab
+from scheme_solver import ROLE_MIN_LIGHTNESS, SCHEME_ROLES, solve_accessible_scheme
+
+# Palette extracted from the repo logo (raw_data/step_1/logo.png): dark and saturated reds
+REPO_LOGO_PALETTE = [(27, 5, 5), (248, 22, 27), (151, 24, 26), (99, 13, 13),
+                     (201, 35, 39), (204, 61, 61), (214, 48, 69)]
+
+
+def _min_delta_e(colors):
+    lab = rgb_to_lab([colors[role] for role in SCHEME_ROLES])
+    delta_e = delta_e_matrix(lab, lab)
+    return min(delta_e[a, b] for a, b in combinations(range(len(SCHEME_ROLES)), 2))
+
+
+def test_near_identical_palette_gets_distinct_fill_ins():
+    colors, report = solve_accessible_scheme([(100, 100, 100), (101, 101, 101), (118, 118, 118), (103, 103, 103)])
+    assert colors["accent"] == (100, 100, 100)
+    assert _min_delta_e(colors) >= MIN_DELTA_E
+    assert all(role["passes"] for role in report.values())
+
+
+def test_faint_color_is_a_light_tint_for_the_repo_logo():
+    colors, report = solve_accessible_scheme(REPO_LOGO_PALETTE)
+    assert colors["faint-color"] != (248, 22, 27)
+    assert rgb_to_lab([colors["faint-color"]])[0, 0] >= ROLE_MIN_LIGHTNESS["faint-color"]
+    assert report["faint-color"]["passes"] and report["faint-color"]["text"] == "black"
+    # The logo's own colors still carry the other roles
+    assert all(colors[role] in REPO_LOGO_PALETTE for role in ("accent", "banner", "second-accent"))
+
+
+def test_distinct_logo_colors_are_used_without_fill_ins():
+    palette = [(0, 0, 255), (255, 0, 0), (0, 128, 0), (250, 250, 240)]
+    colors, report = solve_accessible_scheme(palette)
+    assert set(colors.values()) == set(palette)
+    assert not any(role["adjusted"] for role in report.values())
+
+
+def test_single_color_logo_keeps_it_as_accent():
+    colors, _ = solve_accessible_scheme([(0, 0, 255)])
+    assert colors["accent"] == (0, 0, 255)
+    assert _min_delta_e(colors) >= MIN_DELTA_E
@@ -1,6 +1,30 @@
+#!/usr/bin/env python3
+"""
+Logo clipping engine.
+
+Turns a logo into a desaturated image with a transparent background and writes
+every variant the site uses from a single decode: the full-size clip plus
+responsive sizes, each as PNG and (when the encoders are available) WebP and
+AVIF. Every variant is encoded once; when the same file is needed in several
+directories it is hard-linked (or, across filesystems, copied) rather than
+re-encoded.
+
+Usage:
+    python clipimage.py                                   # raw_data/step_1/logo.png, as before
+    python clipimage.py --batch ../raw_data/leads_logos --output-dir ../raw_data/clipped_logos --workers 8
+    python clipimage.py --sizes 128 256 --formats png webp
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
 import cv2
 import numpy as np
-import os
+from PIL import Image, features
 
 # Set up paths
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -10,46 +34,321 @@ input_path = os.path.join(data_dir, "raw_data", "step_1", "logo.png")
 # Create assets directory path (at project root level)
 project_root = os.path.dirname(os.path.dirname(data_dir))
 assets_dir = os.path.join(project_root, "assets", "images", "hero")
-assets_output_path = os.path.join(assets_dir, "clipped.png")
 
 # Keep the original outputs for compatibility
 output_dir = os.path.join(data_dir, "raw_data", "step_3")
-output_path = os.path.join(output_dir, "clipped.png")
+root_output_dir = os.path.join(data_dir, "raw_data")
+
+OUTPUT_NAME = "clipped"
+LOGO_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.gif', '.bmp')
+
+# Background removal modes: "threshold" keeps gray levels at or below THRESHOLD (the original rule,
+# which only suits dark logos on light backgrounds); callers opt in to "adaptive", which estimates
+# the background per logo
+CLIP_MODES = ("adaptive", "threshold")
+DEFAULT_MODE = "threshold"
+THRESHOLD = 50
+
+# Adaptive mode: pixels at least this far (city-block CIELAB distance, 8-bit scale) from the background
+# color are always foreground, and Otsu's threshold is never allowed below it, so flat images do not
+# split on noise
+MIN_BACKGROUND_DISTANCE = 24
+# Foreground specks smaller than this fraction of the image (or MIN_COMPONENT_PIXELS) are dropped
+MIN_COMPONENT_FRACTION = 0.0002
+MIN_COMPONENT_PIXELS = 4
+# Gaussian sigma (pixels) used to feather the alpha edge
+FEATHER_SIGMA = 0.8
+# A logo whose border is mostly transparent already has a usable alpha channel
+TRANSPARENT_BORDER_ALPHA = 128
+
+# Longest side of each responsive variant; sizes at or above the logo's own size are skipped
+RESPONSIVE_SIZES = (128, 256, 512)
+OUTPUT_FORMATS = ("png", "webp", "avif")
+WEBP_QUALITY = 90
+AVIF_QUALITY = 70
+
+
+def _border_pixels(image):
+    """The one-pixel frame of an image, as an (N, channels) array."""
+    return np.concatenate([image[0], image[-1], image[1:-1, 0], image[1:-1, -1]]).reshape(-1, image.shape[2])
+
+
+def adaptive_alpha(image):
+    """
+    Estimate a feathered alpha channel for a BGR or BGRA logo.
+
+    If the logo's border is already transparent its own alpha is used as the mask.
+    Otherwise the background color is the median of the border pixels, every pixel's
+    (city-block) CIELAB distance to it is thresholded with Otsu's method (never below
+    MIN_BACKGROUND_DISTANCE), and small connected components are discarded. The
+    mask edge is then feathered with a small Gaussian blur.
+    """
+    bgr = image[:, :, :3]
+    alpha_in = image[:, :, 3] if image.shape[2] == 4 else None
+
+    if alpha_in is not None and _border_pixels(alpha_in[:, :, None]).mean() < TRANSPARENT_BORDER_ALPHA:
+        mask = (alpha_in >= TRANSPARENT_BORDER_ALPHA).astype(np.uint8)
+    else:
+        background = np.median(_border_pixels(bgr), axis=0).astype(np.uint8).reshape(1, 1, 3)
+        background_lab = cv2.cvtColor(background, cv2.COLOR_BGR2LAB)[0, 0]
+        # City-block CIELAB distance to the background, kept in uint8 (saturates at 255)
+        difference = cv2.absdiff(cv2.cvtColor(bgr, cv2.COLOR_BGR2LAB), (*background_lab.tolist(), 0))
+        distance = cv2.transform(difference, np.ones((1, 3), dtype=np.float32))
+
+        otsu, _ = cv2.threshold(distance, 0, 1, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        _, mask = cv2.threshold(distance, max(otsu, MIN_BACKGROUND_DISTANCE), 1, cv2.THRESH_BINARY)
+
+    # Drop specks: keep only connected components of a meaningful size
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+    min_area = max(MIN_COMPONENT_PIXELS, MIN_COMPONENT_FRACTION * mask.size)
+    keep = stats[:, cv2.CC_STAT_AREA] >= min_area
+    keep[0] = False  # label 0 is the background
+    if not keep[1:].all():
+        mask = keep[labels].astype(np.uint8)
+
+    mask *= 255
+    alpha = cv2.GaussianBlur(mask, (0, 0), FEATHER_SIGMA) if FEATHER_SIGMA > 0 else mask
+    if alpha_in is not None:
+        alpha = np.minimum(alpha, alpha_in)
+    return alpha
+
+
+def clip_logo(image, mode=DEFAULT_MODE, threshold=THRESHOLD):
+    """
+    Desaturate a decoded logo (gray, BGR or BGRA) and make its background transparent.
+
+    mode is "threshold" (the default: gray levels at or below threshold are kept)
+    or "adaptive" (see adaptive_alpha). Returns a BGRA uint8 array.
+    """
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+    # Convert to grayscale to remove saturation (desaturate the image)
+    gray = cv2.cvtColor(image[:, :, :3], cv2.COLOR_BGR2GRAY)
+
+    if mode == "adaptive":
+        alpha_channel = adaptive_alpha(image)
+    elif mode == "threshold":
+        # Apply thresholding to create a mask to remove the background
+        _, alpha_channel = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY_INV)
+    else:
+        raise ValueError(f"Unknown clip mode: {mode}")
+
+    # Merge grayscale image with new alpha channel
+    return cv2.merge((gray, gray, gray, alpha_channel))
+
+
+def available_formats(formats=OUTPUT_FORMATS):
+    """Drop formats this OpenCV/Pillow build cannot encode."""
+    usable = []
+    for fmt in formats:
+        if fmt == "avif" and not features.check("avif"):
+            print("AVIF encoding is not available in this Pillow build; skipping AVIF variants")
+            continue
+        if fmt == "webp" and not cv2.haveImageWriter(".webp"):
+            print("WebP encoding is not available in this OpenCV build; skipping WebP variants")
+            continue
+        usable.append(fmt)
+    return usable
+
+
+def encode(bgra, fmt):
+    """Encode a BGRA array to PNG, WebP or AVIF bytes."""
+    if fmt == "png":
+        ok, buffer = cv2.imencode(".png", bgra)
+    elif fmt == "webp":
+        ok, buffer = cv2.imencode(".webp", bgra, [cv2.IMWRITE_WEBP_QUALITY, WEBP_QUALITY])
+    elif fmt == "avif":
+        out = BytesIO()
+        Image.fromarray(cv2.cvtColor(bgra, cv2.COLOR_BGRA2RGBA)).save(out, format="AVIF", quality=AVIF_QUALITY)
+        return out.getvalue()
+    else:
+        raise ValueError(f"Unsupported output format: {fmt}")
+    if not ok:
+        raise ValueError(f"Could not encode {fmt}")
+    return buffer.tobytes()
+
+
+def render_variants(clipped, sizes=RESPONSIVE_SIZES, formats=OUTPUT_FORMATS, name=OUTPUT_NAME):
+    """
+    Encode the full-size clip and each responsive size in every format.
+
+    Returns {file_name: encoded_bytes}, e.g. clipped.png, clipped-256w.webp.
+    """
+    height, width = clipped.shape[:2]
+    renditions = [("", clipped)]
+    for size in sorted(set(sizes)):
+        scale = size / max(height, width)
+        if scale >= 1:
+            continue
+        resized = cv2.resize(clipped, (max(1, round(width * scale)), max(1, round(height * scale))),
+                             interpolation=cv2.INTER_AREA)
+        renditions.append((f"-{size}w", resized))
+
+    return {
+        f"{name}{suffix}.{fmt}": encode(image, fmt)
+        for suffix, image in renditions
+        for fmt in formats
+    }
+
+
+def write_variants(variants, destinations):
+    """
+    Write each encoded variant once to the first destination directory and
+    hard-link it into the others (copying the bytes where linking is not possible).
+
+    Returns the number of bytes written per file name.
+    """
+    for destination in destinations:
+        os.makedirs(destination, exist_ok=True)
+
+    sizes = {}
+    for file_name, data in variants.items():
+        primary = os.path.join(destinations[0], file_name)
+        with open(primary, "wb") as f:
+            f.write(data)
+        for destination in destinations[1:]:
+            target = os.path.join(destination, file_name)
+            if os.path.lexists(target):
+                if os.path.samefile(primary, target):
+                    continue
+                os.remove(target)
+            try:
+                os.link(primary, target)
+            except OSError:
+                with open(target, "wb") as f:
+                    f.write(data)
+        sizes[file_name] = len(data)
+    return sizes
+
+
+def process_logo(logo_path, destinations, sizes=RESPONSIVE_SIZES, formats=OUTPUT_FORMATS,
+                 mode=DEFAULT_MODE, threshold=THRESHOLD):
+    """
+    Clip one logo and write all of its variants to every destination directory.
+
+    Returns {'logo', 'seconds', 'bytes': {file_name: size}, 'total_bytes'}.
+    """
+    start = time.perf_counter()
+
+    # Load the image with unchanged flag to preserve transparency
+    image = cv2.imread(logo_path, cv2.IMREAD_UNCHANGED)
+
+    # Ensure image is loaded correctly
+    if image is None:
+        if not os.path.exists(logo_path):
+            raise FileNotFoundError(f"Image at {logo_path} not found")
+        raise ValueError(f"Image at {logo_path} could not be decoded")
+
+    clipped = clip_logo(image, mode, threshold)
+    written = write_variants(render_variants(clipped, sizes, formats), destinations)
+    return {
+        "logo": logo_path,
+        "seconds": time.perf_counter() - start,
+        "bytes": written,
+        "total_bytes": sum(written.values())
+    }
+
+
+def find_logos(source):
+    """
+    Resolve a batch source to {business_id: logo_path}: a JSON manifest of
+    {"business_id": "path/to/logo.png"}, a directory of <business_id>.png files,
+    or a directory of <business_id>/logo.* folders.
+    """
+    if os.path.isfile(source):
+        base_dir = os.path.dirname(os.path.abspath(source))
+        with open(source, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        return {str(business_id): os.path.join(base_dir, path) for business_id, path in manifest.items()}
+
+    logos = {}
+    for entry in sorted(os.listdir(source)):
+        entry_path = os.path.join(source, entry)
+        if os.path.isfile(entry_path) and entry.lower().endswith(LOGO_EXTENSIONS):
+            logos[os.path.splitext(entry)[0]] = entry_path
+        elif os.path.isdir(entry_path):
+            for name in sorted(os.listdir(entry_path)):
+                if name.lower().startswith("logo") and name.lower().endswith(LOGO_EXTENSIONS):
+                    logos[entry] = os.path.join(entry_path, name)
+                    break
+    return logos
+
+
+def _process_job(job):
+    """Process pool worker: clip one business's logo, returning (business_id, report, error)."""
+    business_id, logo_path, destinations, sizes, formats, mode, threshold = job
+    try:
+        return business_id, process_logo(logo_path, destinations, sizes, formats, mode, threshold), None
+    except Exception as e:
+        return business_id, None, str(e)
+
+
+def process_logos(logos, output_root, sizes=RESPONSIVE_SIZES, formats=OUTPUT_FORMATS,
+                  mode=DEFAULT_MODE, threshold=THRESHOLD, workers=None):
+    """
+    Clip many logos in parallel; each business's variants go to output_root/<business_id>/.
 
-# Create output directories if they don't exist
-os.makedirs(output_dir, exist_ok=True)
-os.makedirs(assets_dir, exist_ok=True)
+    Returns {business_id: report} for the logos that were processed.
+    """
+    formats = available_formats(formats)
+    jobs = [(business_id, logo_path, [os.path.join(output_root, business_id)], sizes, formats, mode, threshold)
+            for business_id, logo_path in logos.items()]
+    reports = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for business_id, report, error in pool.map(_process_job, jobs):
+            if error:
+                print(f"Failed to process logo for {business_id}: {error}")
+                continue
+            reports[business_id] = report
+            print_report(business_id, report)
+    if reports:
+        total_seconds = sum(r["seconds"] for r in reports.values())
+        total_bytes = sum(r["total_bytes"] for r in reports.values())
+        print(f"Processed {len(reports)} logos in {total_seconds:.2f}s of worker time, "
+              f"{total_bytes / 1024:.1f} KiB written to {output_root}")
+    return reports
 
-# Load the image with unchanged flag to preserve transparency
-image = cv2.imread(input_path, cv2.IMREAD_UNCHANGED)
 
-# Ensure image is loaded correctly
-if image is None:
-    raise FileNotFoundError(f"Image at {input_path} not found")
+def print_report(label, report):
+    files = ", ".join(f"{name} {size / 1024:.1f} KiB" for name, size in report["bytes"].items())
+    print(f"{label}: {report['seconds'] * 1000:.1f} ms, {report['total_bytes'] / 1024:.1f} KiB ({files})")
 
-# Convert to grayscale to remove saturation (desaturate the image)
-gray = cv2.cvtColor(image[:, :, :3], cv2.COLOR_BGR2GRAY)
 
-# Apply thresholding to create a mask to remove the background
-_, binary_mask = cv2.threshold(gray, 50, 255, cv2.THRESH_BINARY_INV)
+def parse_args():
+    parser = argparse.ArgumentParser(description="Clip logos to a transparent background in several sizes and formats.")
+    parser.add_argument("--input", default=input_path, help="Logo to process (default: raw_data/step_1/logo.png)")
+    parser.add_argument("--batch", metavar="PATH",
+                        help="Directory of logos or JSON manifest of {business_id: logo_path}; processed in parallel")
+    parser.add_argument("--output-dir", default=os.path.join(data_dir, "raw_data", "clipped_logos"),
+                        help="Where batch mode writes <business_id>/clipped*.{png,webp,avif}")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(RESPONSIVE_SIZES),
+                        help="Longest side of each responsive variant")
+    parser.add_argument("--formats", nargs="+", choices=OUTPUT_FORMATS, default=list(OUTPUT_FORMATS))
+    parser.add_argument("--mode", choices=CLIP_MODES, default=DEFAULT_MODE,
+                        help="Background removal: a fixed gray threshold (default) or estimated per logo (adaptive)")
+    parser.add_argument("--threshold", type=int, default=THRESHOLD, help="Gray threshold for --mode threshold")
+    parser.add_argument("--workers", type=int, help="Process pool size for batch mode")
+    return parser.parse_args()
 
-# Create an alpha channel based on the binary mask
-alpha_channel = np.where(binary_mask == 255, 255, 0).astype(np.uint8)
 
-# Convert grayscale to a 3-channel image
-gray_3channel = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+def main():
+    args = parse_args()
+    if args.batch:
+        process_logos(find_logos(args.batch), args.output_dir, args.sizes, args.formats,
+                      args.mode, args.threshold, args.workers)
+        return
 
-# Merge grayscale image with new alpha channel
-output_image = cv2.merge((gray_3channel, alpha_channel))
+    # step_3 gets the primary copy; raw_data and the website assets get links to the same files
+    destinations = [output_dir, root_output_dir, assets_dir]
+    report = process_logo(args.input, destinations, args.sizes, available_formats(args.formats),
+                          args.mode, args.threshold)
+    print_report(os.path.basename(args.input), report)
 
-# Save the processed image with transparency to original locations
-cv2.imwrite(output_path, output_image)
-root_output = os.path.join(data_dir, "raw_data", "clipped.png")
-cv2.imwrite(root_output, output_image)
+    print(f"Processed image saved as {os.path.join(output_dir, OUTPUT_NAME + '.png')}")
+    print(f"Also linked to {os.path.join(root_output_dir, OUTPUT_NAME + '.png')} for other scripts to use")
+    print(f"Also linked to {os.path.join(assets_dir, OUTPUT_NAME + '.png')} for website assets")
 
-# Save to assets directory
-cv2.imwrite(assets_output_path, output_image)
 
-print(f"Processed image saved as {output_path}")
-print(f"Also copied to {root_output} for other scripts to use")
-print(f"Also copied to {assets_output_path} for website assets")
+if __name__ == "__main__":
+    main()
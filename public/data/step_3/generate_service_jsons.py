@@ -1,82 +1,28 @@
 #!/usr/bin/env python3
+import argparse
 import json
 import os
-import re
-import random
-import requests
-import time
-import dotenv
-from pathlib import Path
-from typing import Dict, List, Any
-
-# Load the DeepSeek API key from .env.deepseek file
-env_path = Path(__file__).parent.parent / ".env.deepseek"
-dotenv.load_dotenv(env_path)
-
-# Get API key from environment variable
-DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
-API_ENDPOINT = "https://api.deepseek.com/v1/chat/completions"
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_client import ENV_PATH, LLMError, get_client  # noqa: E402
+from llm_runner import DEFAULT_CONCURRENCY, run_concurrently  # noqa: E402
+from prompt_templates import render  # noqa: E402
+from research_parser import RESEARCH_SECTION_HEADINGS, parse_research  # noqa: E402
+from section_stream import parse_stream  # noqa: E402
+from service_knowledge import is_complete, knowledge_base, personalize  # noqa: E402
+from service_selection import DEFAULT_SERVICES, load_bbb_profile, select_services  # noqa: E402
+
+# Get API key from environment variable (llm_client loads .env.deepseek)
+DEEPSEEK_API_KEY = get_client().api_key
+
+# Research answers cover several long sections
+MAX_TOKENS = 4000
 
 if not DEEPSEEK_API_KEY:
     print("WARNING: DeepSeek API key not found. Please set it in the .env.deepseek file in the public/data directory.")
-    print(f"Looking for .env.deepseek at: {env_path}")
-
-# These are shorter service options matching the combined_data.json format
-# Services are 1-3 words max as required
-ROOFING_SERVICE_OPTIONS = {
-    "residential": [
-        "Shingling",
-        "Guttering",
-        "Chimney",
-        "Skylights",
-        "Siding",
-        "Ventilation",
-        "Insulation",
-        "Waterproofing",
-        "Repairs",
-        "Inspection",
-        "Metal Roof",
-        "Ridge Vents",
-        "Attic Fans",
-        "Fascia",
-        "Flashing",
-        "Soffits"
-    ],
-    "commercial": [
-        "Coatings",
-        "Built-Up",
-        "Metal Roof",
-        "Drainage",
-        "TPO Systems",
-        "EPDM",
-        "PVC Membrane",
-        "Modified Bitumen",
-        "Restoration",
-        "Maintenance",
-        "Flat Roof",
-        "Roof Deck",
-        "Green Roof",
-        "Solar Panels",
-        "Sheet Metal",
-        "Ventilation"
-    ]
-}
-
-# Default services from combined_data.json to use as fallbacks
-DEFAULT_SERVICES = {
-    "residential": [
-        {"id": 1, "name": "Shingling"},
-        {"id": 2, "name": "Guttering"},
-        {"id": 3, "name": "Chimney"},
-        {"id": 4, "name": "Skylights"}
-    ],
-    "commercial": [
-        {"id": 1, "name": "Coatings"},
-        {"id": 2, "name": "Built-Up"},
-        {"id": 3, "name": "Metal Roof"},
-        {"id": 4, "name": "Drainage"}
-    ]
-}
+    print(f"Looking for .env.deepseek at: {ENV_PATH}")
 
 def export_services_list(services=None):
     """Export the defined services to a shared JSON file.
@@ -145,261 +91,38 @@ def load_combined_data():
     return DEFAULT_SERVICES
 
 def get_bbb_services() -> Dict[str, List[Dict[str, Any]]]:
-    """Extract services from BBB profile data if available, otherwise use fallbacks."""
-    try:
-        # Try to load the combined_data.json first to get current services
-        current_services = load_combined_data()
-        
-        # Fix the path to look in raw_data/step_1 for BBB profile data
-        bbb_data_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "raw_data", "bbb_profile_data.json")
-        
-        print(f"Looking for BBB data at: {bbb_data_path}")
-        
-        # Try to load BBB profile data
-        with open(bbb_data_path, "r") as f:
-            bbb_data = json.load(f)
-        
-        if not bbb_data:
-            print("BBB data exists but is empty. Using current services.")
-            return current_services
-        
-        # Generate appropriate services using AI if DeepSeek key is available
-        if DEEPSEEK_API_KEY:
-            print("Using DeepSeek API to generate services based on BBB profile data...")
-            generated_services = generate_services_from_bbb(bbb_data, current_services)
-            if generated_services:
-                return generated_services
-            else:
-                print("Failed to generate services with DeepSeek. Using current services.")
-        else:
-            print("DeepSeek API key not available. Using current services.")
-            
-        # If no services generated, use current ones
-        return current_services
-        
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        print(f"Error loading BBB data: {e}. Using current services.")
-        return load_combined_data()
-
-def generate_services_from_bbb(bbb_data: Dict[str, Any], current_services: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
-    """Generate specific, realistic services based on BBB profile data."""
-    business_name = bbb_data.get('business_name', 'Roofing Company')
-    additional_services = bbb_data.get('additional_services', [])
-    service_hints = ', '.join(additional_services) if additional_services else "Roofing Services, Construction Services"
-    
-    print(f"Generating services for {business_name} based on: {service_hints}")
-    
-    # Format the current services for reference in the prompt
-    current_residential = ", ".join([s["name"] for s in current_services["residential"]])
-    current_commercial = ", ".join([s["name"] for s in current_services["commercial"]])
-    
-    # Convert the options to JSON string
-    residential_options = json.dumps(ROOFING_SERVICE_OPTIONS["residential"])
-    commercial_options = json.dumps(ROOFING_SERVICE_OPTIONS["commercial"])
-    
-    prompt = f"""
-    You are a professional roofing consultant. Select 8 specific roofing services for a company named "{business_name}".
-    
-    Additional info about the company: {service_hints}
-    
-    Current residential services: {current_residential}
-    Current commercial services: {current_commercial}
-    
-    Here are the available service options:
-    
-    RESIDENTIAL OPTIONS:
-    {residential_options}
-    
-    COMMERCIAL OPTIONS:
-    {commercial_options}
-    
-    Rules:
-    1. Select 4 residential services from the residential options
-    2. Select 4 commercial services from the commercial options
-    3. Try to keep the current services if they make sense for this company
-    4. All service names must be 1-3 words maximum
-    5. Choose services that would be realistic for a company named "{business_name}"
-    6. Consider the additional company info when making your selection: {service_hints}
-    
-    Return JSON only in this format with no additional text:
-    {{
-      "residential": [
-        {{"id": 1, "name": "Service 1"}},
-        {{"id": 2, "name": "Service 2"}},
-        {{"id": 3, "name": "Service 3"}},
-        {{"id": 4, "name": "Service 4"}}
-      ],
-      "commercial": [
-        {{"id": 1, "name": "Service 1"}},
-        {{"id": 2, "name": "Service 2"}},
-        {{"id": 3, "name": "Service 3"}},
-        {{"id": 4, "name": "Service 4"}}
-      ]
-    }}
-    
-    The service names must be exactly as they appear in the options lists above or match the current services.
     """
-    
-    try:
-        print("Calling DeepSeek API to select services from predefined options...")
-        response = call_deepseek_api(prompt)
-        
-        # Extract JSON from response
-        json_start = response.find('{')
-        json_end = response.rfind('}') + 1
-        
-        if json_start >= 0 and json_end > json_start:
-            json_str = response[json_start:json_end]
-            try:
-                services = json.loads(json_str)
-                
-                # Validate the structure 
-                if ('residential' in services and 'commercial' in services and
-                        len(services['residential']) == 4 and len(services['commercial']) == 4):
-                    
-                    # Verify all selected residential services are in the options list or current services
-                    valid_residential = ROOFING_SERVICE_OPTIONS['residential'] + [s["name"] for s in current_services["residential"]]
-                    valid_commercial = ROOFING_SERVICE_OPTIONS['commercial'] + [s["name"] for s in current_services["commercial"]]
-                    
-                    for service in services['residential']:
-                        if service['name'] not in valid_residential:
-                            print(f"Warning: '{service['name']}' is not in the valid residential options. Replacing with a current service.")
-                            service['name'] = current_services["residential"][service['id'] - 1]["name"]
-                    
-                    # Verify all selected commercial services are in the options list
-                    for service in services['commercial']:
-                        if service['name'] not in valid_commercial:
-                            print(f"Warning: '{service['name']}' is not in the valid commercial options. Replacing with a current service.")
-                            service['name'] = current_services["commercial"][service['id'] - 1]["name"]
-                    
-                    print("Successfully selected services:")
-                    for category, service_list in services.items():
-                        print(f"\n{category.upper()} SERVICES:")
-                        for service in service_list:
-                            print(f"  - {service['name']}")
-                    return services
-                else:
-                    print("Generated services have incorrect structure.")
-            except json.JSONDecodeError as e:
-                print(f"Failed to parse JSON from DeepSeek API response: {e}")
-        else:
-            print("Could not find valid JSON in DeepSeek API response.")
-        
-        print("Failed to generate services with DeepSeek. Using current services.")
-        return current_services
-    except Exception as e:
-        print(f"Error generating services: {e}. Using current services.")
-        return current_services
+    The services selected for the BBB profile in step 2 (service_selection.py), so both
+    steps agree without a second LLM call; the current services if there is no profile.
+    """
+    bbb_data = load_bbb_profile()
+    if not bbb_data:
+        print("No BBB profile data. Using current services.")
+        return load_combined_data()
+    return select_services(bbb_data)
 
 def call_deepseek_api(prompt: str) -> str:
     """Call the DeepSeek API with a given prompt and return the response."""
-    headers = {
-        "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    data = {
-        "model": "deepseek-chat",
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.7,
-        "max_tokens": 4000
-    }
-    
-    response = requests.post(API_ENDPOINT, headers=headers, json=data)
-    
-    if response.status_code == 200:
-        return response.json()["choices"][0]["message"]["content"]
-    else:
-        print(f"Error: {response.status_code}")
-        print(response.text)
-        return f"Error: {response.status_code} - {response.text}"
+    try:
+        return get_client().chat(prompt, max_tokens=MAX_TOKENS, call_site="step_3.generate_service_jsons")
+    except LLMError as e:
+        print(f"Error: {e}")
+        return f"Error: {e}"
 
 def generate_research_prompt(service_name: str, service_type: str) -> str:
     """Generate a comprehensive research prompt for DeepSeek about a roofing service."""
-    return f"""
-    Research the following roofing service thoroughly: {service_name} ({service_type})
-    
-    I need detailed information from the perspective of a professional roofing contractor. Please address these topics:
-    
-    1. Construction Process:
-       - Detailed step-by-step process for installing/implementing this service
-       - Materials required and their specifications
-       - Safety considerations and building code requirements
-       - Timeline estimates for completion
-    
-    2. Variants:
-       - What are the different types/styles/materials available for this service?
-       - How do these variants differ in terms of durability, appearance, and cost?
-       - What are the premium vs. budget options?
-    
-    3. Sales and Supply Chain:
-       - How do roofers typically procure materials for this service?
-       - Do they usually have inventory or order per project?
-       - What's the typical markup or profit margin for this service?
-       - How are these services typically quoted or estimated?
-    
-    4. Advantages and Benefits:
-       - What are the main selling points for this service?
-       - How does it compare to alternative solutions?
-       - What long-term benefits should be highlighted to customers?
-       - Any energy efficiency or insurance benefits?
-    
-    5. Marketing Considerations:
-       - What aspects of this service do roofers typically emphasize in marketing?
-       - What visuals or demonstrations are most effective in selling this service?
-       - Do roofers typically show pricing publicly for this service? Why or why not?
-       - What customer concerns or questions typically arise?
-    
-    6. Warranty and Maintenance:
-       - What warranties are typically offered?
-       - What maintenance requirements exist for this service?
-       - What is the expected lifespan of this roof/service?
-       - What factors can extend or reduce the lifespan?
-    
-    Format your response with section markers like this:
-    
-    ## **1. Construction Process**
-    [Your detailed content here]
-    
-    ## **2. Variants**
-    [Your detailed content here]
-    
-    And so on for each section. Provide comprehensive information a roofing website could use to create authoritative service pages.
-    """
+    return render("research.detailed", service_name=service_name, service_type=service_type)
 
 def extract_section(text: str, section_name: str) -> str:
     """Extract a section from the research results."""
-    try:
-        section_markers = {
-            "construction_process": ["## **1. Construction Process**", "## **2"],
-            "variants": ["## **2. Variants**", "## **3"],
-            "sales_supply": ["## **3. Sales and Supply Chain**", "## **4"],
-            "advantages": ["## **4. Advantages and Benefits**", "## **5"],
-            "marketing": ["## **5. Marketing Considerations**", "## **6"],
-            "warranty_maintenance": ["## **6. Warranty and Maintenance**", "##"]
-        }
-        
-        markers = section_markers.get(section_name)
-        if not markers:
-            return "Section not found"
-        
-        start_marker, end_marker = markers
-        
-        start = text.find(start_marker)
-        if start == -1:
-            return f"**  \n\nSection placeholder for {section_name}"
-        
-        start += len(start_marker)
-        
-        end = text.find(end_marker, start)
-        if end == -1:
-            end = len(text)
-        
-        content = text[start:end].strip()
-        return f"**  \n\n{content}"
-    except Exception as e:
-        print(f"Error extracting section {section_name}: {e}")
-        return f"**  \n\nError extracting {section_name}"
+    heading = RESEARCH_SECTION_HEADINGS.get(section_name)
+    if not heading:
+        return "Section not found"
+    
+    section = parse_research(text).find(heading)
+    if section is None:
+        return f"**  \n\nSection placeholder for {section_name}"
+    return f"**  \n\n{section.body}"
 
 def create_slug(category, service_id, service_name):
     """Create a proper slug for service URLs that works with App.jsx routes."""
@@ -409,8 +132,23 @@ def create_slug(category, service_id, service_name):
     prefix = 'r' if category == 'residential' else 'c'
     return f"{category}-{prefix}{service_id}-{cleaned_name}"
 
-def research_service(service: Dict[str, Any], category: str) -> Dict[str, Any]:
-    """Research a service and return structured research data using DeepSeek."""
+def research_service(service: Dict[str, Any], category: str,
+                     on_section: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
+    """
+    Research a service and return structured research data using DeepSeek.
+    
+    The answer is streamed and split into sections as it arrives; on_section(section, text)
+    is called with each formatted section as soon as it is complete. Research already in the
+    service knowledge base is returned without a request; complete answers are stored there.
+    """
+    stored = knowledge_base().get("detailed", category, service['name'])
+    if stored is not None:
+        print(f"Using stored research for {service['name']} ({category})")
+        if on_section is not None:
+            for section_name in RESEARCH_SECTION_HEADINGS:
+                on_section(section_name, stored[section_name])
+        return stored
+    
     print(f"Researching {service['name']} ({category})...")
     
     if not DEEPSEEK_API_KEY:
@@ -421,23 +159,28 @@ def research_service(service: Dict[str, Any], category: str) -> Dict[str, Any]:
     research_prompt = generate_research_prompt(service['name'], category)
     
     try:
-        # Call DeepSeek API
-        research_results = call_deepseek_api(research_prompt)
+        # Stream the answer and format each section (as extract_section does) the moment it completes
+        research_data = {}
         
-        # Extract each section from the research results
-        research_data = {
-            "construction_process": extract_section(research_results, "construction_process"),
-            "variants": extract_section(research_results, "variants"),
-            "sales_supply": extract_section(research_results, "sales_supply"),
-            "advantages": extract_section(research_results, "advantages"),
-            "marketing": extract_section(research_results, "marketing"),
-            "warranty_maintenance": extract_section(research_results, "warranty_maintenance")
-        }
+        def section_done(section_name, content):
+            # An empty section stays missing: it gets the placeholder and keeps the answer out of the knowledge base
+            if not content.strip():
+                return
+            research_data[section_name] = f"**  \n\n{content}"
+            if on_section is not None:
+                on_section(section_name, research_data[section_name])
         
-        # Sleep to avoid rate limits
-        time.sleep(2)
+        stream = get_client().chat_stream(research_prompt, max_tokens=MAX_TOKENS,
+                                          call_site="step_3.generate_service_jsons")
+        parse_stream(stream, RESEARCH_SECTION_HEADINGS, section_done)
         
-        return research_data
+        # Only answers with every section are worth sharing; placeholders stay with this run
+        if is_complete(research_data, RESEARCH_SECTION_HEADINGS):
+            knowledge_base().put("detailed", category, service['name'], research_data)
+        return {
+            section_name: research_data.get(section_name, f"**  \n\nSection placeholder for {section_name}")
+            for section_name in RESEARCH_SECTION_HEADINGS
+        }
     except Exception as e:
         print(f"Error researching service {service['name']}: {e}")
         return create_placeholder_research(service['name'])
@@ -472,39 +215,37 @@ def create_block(block_name: str, config: dict, search_terms: str = "", image_pa
         block["imagePath"] = image_path
     return block
 
-def generate_service_blocks(service: dict, category: str) -> List[dict]:
-    """Generate blocks for a service using available block components"""
-    blocks = []
-    service_id = service['id']
-    service_name = service['name']
-    
-    # 1. HeroBlock - Main service banner
-    blocks.append(create_block(
-        "HeroBlock",
-        {
-            "title": f"{service_name}",
-            "subtitle": f"Professional {category.capitalize()} Roofing Services",
-            "backgroundOpacity": 0.6,
-            "buttonText": "Get Free Quote",
-            "buttonUrl": "/contact"
-        },
-        f"{service_name} hero banner",
-        f"/assets/images/services/{category}/{service_id}/hero.jpg"
-    ))
-
-    # 2. HeaderBannerBlock - Service Overview
-    blocks.append(create_block(
-        "HeaderBannerBlock",
-        {
-            "title": "Professional Service",
-            "subtitle": f"Expert {service_name} Solutions for Your Property"
-        },
-        f"{service_name} overview"
-    ))
+def overview_blocks(service_name: str, category: str, service_id) -> List[dict]:
+    """The HeroBlock and HeaderBannerBlock that open every service page."""
+    return [
+        # 1. HeroBlock - Main service banner
+        create_block(
+            "HeroBlock",
+            {
+                "title": f"{service_name}",
+                "subtitle": f"Professional {category.capitalize()} Roofing Services",
+                "backgroundOpacity": 0.6,
+                "buttonText": "Get Free Quote",
+                "buttonUrl": "/contact"
+            },
+            f"{service_name} hero banner",
+            f"/assets/images/services/{category}/{service_id}/hero.jpg"
+        ),
+        # 2. HeaderBannerBlock - Service Overview
+        create_block(
+            "HeaderBannerBlock",
+            {
+                "title": "Professional Service",
+                "subtitle": f"Expert {service_name} Solutions for Your Property"
+            },
+            f"{service_name} overview"
+        ),
+    ]
 
-    # 3. GeneralList - Installation Steps
-    installation_steps = [step.strip() for step in service['installation'].split('\n') if step.strip()]
-    blocks.append(create_block(
+def installation_block(installation, service_name: str, category: str, service_id) -> dict:
+    """3. GeneralList - Installation Steps"""
+    installation_steps = [step.text for step in installation.steps()] or installation.points()
+    return create_block(
         "GeneralList",
         {
             "title": "Installation Process",
@@ -512,25 +253,27 @@ def generate_service_blocks(service: dict, category: str) -> List[dict]:
             "listStyle": "numbered"
         },
         f"{service_name} installation steps"
-    ))
+    )
 
-    # 4. ListDropdown - Maintenance Information
-    maintenance_items = [item.strip() for item in service['maintenance'].split('\n') if item.strip()]
-    blocks.append(create_block(
+def maintenance_block(maintenance, service_name: str, category: str, service_id) -> dict:
+    """4. ListDropdown - Maintenance Information"""
+    maintenance_items = [item for item in maintenance.all_items() if item.text]
+    return create_block(
         "ListDropdown",
         {
             "title": "Maintenance Guide",
             "items": [
-                {"title": f"Maintenance Step {i+1}", "content": item}
+                {"title": item.key or f"Maintenance Step {i+1}", "content": item.value if item.key else item.text}
                 for i, item in enumerate(maintenance_items[:4])
             ]
         },
         f"{service_name} maintenance"
-    ))
+    )
 
-    # 5. GridImageTextBlock - Repair Services
-    repair_points = [point.strip() for point in service['repair'].split('\n') if point.strip()]
-    blocks.append(create_block(
+def repair_block(repair, service_name: str, category: str, service_id) -> dict:
+    """5. GridImageTextBlock - Repair Services"""
+    repair_points = repair.points()
+    return create_block(
         "GridImageTextBlock",
         {
             "title": "Repair Services",
@@ -543,11 +286,16 @@ def generate_service_blocks(service: dict, category: str) -> List[dict]:
             ]
         },
         f"{service_name} repairs"
-    ))
+    )
 
-    # 6. PricingGrid - Service Variants
-    variants = [var.strip() for var in service['variants'].split('\n') if var.strip()]
-    blocks.append(create_block(
+def variants_block(variant_tree, service_name: str, category: str, service_id) -> dict:
+    """6. PricingGrid - Service Variants"""
+    # Table rows name the variants best, then numbered options, then bold labels, then plain lines
+    variants = ([row[0] for table in variant_tree.all_tables() for row in table.rows if row and row[0]]
+                or [item.key or item.text for item in variant_tree.all_items() if item.kind == "numbered"]
+                or [pair.key for pair in variant_tree.pairs()]
+                or variant_tree.points())
+    return create_block(
         "PricingGrid",
         {
             "title": "Service Options",
@@ -562,10 +310,11 @@ def generate_service_blocks(service: dict, category: str) -> List[dict]:
             ]
         },
         f"{service_name} pricing"
-    ))
+    )
 
-    # 7. ActionButtonBlock - Call to Action
-    blocks.append(create_block(
+def action_block(service_name: str) -> dict:
+    """7. ActionButtonBlock - Call to Action"""
+    return create_block(
         "ActionButtonBlock",
         {
             "title": "Ready to Get Started?",
@@ -574,39 +323,129 @@ def generate_service_blocks(service: dict, category: str) -> List[dict]:
             "buttonUrl": "/contact"
         },
         f"{service_name} cta"
-    ))
+    )
 
+# Step 2 research section -> the block built from its parsed tree, in page order
+SECTION_BLOCKS = {
+    "installation": installation_block,
+    "maintenance": maintenance_block,
+    "repair": repair_block,
+    "variants": variants_block,
+}
+
+def generate_service_blocks(service: dict, category: str) -> List[dict]:
+    """Generate blocks for a service using available block components"""
+    service_id = service['id']
+    service_name = service['name']
+    
+    # Each research section is parsed once; every block reads items from its section's tree
+    blocks = overview_blocks(service_name, category, service_id)
+    for section, build in SECTION_BLOCKS.items():
+        blocks.append(build(parse_research(service[section]), service_name, category, service_id))
+    blocks.append(action_block(service_name))
     return blocks
 
+def service_entry(service: dict, category: str, blocks: List[dict]) -> dict:
+    return {
+        "id": service["id"],
+        "name": service["name"],
+        "category": category,
+        "slug": f"{category}-{service['id']}-{service['name'].lower().replace(' ', '-')}",
+        "blocks": blocks
+    }
+
+class StreamedServiceBlocks:
+    """
+    Builds one service's blocks while its research streams in: on_section is passed to
+    step 2's research_service, and each section's block is built the moment the section
+    is complete rather than after the whole answer (and every other service) is done.
+
+    Usage:
+        builder = StreamedServiceBlocks(service, category, business_name)
+        research = research_sections(service, category, builder.on_section)
+        entry = builder.entry(research)
+    """
+
+    __slots__ = ("service", "category", "business_name", "blocks")
+
+    def __init__(self, service: dict, category: str, business_name: str = ""):
+        self.service = service
+        self.category = category
+        self.business_name = business_name
+        self.blocks: Dict[str, dict] = {}
+
+    def on_section(self, section: str, text: str):
+        build = SECTION_BLOCKS.get(section)
+        if build is not None:
+            tree = parse_research(personalize(text, self.business_name))
+            self.blocks[section] = build(tree, self.service['name'], self.category, self.service['id'])
+
+    def entry(self, research: Dict[str, str]) -> dict:
+        """The services.json entry; sections never streamed (stored defaults after an error) are built from research."""
+        for section in SECTION_BLOCKS:
+            if section not in self.blocks:
+                self.on_section(section, research.get(section, ""))
+        blocks = overview_blocks(self.service['name'], self.category, self.service['id'])
+        blocks.extend(self.blocks[section] for section in SECTION_BLOCKS)
+        blocks.append(action_block(self.service['name']))
+        return service_entry(self.service, self.category, blocks)
+
+def research_service_blocks() -> Dict[str, List[dict]]:
+    """
+    Research the selected services with step 2's streamed per-service prompt (concurrently,
+    through the service knowledge base) and build each block as its section arrives.
+    """
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "step_2"))
+    # Step 2's four-section research, not this module's six-section research_service
+    from research_services import research_service as research_sections
+    
+    services = get_bbb_services()
+    business_name = load_bbb_profile().get("business_name", "")
+    builders = [StreamedServiceBlocks(service, category, business_name)
+                for category in ['residential', 'commercial'] for service in services[category]]
+    
+    print(f"Researching {len(builders)} services (up to {DEFAULT_CONCURRENCY} at a time):")
+    results = run_concurrently(research_sections,
+                               [(builder.service, builder.category, builder.on_section) for builder in builders])
+    
+    output_services = {
+        "residential": [],
+        "commercial": []
+    }
+    for builder, research in zip(builders, results):
+        print(f"  - Blocks ready for {builder.service['name']} ({builder.category})")
+        output_services[builder.category].append(builder.entry(research))
+    return output_services
+
 def main():
     """Generate services.json for ServicePage.jsx using research data"""
+    parser = argparse.ArgumentParser(description="Generate services.json for ServicePage.jsx")
+    parser.add_argument("--research", action="store_true",
+                        help="Research the selected services here, building each block as its section streams in, "
+                             "instead of reading step 2's services_research.json")
+    args = parser.parse_args()
+    
     print("Starting service JSON generation...")
     
     try:
-        # Load research data
-        research_data = load_research_data()
-        
-        # Transform into services with blocks
-        output_services = {
-            "residential": [],
-            "commercial": []
-        }
-        
-        for category in ['residential', 'commercial']:
-            print(f"\nProcessing {category} services:")
-            for service in research_data[category]:
-                print(f"  - Generating blocks for {service['name']}")
-                
-                # Create service entry with blocks
-                service_entry = {
-                    "id": service["id"],
-                    "name": service["name"],
-                    "category": category,
-                    "slug": f"{category}-{service['id']}-{service['name'].lower().replace(' ', '-')}",
-                    "blocks": generate_service_blocks(service, category)
-                }
-                
-                output_services[category].append(service_entry)
+        if args.research:
+            output_services = research_service_blocks()
+        else:
+            # Load research data
+            research_data = load_research_data()
+            
+            # Transform into services with blocks
+            output_services = {
+                "residential": [],
+                "commercial": []
+            }
+            
+            for category in ['residential', 'commercial']:
+                print(f"\nProcessing {category} services:")
+                for service in research_data[category]:
+                    print(f"  - Generating blocks for {service['name']}")
+                    output_services[category].append(
+                        service_entry(service, category, generate_service_blocks(service, category)))
         
         # Save to services.json
         output_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
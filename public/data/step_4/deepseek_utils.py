@@ -1,19 +1,16 @@
 #!/usr/bin/env python3
 
 import os
-import requests
-import json
+import sys
 import logging
-import time
-import random
-from pathlib import Path
-from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_client import LLMError, get_client  # noqa: E402
 
 logger = logging.getLogger(__name__)
 
-# Load environment variables from .env.deepseek file
-env_path = Path(__file__).parent.parent / ".env.deepseek"
-load_dotenv(env_path)
+# Completion token limit for step 4's short JSON answers
+MAX_TOKENS = 1000
 
 # Fallback text for testing when API key is not available
 FALLBACK_TEXTS = [
@@ -21,57 +18,31 @@ FALLBACK_TEXTS = [
     """{"description1": "At Cowboys-Vaqueros Construction, we bring over a decade of roofing expertise to homes and businesses across Georgia. Our skilled team specializes in comprehensive roofing solutions, from minor repairs to complete installations, all delivered with exceptional craftsmanship and attention to detail.", "description2": "We understand that your roof is one of your property's most critical components. That's why we use only premium materials and proven techniques, backed by extensive warranties and our personal guarantee of satisfaction on every project we complete.", "cards": [{"title": "Certified Team", "desc": "Our technicians undergo rigorous training and certification, ensuring they stay current with the latest roofing technologies and safety protocols.", "icon": "GraduationCap"}, {"title": "Fast Response", "desc": "We provide prompt service for both scheduled maintenance and emergency situations, minimizing disruption to your home or business.", "icon": "Clock"}, {"title": "BBB Accredited", "desc": "Our accreditation with the Better Business Bureau demonstrates our commitment to resolving customer concerns and maintaining high standards.", "icon": "Certificate"}, {"title": "Comprehensive Service", "desc": "From initial inspection to final installation, we handle every aspect of your roofing project with professional care and expertise.", "icon": "Tools"}]}"""
 ]
 
-def query_deepseek_api(prompt: str) -> str:
+def query_deepseek_api(prompt: str, max_tokens: int = MAX_TOKENS, call_site: str = "step_4") -> str:
     """
     Query the DeepSeek API with a prompt.
     
     Args:
         prompt (str): The prompt to send to the API.
+        max_tokens (int): Completion token limit for this call site.
+        call_site (str): Label recorded in the client's per-call metrics.
         
     Returns:
         str: The API response text or a fallback text if API call fails.
     """
-    api_key = os.getenv('DEEPSEEK_API_KEY')
-    if not api_key:
+    client = get_client()
+    if not client.api_key:
         logger.warning("No DeepSeek API key found. Using fallback text.")
         return _get_fallback_response(prompt)
-        
-    api_url = "https://api.deepseek.com/v1/chat/completions"
-    
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
-    
-    data = {
-        "model": "deepseek-chat",
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.7,
-        "max_tokens": 1000
-    }
     
     try:
         logger.info("Sending request to DeepSeek API")
-        response = requests.post(api_url, headers=headers, json=data)
-        response.raise_for_status()
-        
-        result = response.json()
-        if "choices" in result and len(result["choices"]) > 0:
-            logger.info("Received successful response from DeepSeek API")
-            return result["choices"][0]["message"]["content"]
-        else:
-            logger.error(f"Unexpected API response format: {result}")
-            return _get_fallback_response(prompt)
-            
-    except requests.exceptions.RequestException as e:
+        response = client.chat(prompt, max_tokens=max_tokens, call_site=call_site)
+        logger.info("Received successful response from DeepSeek API")
+        return response
+    except LLMError as e:
         logger.error(f"API request failed: {str(e)}")
         return _get_fallback_response(prompt)
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse API response: {str(e)}")
-        return _get_fallback_response(prompt)
-    except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        return _get_fallback_response(prompt)
 
 def _get_fallback_response(prompt: str) -> str:
     """Generate a fallback response when the API is unavailable."""
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 
 import os
+import sys
 import json
+import heapq
 import logging
 import time
 import random
@@ -9,7 +11,14 @@ import re
 from typing import Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
 from pathlib import Path
-from deepseek_utils import query_deepseek_api
+
+# Shared modules (geocoder, llm_client, ...) live in public/data
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from deepseek_utils import query_deepseek_api  # noqa: E402
+from geocoder import US_CENTROID, geocode  # noqa: E402
+from llm_client import get_client  # noqa: E402
+from prompt_templates import render  # noqa: E402
+from service_selection import default_services, load_selection  # noqa: E402
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -26,7 +35,8 @@ class CombinedDataGenerator:
     Uses a template approach where placeholder variables are replaced with actual data.
     """
     
-    def __init__(self, bbb_profile_path: str, reviews_path: str, insights_path: str = None):
+    def __init__(self, bbb_profile_path: str, reviews_path: str, insights_path: str = None,
+                 review_aggregates_path: str = None):
         """Initialize with paths to various data sources."""
         logger.info("Initializing CombinedDataGenerator")
         
@@ -39,10 +49,14 @@ class CombinedDataGenerator:
         if not self.bbb_profile:
             logger.warning("BBB profile data is empty or failed to load")
         
-        logger.info(f"Loading reviews from: {reviews_path}")
-        self.reviews = self._load_json(reviews_path)
-        if not self.reviews:
-            logger.warning("Reviews data is empty or failed to load")
+        # Prefer the precomputed aggregates from step 2 so the raw reviews never need re-scanning
+        self.review_aggregates = {}
+        if review_aggregates_path and os.path.exists(review_aggregates_path):
+            logger.info(f"Loading review aggregates from: {review_aggregates_path}")
+            self.review_aggregates = self._load_json(review_aggregates_path)
+        
+        self.reviews_path = reviews_path
+        self._reviews = None
         
         if insights_path:
             logger.info(f"Loading research insights from: {insights_path}")
@@ -65,28 +79,30 @@ class CombinedDataGenerator:
         self.output_file = os.path.join(data_dir, "combined_data.json")
         logger.info(f"Output file will be saved to: {self.output_file}")
     
+    @property
+    def reviews(self) -> List[Dict[str, Any]]:
+        """Raw sentiment reviews, loaded on first use only."""
+        if self._reviews is None:
+            logger.info(f"Loading reviews from: {self.reviews_path}")
+            self._reviews = self._load_json(self.reviews_path)
+            if not self._reviews:
+                logger.warning("Reviews data is empty or failed to load")
+        return self._reviews
+    
     def _load_services(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Load services from the shared roofing_services.json file."""
+        """
+        Load the services selected in step 2: the stored selection for this BBB profile,
+        else the shared roofing_services.json, else the defaults.
+        """
+        services = load_selection(self.bbb_profile or None)
+        if services is not None:
+            logger.info("Using the stored service selection")
+            return services
+        
         script_dir = os.path.dirname(os.path.abspath(__file__))
         data_dir = os.path.dirname(script_dir)
         services_path = os.path.join(data_dir, "roofing_services.json")
         
-        # Default services in case the file doesn't exist
-        default_services = {
-            "residential": [
-                {"id": 1, "name": "Shingling"},
-                {"id": 2, "name": "Guttering"},
-                {"id": 3, "name": "Chimney"},
-                {"id": 4, "name": "Skylights"}
-            ],
-            "commercial": [
-                {"id": 1, "name": "Coatings"},
-                {"id": 2, "name": "Built-Up"},
-                {"id": 3, "name": "Metal Roof"},
-                {"id": 4, "name": "Drainage"}
-            ]
-        }
-        
         try:
             if os.path.exists(services_path):
                 with open(services_path, 'r', encoding='utf-8') as f:
@@ -95,10 +111,10 @@ class CombinedDataGenerator:
                 return services
             else:
                 logger.warning(f"Services file not found at {services_path}, using default services")
-                return default_services
+                return default_services()
         except Exception as e:
             logger.error(f"Error loading services file: {e}")
-            return default_services
+            return default_services()
     
     def _load_json(self, filepath: str) -> Dict[str, Any]:
         """Load and return JSON data from file."""
@@ -140,23 +156,9 @@ class CombinedDataGenerator:
         
         
         # Ask DeepSeek if/how the name should be split
-        prompt = f"""
-        I have a roofing business name: "{business_name}"
-        
-        Should this name be split into a main title and subtitle for a website header? If yes, how would you split it?
+        prompt = render("business_name.split", business_name=business_name)
         
-        Some guidelines:
-        1. If the name is very short (1-2 words), don't split it and just leave the subtitle empty
-        2. If the name contains words like "Construction", "Roofing", "Contractors", "Company", etc., these are good candidates for the subtitle
-        3. If the name has a clear brand name followed by a descriptor, split between those
-        
-        Return your answer as a JSON with two keys:
-        - "shouldSplit": boolean (true or false)
-        - "mainTitle": string (the main title portion or the entire name if not splitting)
-        - "subTitle": string (the subtitle portion, or empty string if not splitting)
-        """
-        
-        response = query_deepseek_api(prompt)
+        response = query_deepseek_api(prompt, max_tokens=200, call_site="step_4.business_name")
         
         try:
             # Extract JSON from response
@@ -197,19 +199,25 @@ class CombinedDataGenerator:
     
     def _extract_best_reviews(self, count: int = 6) -> List[Dict[str, Any]]:
         """Extract the best reviews based on sentiment and rating."""
-        if not self.reviews:
-            return []
+        top_reviews = self.review_aggregates.get('top_reviews')
+        if top_reviews is not None and (len(top_reviews) >= count or
+                                        len(top_reviews) == self.review_aggregates.get('review_count')):
+            # Already ranked by (rating, polarity) in step 2
+            best_reviews = top_reviews[:count]
+        else:
+            if not self.reviews:
+                return []
             
-        # Sort reviews by rating and sentiment polarity
-        sorted_reviews = sorted(
-            self.reviews,
-            key=lambda x: (float(x.get('rating', 0)), float(x.get('polarity', 0))),
-            reverse=True
-        )
+            # Select the top reviews by rating and sentiment polarity
+            best_reviews = heapq.nlargest(
+                count,
+                self.reviews,
+                key=lambda x: (float(x.get('rating', 0)), float(x.get('polarity', 0)))
+            )
         
         # Format the top reviews
         formatted_reviews = []
-        for review in sorted_reviews[:count]:
+        for review in best_reviews:
             formatted_review = {
                 "name": review.get('name', 'Customer'),
                 "stars": int(float(review.get('rating', 5))),
@@ -234,41 +242,29 @@ class CombinedDataGenerator:
     
     def _get_geocoordinates_from_address(self, address: str) -> Tuple[float, float]:
         """
-        Get geocoordinates (latitude, longitude) from address using DeepSeek API.
-        
-        Since we don't have direct access to mapping APIs, we'll use DeepSeek to
-        estimate the coordinates based on the address.
-        """
-        prompt = f"""
-        Please provide latitude and longitude coordinates for this address: {address}
-        
-        Return only the coordinates as a JSON with 'lat' and 'lng' keys.
-        Example: {{"lat": 33.7490, "lng": -84.3880}}
+        Get geocoordinates (latitude, longitude) from address with the offline geocoder.
         
-        Do not include any additional information or explanation, just the JSON.
+        The ZIP code or city is looked up in the local centroid table (geocoder.py). When the table
+        has neither, or no table has been built (raw_data/geo/ is not committed), DeepSeek is asked
+        unless GEOCODER_LLM=0; the state centroid is the last resort.
         """
-        
-        response = query_deepseek_api(prompt)
-        
-        try:
-            # Extract JSON from response
-            if '{' in response and '}' in response:
-                json_str = response[response.find('{'):response.rfind('}')+1]
-                result = json.loads(json_str)
-                
-                lat = result.get('lat', 33.7490)  # Default to Atlanta coordinates
-                lng = result.get('lng', -84.3880)
-                
-                return lat, lng
-            else:
-                # Default to Atlanta coordinates if parsing fails
-                return 33.7490, -84.3880
-        except:
-            # Default to Atlanta coordinates if any error occurs
-            return 33.7490, -84.3880
+        result = geocode(address)
+        if result is None:
+            logger.warning(f"Could not geocode address {address!r}; centering the map on the US")
+            return US_CENTROID
+        if result.source == "state":
+            logger.warning(f"Only the state of {address!r} is known; using the {result.state} centroid")
+        else:
+            logger.info(f"Geocoded address by {result.source}: {result.lat}, {result.lng}")
+        return result.lat, result.lng
     
     def _extract_city_from_address(self, address: str) -> str:
         """Extract city from address string."""
+        # The geocoder recognizes cities run together with the street ("Tipperary TrlSharpsburg")
+        result = geocode(address)
+        if result is not None and result.city:
+            return result.city
+        
         # Try simple pattern matching for city extraction
         city_pattern = r'(?:,\s*|\s+)([A-Za-z\s]+)(?:,\s*[A-Z]{2}|$)'
         match = re.search(city_pattern, address)
@@ -589,6 +585,7 @@ def main():
     bbb_profile_path = os.path.join(raw_data_dir, "step_1", "bbb_profile_data.json")
     reviews_path = os.path.join(raw_data_dir, "step_2", "sentiment_reviews.json")
     insights_path = os.path.join(raw_data_dir, "step_2", "roofing_business_insights.json")
+    review_aggregates_path = os.path.join(raw_data_dir, "step_2", "review_aggregates.json")
     
     # Ensure output directory exists
     output_dir = os.path.join(raw_data_dir, "step_4")
@@ -603,13 +600,15 @@ def main():
     logger.info(f"Using bbb_profile_path: {bbb_profile_path}")
     logger.info(f"Using reviews_path: {reviews_path}")
     logger.info(f"Using insights_path: {insights_path}")
+    logger.info(f"Using review_aggregates_path: {review_aggregates_path}")
     logger.info(f"Using clipped_logo_path: {clipped_logo_path}")
     
     # Initialize and run the generator
     generator = CombinedDataGenerator(
         bbb_profile_path=bbb_profile_path,
         reviews_path=reviews_path,
-        insights_path=insights_path
+        insights_path=insights_path,
+        review_aggregates_path=review_aggregates_path
     )
     
     # Set the output file to be in the step_4 directory
@@ -617,6 +616,7 @@ def main():
     
     # Run the generation process
     generator.generate()
+    get_client().print_metrics()
     
 if __name__ == "__main__":
     main()
\ No newline at end of file
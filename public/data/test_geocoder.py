@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Address parsing and the offline fallbacks of geocoder.py.
+
+    python -m pytest test_geocoder.py
+"""
+
+from geocoder import STATE_CENTROIDS, Geocoder, parse_address
+
+
+def test_state_after_comma_or_space():
+    for address in ("PO Box 5, Atlanta, GA", "PO Box 5, Atlanta GA", "PO Box 5, Atlanta GA."):
+        parsed = parse_address(address)
+        assert (parsed.zip, parsed.state, parsed.city_candidates) == (None, "GA", ["Atlanta"])
+
+
+def test_state_and_zip():
+    parsed = parse_address("123 Main St, Marietta GA 30060-1234")
+    assert (parsed.zip, parsed.state, parsed.city_candidates) == ("30060", "GA", ["Marietta"])
+
+
+def test_run_together_street_and_city():
+    parsed = parse_address("40 Tipperary TrlSharpsburg, GA 30277-3502")
+    assert parsed.city_candidates[-1] == "Sharpsburg"
+
+
+def test_unknown_two_letters_are_not_a_state():
+    assert parse_address("PO Box 5, Atlanta XX").state is None
+    assert parse_address("N/A").state is None
+
+
+def test_state_centroid_without_table_or_llm():
+    with Geocoder(table_path="/nonexistent/centroids.bin", use_llm=False) as coder:
+        result = coder.geocode("PO Box 5, Atlanta GA")
+        assert (result.source, result.state) == ("state", "GA")
+        assert (result.lat, result.lng) == STATE_CENTROIDS["GA"]
+        assert coder.geocode("Somewhere") is None
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Edge cases of the research_parser tokenizer.
+
+    python -m pytest test_research_parser.py
+"""
+
+from research_parser import RESEARCH_SECTION_HEADINGS, heading_key, parse_research
+
+DETAILED = """## **1. Construction Process**
+### **Step-by-Step Process**
+1. **Inspection:** Check the deck.
+TIP:
+2. **Underlayment:** Roll out the membrane.
+NOTE:
+3. **Shingles:** Nail in staggered rows.
+
+## **2. Variants**
+| Type | Durability | Cost |
+|------|------------|------|
+| **Asphalt** | 20 years | $4 |
+| Metal | 50 years | $9 |
+"""
+
+
+def test_label_under_heading_does_not_close_it():
+    construction = parse_research(DETAILED).find(RESEARCH_SECTION_HEADINGS["construction_process"])
+    assert [step.key for step in construction.steps()] == ["Inspection", "Underlayment", "Shingles"]
+    assert "3. **Shingles:**" in construction.body
+    assert "Variants" not in construction.body
+
+
+def test_labels_nested_under_a_heading_are_siblings():
+    construction = parse_research(DETAILED).find("Construction Process")
+    step_by_step = construction.children[0]
+    assert [(child.title, child.level) for child in step_by_step.children] == [("TIP", 4), ("NOTE", 4)]
+
+
+def test_top_level_labels_split_sections():
+    tree = parse_research("INSTALLATION:\n1. Tear off\nREPAIR:\n- Patch leaks\nMAINTENANCE:\nInspect yearly")
+    assert [(section.title, section.level) for section in tree.children] == [
+        ("INSTALLATION", 1), ("REPAIR", 1), ("MAINTENANCE", 1)]
+    assert tree.find("repair").points() == ["Patch leaks"]
+
+
+def test_label_with_text_is_a_pair_not_a_heading():
+    tree = parse_research("EPDM: rubber membrane\nTPO: white membrane")
+    assert tree.children == []
+    assert [(pair.key, pair.value) for pair in tree.pairs()] == [
+        ("EPDM", "rubber membrane"), ("TPO", "white membrane")]
+
+
+def test_bold_line_is_a_heading_and_bold_lead_is_a_pair():
+    tree = parse_research("**Key Benefits**\n**Protection:** Shields the roof.\n**Cost** - Low upkeep")
+    assert [section.title for section in tree.children] == ["Key Benefits"]
+    assert [(pair.key, pair.value) for pair in tree.pairs()] == [
+        ("Protection", "Shields the roof."), ("Cost", "Low upkeep")]
+
+
+def test_table_rows_are_cleaned_and_a_rule_ends_the_table():
+    tree = parse_research(DETAILED + "---\n| Lone | row |\n")
+    tables = tree.all_tables()
+    assert tables[0].header == ["Type", "Durability", "Cost"]
+    assert tables[0].records()[0] == {"Type": "Asphalt", "Durability": "20 years", "Cost": "$4"}
+    assert len(tables[0].rows) == 2
+    assert tables[1].header == ["Lone", "row"]
+
+
+def test_steps_fall_back_to_bullets():
+    tree = parse_research("- First\n* Second\n• Third")
+    assert [step.text for step in tree.steps()] == ["First", "Second", "Third"]
+
+
+def test_find_ignores_decoration_case_and_numbering():
+    assert heading_key("## **1. Construction Process**") == heading_key("CONSTRUCTION PROCESS:")
+    tree = parse_research(DETAILED)
+    assert tree.find("construction process") is tree.find("## **1. Construction Process**")
+    assert tree.find("Warranty") is None
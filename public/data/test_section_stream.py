@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Heading matching of the streamed section parser.
+
+    python -m pytest test_section_stream.py
+"""
+
+from research_parser import RESEARCH_SECTION_HEADINGS
+from section_stream import SectionStreamParser, parse_stream
+
+MARKERS = {"installation": "INSTALLATION:", "repair": "REPAIR:", "maintenance": "MAINTENANCE:"}
+
+
+def test_sections_complete_in_order_while_streaming():
+    done = []
+    parser = SectionStreamParser(MARKERS, on_section=lambda name, text: done.append((name, text)))
+    for piece in ("Intro\n**INSTALLATION:** Tear", " off\n### Repair\nPatch", "\nmaintenance: yearly"):
+        parser.feed(piece)
+    assert done == [("installation", "Tear off")]
+    assert parser.close() == {"installation": "Tear off", "repair": "Patch", "maintenance": "yearly"}
+
+
+def test_sentence_starting_with_a_heading_word_is_content():
+    sections = parse_stream(["INSTALLATION:\nInstallation of gutters takes a day\n"], MARKERS)
+    assert sections == {"installation": "Installation of gutters takes a day"}
+
+
+def test_numbered_step_does_not_open_a_section():
+    sections = parse_stream(["REPAIR:\n1. Patch leaks\n2. Maintenance: clear the gutters\nMAINTENANCE:\nYearly"],
+                            MARKERS)
+    assert sections["repair"] == "1. Patch leaks\n2. Maintenance: clear the gutters"
+    assert sections["maintenance"] == "Yearly"
+
+
+def test_numbered_markdown_headings():
+    reply = "## **1. Construction Process**\nSteps\n## 2. Variants\nAsphalt\n"
+    sections = parse_stream([reply], RESEARCH_SECTION_HEADINGS)
+    assert sections == {"construction_process": "Steps", "variants": "Asphalt"}